@@ -1,4 +1,94 @@
-from iprotopy.convertion import dataclass_to_protobuf, protobuf_to_dataclass
-from iprotopy.package_generator import PackageGenerator
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = [PackageGenerator, dataclass_to_protobuf, protobuf_to_dataclass]
+from iprotopy.convertion import (
+    dataclass_to_protobuf,
+    protobuf_to_dataclass,
+    protobuf_to_dict,
+    update_dataclass_from_protobuf,
+)
+from iprotopy.response_stream import ResponseStream
+
+if TYPE_CHECKING:
+    from iprotopy.dataclass_fields import LazyDataclassFields
+    from iprotopy.enums import IntEnumConstants
+    from iprotopy.fanout import FanOutPublisher, FanOutSubscriber
+    from iprotopy.hedging import Hedger, HedgingPolicy, create_hedge_stubs
+    from iprotopy.multiplexer import StreamMultiplexer
+    from iprotopy.package_generator import PackageGenerator
+    from iprotopy.parallel_conversion import ParallelConverter
+    from iprotopy.recording import StreamRecorder, StreamReplayer, record_responses
+    from iprotopy.scheduling import CallScheduler, RateLimit
+    from iprotopy.serialization import (
+        dataclass_deserializer,
+        dataclass_serializer,
+        pooled_dataclass_serializer,
+        pooled_protobuf_requests,
+    )
+    from iprotopy.wire_decoding import wire_deserializer
+
+# every generated module imports this package, so the generator and the
+# runtime helpers only some of them use are imported when first asked for
+_lazy_index = {
+    'CallScheduler': 'iprotopy.scheduling',
+    'FanOutPublisher': 'iprotopy.fanout',
+    'FanOutSubscriber': 'iprotopy.fanout',
+    'Hedger': 'iprotopy.hedging',
+    'HedgingPolicy': 'iprotopy.hedging',
+    'IntEnumConstants': 'iprotopy.enums',
+    'LazyDataclassFields': 'iprotopy.dataclass_fields',
+    'PackageGenerator': 'iprotopy.package_generator',
+    'ParallelConverter': 'iprotopy.parallel_conversion',
+    'RateLimit': 'iprotopy.scheduling',
+    'StreamMultiplexer': 'iprotopy.multiplexer',
+    'StreamRecorder': 'iprotopy.recording',
+    'StreamReplayer': 'iprotopy.recording',
+    'create_hedge_stubs': 'iprotopy.hedging',
+    'dataclass_deserializer': 'iprotopy.serialization',
+    'dataclass_serializer': 'iprotopy.serialization',
+    'pooled_dataclass_serializer': 'iprotopy.serialization',
+    'pooled_protobuf_requests': 'iprotopy.serialization',
+    'record_responses': 'iprotopy.recording',
+    'wire_deserializer': 'iprotopy.wire_decoding',
+}
+
+__all__ = [
+    'CallScheduler',
+    'FanOutPublisher',
+    'FanOutSubscriber',
+    'Hedger',
+    'HedgingPolicy',
+    'IntEnumConstants',
+    'LazyDataclassFields',
+    'PackageGenerator',
+    'ParallelConverter',
+    'RateLimit',
+    'ResponseStream',
+    'StreamMultiplexer',
+    'StreamRecorder',
+    'StreamReplayer',
+    'create_hedge_stubs',
+    'dataclass_deserializer',
+    'dataclass_serializer',
+    'dataclass_to_protobuf',
+    'pooled_dataclass_serializer',
+    'pooled_protobuf_requests',
+    'protobuf_to_dataclass',
+    'protobuf_to_dict',
+    'record_responses',
+    'update_dataclass_from_protobuf',
+    'wire_deserializer',
+]
+
+
+def __getattr__(name):
+    module_name = _lazy_index.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,24 +1,38 @@
+import ast
 from ast import (
     Assign,
     Attribute,
     Call,
     ClassDef,
+    Compare,
     Constant,
+    Eq,
     FunctionDef,
+    If,
+    Is,
     Load,
     Module,
     Name,
+    NotEq,
+    Raise,
+    Return,
     Store,
+    alias,
     arg,
     arguments,
 )
+from typing import List
 
+from iprotopy.constants import SOURCE_PACKAGE_NAME
 from iprotopy.domestic_importer import DomesticImporter
+from iprotopy.imports import ImportFrom
+from iprotopy.package_generator_settings import PackageGeneratorSettings
 
 
 class BaseServiceSourceGenerator:
-    def __init__(self, importer: DomesticImporter):
+    def __init__(self, importer: DomesticImporter, settings: PackageGeneratorSettings):
         self._importer = importer
+        self._settings = settings
 
     def create_source(self) -> Module:
         class_name = 'BaseService'
@@ -28,10 +42,7 @@ class BaseServiceSourceGenerator:
                 bases=[],
                 keywords=[],
                 body=[
-                    Assign(
-                        targets=[Name(id='_protobuf_stub', ctx=Store())],
-                        value=Constant(value=None),
-                    ),
+                    *self._get_class_attributes(),
                     FunctionDef(
                         name='__init__',
                         args=arguments(
@@ -40,30 +51,16 @@ class BaseServiceSourceGenerator:
                                 arg(arg='self'),
                                 arg(arg='channel'),
                                 arg(arg='metadata'),
+                                *self._get_optional_args(),
                             ],
                             kwonlyargs=[],
                             kw_defaults=[],
-                            defaults=[],
+                            defaults=[
+                                Constant(value=None) for _ in self._get_optional_args()
+                            ],
                         ),
                         body=[
-                            Assign(
-                                targets=[
-                                    Attribute(
-                                        value=Name(id='self', ctx=Load()),
-                                        attr='_stub',
-                                        ctx=Store(),
-                                    )
-                                ],
-                                value=Call(
-                                    func=Attribute(
-                                        value=Name(id='self', ctx=Load()),
-                                        attr='_protobuf_stub',
-                                        ctx=Load(),
-                                    ),
-                                    args=[Name(id='channel', ctx=Load())],
-                                    keywords=[],
-                                ),
-                            ),
+                            self._get_stub_assignment(),
                             Assign(
                                 targets=[
                                     Attribute(
@@ -74,12 +71,265 @@ class BaseServiceSourceGenerator:
                                 ],
                                 value=Name(id='metadata', ctx=Load()),
                             ),
+                            *(
+                                Assign(
+                                    targets=[
+                                        Attribute(
+                                            value=Name(id='self', ctx=Load()),
+                                            attr=f'_{optional_arg.arg}',
+                                            ctx=Store(),
+                                        )
+                                    ],
+                                    value=Name(id=optional_arg.arg, ctx=Load()),
+                                )
+                                for optional_arg in self._get_optional_args()
+                            ),
+                            *self._get_hedge_stubs(),
                         ],
                         decorator_list=[],
                     ),
+                    *self._get_lazy_stub_getter(),
                 ],
                 decorator_list=[],
             )
         ]
         self._importer.define_dependency(class_name)
         return Module(body=body, type_ignores=[])
+
+    def _get_optional_args(self) -> List[arg]:
+        optional_args = []
+        if self._settings.stream_recording:
+            optional_args.append(arg(arg='recorder'))
+        if self._settings.request_hedging:
+            optional_args.append(arg(arg='hedger'))
+        if self._settings.call_scheduling:
+            optional_args.append(arg(arg='scheduler'))
+        if self._settings.parallel_conversion:
+            optional_args.append(arg(arg='converter'))
+        return optional_args
+
+    def _get_stub_assignment(self) -> ast.stmt:
+        if self._settings.lazy_grpc_stubs:
+            return Assign(
+                targets=[
+                    Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_channel',
+                        ctx=Store(),
+                    )
+                ],
+                value=Name(id='channel', ctx=Load()),
+            )
+        return Assign(
+            targets=[
+                Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_stub',
+                    ctx=Store(),
+                )
+            ],
+            value=Call(
+                func=Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_protobuf_stub',
+                    ctx=Load(),
+                ),
+                args=[Name(id='channel', ctx=Load())],
+                keywords=[],
+            ),
+        )
+
+    def _get_hedge_stubs(self) -> List[ast.stmt]:
+        if not self._settings.request_hedging or self._settings.lazy_grpc_stubs:
+            return []
+        return [
+            self._get_hedge_stubs_assignment(
+                Name(id='metadata', ctx=Load()), Name(id='hedger', ctx=Load())
+            )
+        ]
+
+    def _get_hedge_stubs_assignment(
+        self, metadata: ast.expr, hedger: ast.expr
+    ) -> ast.stmt:
+        self._importer.add_import(
+            ImportFrom(
+                module=SOURCE_PACKAGE_NAME,
+                names=[alias(name='create_hedge_stubs')],
+                level=0,
+            )
+        )
+        return Assign(
+            targets=[
+                Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_hedge_stubs',
+                    ctx=Store(),
+                )
+            ],
+            value=Call(
+                func=Name(id='create_hedge_stubs', ctx=Load()),
+                args=[
+                    Call(
+                        func=Name(id='type', ctx=Load()),
+                        args=[Name(id='self', ctx=Load())],
+                        keywords=[],
+                    ),
+                    Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_stub',
+                        ctx=Load(),
+                    ),
+                    metadata,
+                    hedger,
+                ],
+                keywords=[],
+            ),
+        )
+
+    def _get_class_attributes(self) -> List[ast.stmt]:
+        attribute_names = ['_protobuf_stub']
+        if self._settings.lazy_grpc_stubs:
+            attribute_names.extend(['_protobuf_grpc_module', '_protobuf_stub_name'])
+        return [
+            Assign(
+                targets=[Name(id=attribute_name, ctx=Store())],
+                value=Constant(value=None),
+            )
+            for attribute_name in attribute_names
+        ]
+
+    def _get_lazy_stub_getter(self) -> List[ast.stmt]:
+        if not self._settings.lazy_grpc_stubs:
+            return []
+        body: List[ast.stmt] = []
+        if self._settings.request_hedging:
+            body.append(
+                If(
+                    test=Compare(
+                        left=Name(id='name', ctx=Load()),
+                        ops=[Eq()],
+                        comparators=[Constant(value='_hedge_stubs')],
+                    ),
+                    body=[
+                        self._get_hedge_stubs_assignment(
+                            self._get_self_attribute('_metadata'),
+                            self._get_self_attribute('_hedger'),
+                        ),
+                        Return(value=self._get_self_attribute('_hedge_stubs')),
+                    ],
+                    orelse=[],
+                )
+            )
+        body.extend(
+            [
+                If(
+                    test=Compare(
+                        left=Name(id='name', ctx=Load()),
+                        ops=[NotEq()],
+                        comparators=[Constant(value='_stub')],
+                    ),
+                    body=[
+                        Raise(
+                            exc=Call(
+                                func=Name(id='AttributeError', ctx=Load()),
+                                args=[Name(id='name', ctx=Load())],
+                                keywords=[],
+                            )
+                        )
+                    ],
+                    orelse=[],
+                ),
+                *self._get_stub_resolution(),
+                Assign(
+                    targets=[
+                        Attribute(
+                            value=Name(id='self', ctx=Load()),
+                            attr='_stub',
+                            ctx=Store(),
+                        )
+                    ],
+                    value=Call(
+                        func=self._get_self_attribute('_protobuf_stub'),
+                        args=[self._get_self_attribute('_channel')],
+                        keywords=[],
+                    ),
+                ),
+                Return(value=self._get_self_attribute('_stub')),
+            ]
+        )
+        # only called while the instance has no stub yet, so the first call
+        # creates it and the _pb2_grpc module (and grpc) is imported then
+        return [
+            FunctionDef(
+                name='__getattr__',
+                args=arguments(
+                    posonlyargs=[],
+                    args=[arg(arg='self'), arg(arg='name')],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=body,
+                decorator_list=[],
+            )
+        ]
+
+    def _get_self_attribute(self, attr: str) -> Attribute:
+        return Attribute(value=Name(id='self', ctx=Load()), attr=attr, ctx=Load())
+
+    def _get_stub_resolution(self) -> List[ast.stmt]:
+        self._importer.add_import(
+            ImportFrom(module='importlib', names=[alias(name='import_module')], level=0)
+        )
+        # the stub class is cached on the concrete service class
+        return [
+            If(
+                test=Compare(
+                    left=Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_protobuf_stub',
+                        ctx=Load(),
+                    ),
+                    ops=[Is()],
+                    comparators=[Constant(value=None)],
+                ),
+                body=[
+                    Assign(
+                        targets=[
+                            Attribute(
+                                value=Call(
+                                    func=Name(id='type', ctx=Load()),
+                                    args=[Name(id='self', ctx=Load())],
+                                    keywords=[],
+                                ),
+                                attr='_protobuf_stub',
+                                ctx=Store(),
+                            )
+                        ],
+                        value=Call(
+                            func=Name(id='getattr', ctx=Load()),
+                            args=[
+                                Call(
+                                    func=Name(id='import_module', ctx=Load()),
+                                    args=[
+                                        Attribute(
+                                            value=Name(id='self', ctx=Load()),
+                                            attr='_protobuf_grpc_module',
+                                            ctx=Load(),
+                                        )
+                                    ],
+                                    keywords=[],
+                                ),
+                                Attribute(
+                                    value=Name(id='self', ctx=Load()),
+                                    attr='_protobuf_stub_name',
+                                    ctx=Load(),
+                                ),
+                            ],
+                            keywords=[],
+                        ),
+                    )
+                ],
+                orelse=[],
+            )
+        ]
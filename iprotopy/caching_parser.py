@@ -0,0 +1,23 @@
+from collections import OrderedDict
+
+from proto_schema_parser.ast import File
+from proto_schema_parser.parser import Parser
+
+
+class CachingParser(Parser):
+    def __init__(self, max_size: int = 1024):
+        super().__init__()
+        self._max_size = max_size
+        self._files: OrderedDict[str, File] = OrderedDict()
+
+    def parse(self, text: str) -> File:
+        # parsed files are shared between generations and must not be mutated
+        file = self._files.get(text)
+        if file is not None:
+            self._files.move_to_end(text)
+            return file
+        file = super().parse(text)
+        self._files[text] = file
+        if len(self._files) > self._max_size:
+            self._files.popitem(last=False)
+        return file
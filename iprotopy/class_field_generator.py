@@ -9,6 +9,22 @@ from iprotopy.domestic_importer import DomesticImporter
 from iprotopy.imports import ImportFrom
 from iprotopy.type_mapper import TypeMapper
 
+# array typecodes of the numeric proto types, numpy accepts them as dtypes
+NUMERIC_TYPECODES = {
+    'double': 'd',
+    'float': 'f',
+    'int64': 'q',
+    'sint64': 'q',
+    'sfixed64': 'q',
+    'uint64': 'Q',
+    'fixed64': 'Q',
+    'int32': 'i',
+    'sint32': 'i',
+    'sfixed32': 'i',
+    'uint32': 'I',
+    'fixed32': 'I',
+}
+
 
 class ClassFieldGenerator:
     def __init__(self, importer: DomesticImporter, type_mapper: TypeMapper):
@@ -24,6 +40,9 @@ class ClassFieldGenerator:
         else:
             return self._process_single_field(field)
 
+    def get_field_name(self, unsafe_field_name: str) -> str:
+        return self._safe_field_name(unsafe_field_name)
+
     def _safe_field_name(self, unsafe_field_name: str) -> str:
         if keyword.iskeyword(unsafe_field_name):
             return f'{unsafe_field_name}_'
@@ -57,6 +76,18 @@ class ClassFieldGenerator:
         )
         return self._process_field_template(field, get_field)
 
+    def process_array_field(
+        self, field: Field, module: str, class_name: str
+    ) -> AnnAssign:
+        self._importer.add_import(
+            ImportFrom(module=module, names=[alias(name=class_name)], level=0)
+        )
+        return AnnAssign(
+            target=Name(id=self._safe_field_name(field.name), ctx=Store()),
+            annotation=Name(id=class_name, ctx=Load()),
+            simple=1,
+        )
+
     def _process_optional_field(self, field: Field) -> AnnAssign:
         def get_field(safe_field_name: str, safe_field_type: str) -> AnnAssign:
             return AnnAssign(
@@ -1,10 +1,16 @@
 import dataclasses
+from array import array
 from enum import Enum
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from functools import lru_cache, partial
 from typing import (
     Any,
+    Callable,
     Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
     Tuple,
     Type,
     TypeVar,
@@ -17,6 +23,9 @@ from typing import (
 from google.protobuf import symbol_database, message_factory
 from google.protobuf.timestamp_pb2 import Timestamp
 
+from iprotopy.enums import IntEnumConstants
+from iprotopy.interning import default_intern_table
+
 _UNKNOWN: Any = object()
 
 
@@ -31,70 +40,398 @@ def to_unsafe_field_name(field_name: str) -> str:
 T = TypeVar('T')
 
 
-def protobuf_to_dataclass(pb_obj: Any, dataclass_type: Type[T]) -> T:  # noqa:C901
+# field name to the projection of its nested message, None selects everything
+Projection = Dict[str, Optional['Projection']]
+
+
+def protobuf_to_dataclass(
+    pb_obj: Any,
+    dataclass_type: Type[T],
+    projection: Optional[Iterable[str]] = None,
+    keep_source: bool = False,
+) -> T:
+    if projection is None:
+        if keep_source:
+            # the kept source is sent instead of the instance later, so it
+            # must not follow changes the caller makes to its own message
+            pb_obj = _copy_message(pb_obj)
+        return _protobuf_to_dataclass(pb_obj, dataclass_type, None, keep_source)
+    # a projected instance does not hold the whole message, so its source
+    # is never reused
+    return _protobuf_to_dataclass(
+        pb_obj, dataclass_type, _parse_projection(tuple(projection))
+    )
+
+
+def _copy_message(pb_obj: Any) -> Any:
+    copy = type(pb_obj)()
+    copy.CopyFrom(pb_obj)
+    return copy
+
+
+@lru_cache(maxsize=256)
+def _parse_projection(paths: Tuple[str, ...]) -> Projection:
+    projection: Projection = {}
+    for path in paths:
+        node = projection
+        *parents, leaf = path.split('.')
+        for parent in parents:
+            child = node.setdefault(parent, {})
+            if child is None:
+                # the whole parent is already selected
+                break
+            node = child
+        else:
+            node[leaf] = None
+    return projection
+
+
+def _protobuf_to_dataclass(  # noqa:C901
+    pb_obj: Any,
+    dataclass_type: Type[T],
+    projection: Optional[Projection],
+    keep_source: bool = False,
+) -> T:
     dataclass_hints = get_type_hints(dataclass_type)
     dataclass_dict: Dict[str, Any] = {}
-    dataclass_fields = dataclass_type.__annotations__
+    one_of_groups = _get_one_of_groups(dataclass_type)
+    interned_fields = _get_interned_fields(dataclass_type)
+    array_fields = _get_array_fields(dataclass_type)
+    active_members: Dict[str, Optional[str]] = {}
+    if projection is not None:
+        unknown_fields = projection.keys() - dataclass_hints.keys()
+        if unknown_fields:
+            raise ValueError(
+                f'Unknown fields {sorted(unknown_fields)} '
+                f'in projection of {dataclass_type.__name__}'
+            )
+        # a nested path through a scalar field would be ignored otherwise
+        scalar_fields = [
+            field_name
+            for field_name, nested_projection in projection.items()
+            if nested_projection is not None
+            and not _is_message_type(dataclass_hints[field_name])
+        ]
+        if scalar_fields:
+            raise ValueError(
+                f'Fields {sorted(scalar_fields)} in projection of '
+                f'{dataclass_type.__name__} are not messages'
+            )
     for field_name, field_type in dataclass_hints.items():
+        nested_projection = None
+        if projection is not None:
+            if field_name not in projection:
+                dataclass_dict[field_name] = PLACEHOLDER
+                continue
+            nested_projection = projection[field_name]
         unsafe_field_name = to_unsafe_field_name(field_name)
+        group = one_of_groups.get(field_name)
+        if group is not None:
+            if group not in active_members:
+                active_members[group] = pb_obj.WhichOneof(group)
+            if active_members[group] != unsafe_field_name:
+                dataclass_dict[field_name] = None
+                continue
+            field_type = _get_member_type(field_type)
         pb_value = getattr(pb_obj, unsafe_field_name)
-        field_value = _UNKNOWN
-        # oneof = dataclass_fields[field_name].metadata["proto"].group
-        # if oneof and pb_obj.WhichOneof(oneof) != field_name:
-        #     dataclass_dict[field_name] = None
-        #     continue
+        if field_name in array_fields:
+            field_value = _to_array(pb_value, field_type, array_fields[field_name])
+        else:
+            field_value = _convert_value(
+                pb_value, field_type, nested_projection, keep_source
+            )
+        if field_name in interned_fields:
+            field_value = _intern_value(field_value)
+        dataclass_dict[field_name] = field_value
+    dataclass_obj = dataclass_type(**dataclass_dict)
+    if keep_source:
+        _keep_source(dataclass_obj, pb_obj, dataclass_dict)
+    return dataclass_obj
+
+
+def _convert_value(  # noqa:C901
+    pb_value: Any,
+    field_type: Any,
+    projection: Optional[Projection],
+    keep_source: bool = False,
+) -> Any:
+    field_value = _UNKNOWN
+
+    origin = get_origin(field_type)
+    if origin is None:
+        if field_type in PRIMITIVE_TYPES:
+            field_value = pb_value
+        if field_type == Decimal:
+            field_value = Decimal(str(pb_value))
+        elif issubclass(field_type, datetime):
+            field_value = ts_to_datetime(pb_value)
+        elif dataclasses.is_dataclass(field_type):
+            field_value = _protobuf_to_dataclass(
+                pb_value, field_type, projection, keep_source
+            )
+        elif issubclass(field_type, Enum):
+            field_value = field_type(pb_value)
+        elif issubclass(field_type, IntEnumConstants):
+            field_value = pb_value
+    elif origin is list:
+        args = get_args(field_type)
+        first_arg = args[0]
+        if first_arg in PRIMITIVE_TYPES or _is_int_constants(first_arg):
+            field_value = pb_value
+        elif dataclasses.is_dataclass(first_arg):
+            field_value = [
+                _protobuf_to_dataclass(item, first_arg, projection, keep_source)
+                for item in pb_value
+            ]
+        elif first_arg == Decimal:
+            field_value = [Decimal(str(item)) for item in pb_value]
+        elif first_arg == datetime:
+            field_value = [ts_to_datetime(item) for item in pb_value]
+        elif issubclass(field_type, Enum):
+            field_value = [field_type(item) for item in pb_value]
+    if origin == Union:
+        args = get_args(field_type)
+        if len(args) > 2:
+            raise NotImplementedError('Union of more than 2 args is not supported yet.')
+        first_arg, second_arg = args[0], args[1]
+        if second_arg == NoneType and str(pb_value) == '':
+            field_value = None
+        elif first_arg in PRIMITIVE_TYPES:
+            field_value = pb_value
+        elif first_arg == Decimal:
+            field_value = Decimal(str(pb_value))
+        elif issubclass(first_arg, datetime):
+            field_value = ts_to_datetime(pb_value)
+        elif dataclasses.is_dataclass(first_arg):
+            field_value = _protobuf_to_dataclass(
+                pb_value, first_arg, projection, keep_source
+            )
+        elif issubclass(first_arg, Enum):
+            field_value = first_arg(pb_value)
+        elif issubclass(first_arg, IntEnumConstants):
+            field_value = pb_value
+
+    if field_value is _UNKNOWN:
+        raise UnknownType(f'type "{field_type}" unknown')
+    return field_value
+
+
+def update_dataclass_from_protobuf(
+    pb_obj: Any, dataclass_obj: T, only_set_fields: bool = False
+) -> T:
+    dataclass_type = type(dataclass_obj)
+    field_types = _get_field_types(dataclass_type)
+    one_of_groups = _get_one_of_groups(dataclass_type)
+    interned_fields = _get_interned_fields(dataclass_type)
+    array_fields = _get_array_fields(dataclass_type)
+    active_members: Dict[str, Optional[str]] = {}
+    if only_set_fields:
+        field_names = _get_field_names(dataclass_type)
+        updated_fields: Iterable[str] = [
+            field_names[field_descriptor.name]
+            for field_descriptor, _ in pb_obj.ListFields()
+            if field_descriptor.name in field_names
+        ]
+    else:
+        updated_fields = field_types
+    # a kept source no longer matches the instance
+    dataclass_obj.__dict__.pop(_SOURCE_ATTRIBUTE, None)
+    for field_name in updated_fields:
+        field_type = field_types[field_name]
+        unsafe_field_name = to_unsafe_field_name(field_name)
+        group = one_of_groups.get(field_name)
+        if group is not None:
+            if group not in active_members:
+                active_members[group] = pb_obj.WhichOneof(group)
+                if only_set_fields:
+                    # the other members are not listed, but they are cleared
+                    for member in dataclass_type.__oneofs__[group]:  # type:ignore
+                        if member != field_name:
+                            setattr(dataclass_obj, member, None)
+            if active_members[group] != unsafe_field_name:
+                setattr(dataclass_obj, field_name, None)
+                continue
+            field_type = _get_member_type(field_type)
+        if field_name in array_fields:
+            setattr(
+                dataclass_obj,
+                field_name,
+                _to_array(
+                    getattr(pb_obj, unsafe_field_name),
+                    field_type,
+                    array_fields[field_name],
+                ),
+            )
+            continue
+        current_value = getattr(dataclass_obj, field_name)
+        field_value = _update_value(
+            getattr(pb_obj, unsafe_field_name),
+            field_type,
+            current_value,
+            only_set_fields,
+        )
+        if field_name in interned_fields:
+            field_value = _intern_value(field_value)
+        if field_value is not current_value:
+            setattr(dataclass_obj, field_name, field_value)
+    return dataclass_obj
+
+
+def _update_value(
+    pb_value: Any, field_type: Any, current_value: Any, only_set_fields: bool
+) -> Any:
+    origin = get_origin(field_type)
+    if origin is list:
+        (item_type,) = get_args(field_type)
+        if not isinstance(current_value, list):
+            return _convert_value(pb_value, field_type, None)
+        if dataclasses.is_dataclass(item_type):
+            # items are matched by position and updated as a whole
+            for i, pb_item in enumerate(pb_value):
+                if i < len(current_value):
+                    update_dataclass_from_protobuf(pb_item, current_value[i])
+                else:
+                    current_value.append(
+                        _protobuf_to_dataclass(pb_item, item_type, None)
+                    )
+            del current_value[len(pb_value) :]
+            return current_value
+        elif item_type in PRIMITIVE_TYPES:
+            current_value[:] = pb_value
+            return current_value
+    elif origin == Union:
+        message_type = get_args(field_type)[0]
+        if (
+            dataclasses.is_dataclass(message_type)
+            and isinstance(current_value, message_type)
+            and pb_value.ByteSize()
+        ):
+            update_dataclass_from_protobuf(pb_value, current_value, only_set_fields)
+            return current_value
+    elif dataclasses.is_dataclass(field_type) and isinstance(current_value, field_type):
+        update_dataclass_from_protobuf(pb_value, current_value, only_set_fields)
+        return current_value
+    return _convert_value(pb_value, field_type, None)
+
+
+@lru_cache(maxsize=None)
+def _get_array_fields(dataclass_type: Type[Any]) -> Dict[str, str]:
+    return dict(getattr(dataclass_type, '__arrays__', {}))
+
+
+def _to_array(pb_value: Any, field_type: Any, typecode: str) -> Any:
+    if field_type is array:
+        return array(typecode, pb_value)
+    # only reachable when the generated module imported numpy
+    import numpy
+
+    return numpy.fromiter(pb_value, dtype=typecode, count=len(pb_value))
+
+
+@lru_cache(maxsize=None)
+def _get_field_types(dataclass_type: Type[Any]) -> Dict[str, Any]:
+    return get_type_hints(dataclass_type)
+
+
+@lru_cache(maxsize=None)
+def _get_field_names(dataclass_type: Type[Any]) -> Dict[str, str]:
+    return {
+        to_unsafe_field_name(field_name): field_name
+        for field_name in _get_field_types(dataclass_type)
+    }
+
+
+_SOURCE_ATTRIBUTE = '__protobuf_source__'
+
+
+def _keep_source(dataclass_obj: Any, pb_obj: Any, dataclass_dict: Dict[str, Any]):
+    # the values are compared by identity later, lists also by their items,
+    # so any assignment or list mutation marks the instance as modified
+    snapshot = tuple(
+        (field_name, value, _get_items_snapshot(value))
+        for field_name, value in dataclass_dict.items()
+    )
+    # object.__setattr__ works for frozen dataclasses too
+    object.__setattr__(dataclass_obj, _SOURCE_ATTRIBUTE, (pb_obj, snapshot))
+
+
+def _get_items_snapshot(value: Any) -> Any:
+    if hasattr(value, 'tobytes'):
+        # arrays yield new objects for their items, their buffer is compared
+        return value.tobytes()
+    if not isinstance(value, (str, bytes)) and hasattr(value, '__len__'):
+        return tuple(value)
+    return None
+
+
+def get_unmodified_source(dataclass_obj: Any) -> Optional[Any]:
+    source = getattr(dataclass_obj, _SOURCE_ATTRIBUTE, None)
+    if source is None:
+        return None
+    pb_obj, snapshot = source
+    for field_name, value, items in snapshot:
+        current = getattr(dataclass_obj, field_name)
+        if current is not value:
+            return None
+        if items is None:
+            if _is_modified_dataclass(current):
+                return None
+            continue
+        if isinstance(items, bytes):
+            if current.tobytes() != items:
+                return None
+            continue
+        if len(current) != len(items):
+            return None
+        for current_item, item in zip(current, items):
+            if current_item is not item or _is_modified_dataclass(current_item):
+                return None
+    return pb_obj
 
-        origin = get_origin(field_type)
-        if origin is None:
-            if field_type in PRIMITIVE_TYPES:
-                field_value = pb_value
-            if field_type == Decimal:
-                field_value = Decimal(str(pb_value))
-            elif issubclass(field_type, datetime):
-                field_value = ts_to_datetime(pb_value)
-            elif dataclasses.is_dataclass(field_type):
-                field_value = protobuf_to_dataclass(pb_value, field_type)
-            elif issubclass(field_type, Enum):
-                field_value = field_type(pb_value)
-        elif origin == list:
-            args = get_args(field_type)
-            first_arg = args[0]
-            if first_arg in PRIMITIVE_TYPES:
-                field_value = pb_value
-            elif dataclasses.is_dataclass(first_arg):
-                field_value = [
-                    protobuf_to_dataclass(item, first_arg) for item in pb_value
-                ]
-            elif first_arg == Decimal:
-                field_value = [Decimal(str(item)) for item in pb_value]
-            elif first_arg == datetime:
-                field_value = [ts_to_datetime(item) for item in pb_value]
-            elif issubclass(field_type, Enum):
-                field_value = [field_type(item) for item in pb_value]
-        if origin == Union:
-            args = get_args(field_type)
-            if len(args) > 2:
-                raise NotImplementedError(
-                    'Union of more than 2 args is not supported yet.'
-                )
-            first_arg, second_arg = args[0], args[1]
-            if second_arg == NoneType and str(pb_value) == '':
-                field_value = None
-            elif first_arg in PRIMITIVE_TYPES:
-                field_value = pb_value
-            elif first_arg == Decimal:
-                field_value = Decimal(str(pb_value))
-            elif issubclass(first_arg, datetime):
-                field_value = ts_to_datetime(pb_value)
-            elif dataclasses.is_dataclass(first_arg):
-                field_value = protobuf_to_dataclass(pb_value, first_arg)
-            elif issubclass(first_arg, Enum):
-                field_value = first_arg(pb_value)
 
-        if field_value is _UNKNOWN:
-            raise UnknownType(f'type "{field_type}" unknown')
-        dataclass_dict[field_name] = field_value
-    return dataclass_type(**dataclass_dict)
+def _is_modified_dataclass(value: Any) -> bool:
+    return (
+        dataclasses.is_dataclass(value)
+        and not isinstance(value, type)
+        and get_unmodified_source(value) is None
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_one_of_groups(dataclass_type: Type[Any]) -> Dict[str, str]:
+    one_of_groups = getattr(dataclass_type, '__oneofs__', {})
+    return {
+        field_name: group
+        for group, field_names in one_of_groups.items()
+        for field_name in field_names
+    }
+
+
+def _is_message_type(field_type: Any) -> bool:
+    if get_origin(field_type) in (list, Union):
+        field_type = get_args(field_type)[0]
+    return dataclasses.is_dataclass(field_type)
+
+
+def _get_member_type(field_type: Any) -> Any:
+    # the active oneof member is set even when it holds the default value,
+    # so the empty value rule of Optional fields does not apply to it
+    if get_origin(field_type) == Union:
+        return get_args(field_type)[0]
+    return field_type
+
+
+@lru_cache(maxsize=None)
+def _get_interned_fields(dataclass_type: Type[Any]) -> FrozenSet[str]:
+    return frozenset(getattr(dataclass_type, '__interned__', ()))
+
+
+def _intern_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return default_intern_table.intern(value)
+    elif value is None:
+        return value
+    return [default_intern_table.intern(item) for item in value]
 
 
 def dataclass_to_protobuf(dataclass_obj: Any, protobuf_obj: T) -> T:  # noqa:C901
@@ -103,10 +440,19 @@ def dataclass_to_protobuf(dataclass_obj: Any, protobuf_obj: T) -> T:  # noqa:C90
     if not dataclass_hints:
         protobuf_obj.SetInParent()  # type:ignore
         return protobuf_obj
+    source = get_unmodified_source(dataclass_obj)
+    descriptor = protobuf_obj.DESCRIPTOR  # type:ignore
+    if source is not None and source.DESCRIPTOR is descriptor:
+        protobuf_obj.MergeFrom(source)  # type:ignore
+        return protobuf_obj
+    array_fields = _get_array_fields(dataclass_type)
     for field_name, field_type in dataclass_hints.items():
         field_value = getattr(dataclass_obj, field_name)
         if field_value is PLACEHOLDER:
             continue
+        if field_name in array_fields:
+            getattr(protobuf_obj, field_name).extend(field_value.tolist())
+            continue
         origin = get_origin(field_type)
         if origin is None:
             _update_field(field_type, protobuf_obj, field_name, field_value)
@@ -114,7 +460,7 @@ def dataclass_to_protobuf(dataclass_obj: Any, protobuf_obj: T) -> T:  # noqa:C90
             args = get_args(field_type)
             first_arg = args[0]
             pb_value = getattr(protobuf_obj, field_name)
-            if first_arg in PRIMITIVE_TYPES:
+            if first_arg in PRIMITIVE_TYPES or _is_int_constants(first_arg):
                 pb_value.extend(item for item in field_value)
             elif dataclasses.is_dataclass(first_arg):
                 descriptor = protobuf_obj.DESCRIPTOR  # type:ignore
@@ -164,10 +510,137 @@ def _update_field(
         if isinstance(field_value, int):
             field_value = field_type(field_value)
         setattr(protobuff_obj, field_name, field_value.value)
+    elif issubclass(field_type, IntEnumConstants):
+        setattr(protobuff_obj, field_name, int(field_value))
     else:
         raise UnknownType(f'type {field_type} unknown')
 
 
+# field name, protobuf field name, whether it is a oneof member, converter
+_DictField = Tuple[str, str, bool, Callable[[Any], Any]]
+# the fields and the oneof groups of a message
+_DictPlan = Tuple[Tuple[_DictField, ...], Tuple[str, ...]]
+_dict_plans: Dict[Type[Any], _DictPlan] = {}
+
+
+def protobuf_to_dict(pb_obj: Any, dataclass_type: Type[Any]) -> Dict[str, Any]:
+    plan = _dict_plans.get(dataclass_type)
+    if plan is None:
+        plan = _dict_plans[dataclass_type] = _create_dict_plan(dataclass_type)
+    fields, one_of_groups = plan
+    if not one_of_groups:
+        return {
+            field_name: convert(getattr(pb_obj, unsafe_field_name))
+            for field_name, unsafe_field_name, _, convert in fields
+        }
+    active_members = {pb_obj.WhichOneof(group) for group in one_of_groups}
+    return {
+        field_name: convert(getattr(pb_obj, unsafe_field_name))
+        if not in_oneof or unsafe_field_name in active_members
+        else None
+        for field_name, unsafe_field_name, in_oneof, convert in fields
+    }
+
+
+def _create_dict_plan(dataclass_type: Type[Any]) -> _DictPlan:
+    fields = []
+    array_fields = _get_array_fields(dataclass_type)
+    one_of_groups = _get_one_of_groups(dataclass_type)
+    for field_name, field_type in get_type_hints(dataclass_type).items():
+        origin = get_origin(field_type)
+        in_oneof = field_name in one_of_groups
+        if in_oneof:
+            convert: Callable[[Any], Any] = _get_dict_converter(
+                _get_member_type(field_type)
+            )
+        elif field_name in array_fields:
+            convert = list
+        elif origin is list:
+            (item_type,) = get_args(field_type)
+            convert = _get_dict_converter(item_type)
+            if convert is _identity:
+                convert = list
+            else:
+                convert = _list_converter(convert)
+        elif origin == Union:
+            args = get_args(field_type)
+            if len(args) > 2 or args[1] is not NoneType:
+                raise NotImplementedError(
+                    'Union of more than 2 args is not supported yet.'
+                )
+            convert = _optional_converter(args[0], _get_dict_converter(args[0]))
+        else:
+            convert = _get_dict_converter(field_type)
+        fields.append((field_name, to_unsafe_field_name(field_name), in_oneof, convert))
+    return tuple(fields), tuple(getattr(dataclass_type, '__oneofs__', {}))
+
+
+def _get_dict_converter(field_type: Any) -> Callable[[Any], Any]:
+    if field_type in PRIMITIVE_TYPES or field_type is bytes:
+        return _identity
+    elif field_type == Decimal:
+        return str
+    elif isinstance(field_type, type) and issubclass(field_type, datetime):
+        return _ts_to_isoformat
+    elif dataclasses.is_dataclass(field_type):
+        return partial(protobuf_to_dict, dataclass_type=field_type)
+    elif isinstance(field_type, type) and issubclass(field_type, Enum):
+        return _enum_name_converter(field_type)
+    elif _is_int_constants(field_type):
+        return field_type._get_name
+    raise UnknownType(f'type "{field_type}" unknown')
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _ts_to_isoformat(value: Timestamp) -> str:
+    return ts_to_datetime(value).isoformat()
+
+
+def _list_converter(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def convert_list(values: Any) -> Any:
+        return [convert(value) for value in values]
+
+    return convert_list
+
+
+def _optional_converter(
+    field_type: Any, convert: Callable[[Any], Any]
+) -> Callable[[Any], Any]:
+    # same rule as protobuf_to_dataclass: a value printing as '' is None,
+    # which for messages means no field is set
+    if isinstance(field_type, type) and (
+        issubclass(field_type, datetime) or dataclasses.is_dataclass(field_type)
+    ):
+
+        def convert_message(value: Any) -> Any:
+            if not value.ByteSize():
+                return None
+            return convert(value)
+
+        return convert_message
+
+    def convert_scalar(value: Any) -> Any:
+        if value == '':
+            return None
+        return convert(value)
+
+    return convert_scalar
+
+
+def _enum_name_converter(enum_type: Type[Enum]) -> Callable[[Any], Any]:
+    def convert_enum(value: Any) -> Any:
+        return enum_type(value).name
+
+    return convert_enum
+
+
+def _is_int_constants(field_type: Any) -> bool:
+    return isinstance(field_type, type) and issubclass(field_type, IntEnumConstants)
+
+
 def datetime_to_ts(value: datetime) -> Tuple[int, int]:
     seconds = int(value.timestamp())
     nanos = int(value.microsecond * 1e3)
@@ -0,0 +1,21 @@
+import dataclasses
+from typing import Any, Dict, Optional, Type
+
+
+class LazyDataclassFields:
+    # stands in for __dataclass_fields__ of classes generated with their
+    # dataclass methods already written out; the fields are built by the
+    # dataclass decorator on first access, with method generation switched off
+    def __init__(self):
+        self._owner: Optional[Type[Any]] = None
+
+    def __set_name__(self, owner: Type[Any], name: str):
+        self._owner = owner
+
+    def __get__(
+        self, instance: Any, owner: Optional[Type[Any]] = None
+    ) -> Dict[str, dataclasses.Field]:
+        dataclass_type = self._owner
+        if dataclass_type.__dict__.get('__dataclass_fields__') is self:
+            dataclasses.dataclass(init=False, repr=False, eq=False)(dataclass_type)
+        return dataclass_type.__dict__['__dataclass_fields__']
@@ -0,0 +1,195 @@
+from ast import (
+    AnnAssign,
+    Assign,
+    Attribute,
+    Call,
+    Compare,
+    Constant,
+    Eq,
+    FormattedValue,
+    FunctionDef,
+    If,
+    Is,
+    JoinedStr,
+    Load,
+    Name,
+    Pass,
+    Return,
+    Store,
+    Tuple,
+    alias,
+    arg,
+    arguments,
+    stmt,
+)
+from typing import List
+
+from iprotopy.constants import SOURCE_PACKAGE_NAME
+from iprotopy.domestic_importer import DomesticImporter
+from iprotopy.imports import ImportFrom
+
+
+class DataclassMethodGenerator:
+    def __init__(self, importer: DomesticImporter):
+        self._importer = importer
+
+    def create_members(self, fields: List[AnnAssign]) -> List[stmt]:
+        self._importer.add_import(
+            ImportFrom(
+                module=SOURCE_PACKAGE_NAME,
+                names=[alias(name='LazyDataclassFields')],
+                level=0,
+            )
+        )
+        field_names = [field.target.id for field in fields]
+        return [
+            Assign(
+                targets=[Name(id='__dataclass_fields__', ctx=Store())],
+                value=Call(
+                    func=Name(id='LazyDataclassFields', ctx=Load()),
+                    args=[],
+                    keywords=[],
+                ),
+            ),
+            Assign(
+                targets=[Name(id='__match_args__', ctx=Store())],
+                value=Tuple(
+                    elts=[Constant(value=field_name) for field_name in field_names],
+                    ctx=Load(),
+                ),
+            ),
+            Assign(
+                targets=[Name(id='__hash__', ctx=Store())],
+                value=Constant(value=None),
+            ),
+            self._get_init_function(fields),
+            self._get_repr_function(field_names),
+            self._get_eq_function(field_names),
+        ]
+
+    def _get_init_function(self, fields: List[AnnAssign]) -> FunctionDef:
+        field_names = [field.target.id for field in fields]
+        # the same fallback the dataclass decorator uses for a field named self
+        self_name = '__dataclass_self__' if 'self' in field_names else 'self'
+        body: List[stmt] = [
+            Assign(
+                targets=[
+                    Attribute(
+                        value=Name(id=self_name, ctx=Load()),
+                        attr=field_name,
+                        ctx=Store(),
+                    )
+                ],
+                value=Name(id=field_name, ctx=Load()),
+            )
+            for field_name in field_names
+        ]
+        return FunctionDef(
+            name='__init__',
+            args=arguments(
+                posonlyargs=[],
+                args=[arg(arg=self_name)]
+                + [
+                    arg(arg=field.target.id, annotation=field.annotation)
+                    for field in fields
+                ],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[field.value for field in fields if field.value is not None],
+            ),
+            body=body or [Pass()],
+            decorator_list=[],
+        )
+
+    def _get_repr_function(self, field_names: List[str]) -> FunctionDef:
+        values = [
+            FormattedValue(
+                value=Attribute(
+                    value=Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='__class__',
+                        ctx=Load(),
+                    ),
+                    attr='__qualname__',
+                    ctx=Load(),
+                ),
+                conversion=-1,
+            ),
+        ]
+        for i, field_name in enumerate(field_names):
+            separator = ', ' if i else '('
+            values.append(Constant(value=f'{separator}{field_name}='))
+            values.append(
+                FormattedValue(
+                    value=Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr=field_name,
+                        ctx=Load(),
+                    ),
+                    conversion=ord('r'),
+                )
+            )
+        values.append(Constant(value=')' if field_names else '()'))
+        return FunctionDef(
+            name='__repr__',
+            args=self._get_arguments('self'),
+            body=[Return(value=JoinedStr(values=values))],
+            decorator_list=[],
+        )
+
+    def _get_eq_function(self, field_names: List[str]) -> FunctionDef:
+        return FunctionDef(
+            name='__eq__',
+            args=self._get_arguments('self', 'other'),
+            body=[
+                If(
+                    test=Compare(
+                        left=Attribute(
+                            value=Name(id='other', ctx=Load()),
+                            attr='__class__',
+                            ctx=Load(),
+                        ),
+                        ops=[Is()],
+                        comparators=[
+                            Attribute(
+                                value=Name(id='self', ctx=Load()),
+                                attr='__class__',
+                                ctx=Load(),
+                            )
+                        ],
+                    ),
+                    body=[
+                        Return(
+                            value=Compare(
+                                left=self._get_fields_tuple('self', field_names),
+                                ops=[Eq()],
+                                comparators=[
+                                    self._get_fields_tuple('other', field_names)
+                                ],
+                            )
+                        )
+                    ],
+                    orelse=[],
+                ),
+                Return(value=Name(id='NotImplemented', ctx=Load())),
+            ],
+            decorator_list=[],
+        )
+
+    def _get_fields_tuple(self, name: str, field_names: List[str]) -> Tuple:
+        return Tuple(
+            elts=[
+                Attribute(value=Name(id=name, ctx=Load()), attr=field_name, ctx=Load())
+                for field_name in field_names
+            ],
+            ctx=Load(),
+        )
+
+    def _get_arguments(self, *names: str) -> arguments:
+        return arguments(
+            posonlyargs=[],
+            args=[arg(arg=name) for name in names],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        )
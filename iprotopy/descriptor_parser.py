@@ -0,0 +1,243 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from google.protobuf.descriptor_pb2 import (
+    DescriptorProto,
+    EnumDescriptorProto,
+    FieldDescriptorProto,
+    FileDescriptorProto,
+    FileDescriptorSet,
+    ServiceDescriptorProto,
+    SourceCodeInfo,
+)
+from proto_schema_parser import Field, FieldCardinality, Message
+from proto_schema_parser.ast import (
+    Comment,
+    Enum,
+    EnumValue,
+    File,
+    MapField,
+    MessageType,
+    Method,
+    OneOf,
+    Package,
+    Service,
+)
+from proto_schema_parser.ast import (
+    Import as ProtoImport,
+)
+
+# field numbers of FileDescriptorProto and DescriptorProto used in source info paths
+_FILE_MESSAGE_TYPE = 4
+_FILE_ENUM_TYPE = 5
+_FILE_SERVICE = 6
+_MESSAGE_FIELD = 2
+_MESSAGE_NESTED_TYPE = 3
+_MESSAGE_ENUM_TYPE = 4
+_SERVICE_METHOD = 2
+
+_SCALAR_TYPES = {
+    FieldDescriptorProto.TYPE_DOUBLE: 'double',
+    FieldDescriptorProto.TYPE_FLOAT: 'float',
+    FieldDescriptorProto.TYPE_INT64: 'int64',
+    FieldDescriptorProto.TYPE_UINT64: 'uint64',
+    FieldDescriptorProto.TYPE_INT32: 'int32',
+    FieldDescriptorProto.TYPE_FIXED64: 'fixed64',
+    FieldDescriptorProto.TYPE_FIXED32: 'fixed32',
+    FieldDescriptorProto.TYPE_BOOL: 'bool',
+    FieldDescriptorProto.TYPE_STRING: 'string',
+    FieldDescriptorProto.TYPE_BYTES: 'bytes',
+    FieldDescriptorProto.TYPE_UINT32: 'uint32',
+    FieldDescriptorProto.TYPE_SFIXED32: 'sfixed32',
+    FieldDescriptorProto.TYPE_SFIXED64: 'sfixed64',
+    FieldDescriptorProto.TYPE_SINT32: 'sint32',
+    FieldDescriptorProto.TYPE_SINT64: 'sint64',
+}
+
+SourcePath = Tuple[int, ...]
+
+
+class DescriptorParser:
+    def __init__(self, file_descriptor_set: FileDescriptorSet):
+        self._files: Dict[str, FileDescriptorProto] = {
+            file.name: file for file in file_descriptor_set.file
+        }
+        self._type_names: Dict[str, str] = {}
+        self._map_entries: Dict[str, DescriptorProto] = {}
+        for file in file_descriptor_set.file:
+            package = f'.{file.package}' if file.package else ''
+            self._register_types(package, '', file.message_type, file.enum_type)
+        self._locations: Dict[SourcePath, SourceCodeInfo.Location] = {}
+
+    def _register_types(
+        self,
+        proto_prefix: str,
+        python_prefix: str,
+        messages: Sequence[DescriptorProto],
+        enums: Sequence[EnumDescriptorProto],
+    ):
+        for enum in enums:
+            self._type_names[f'{proto_prefix}.{enum.name}'] = (
+                f'{python_prefix}{enum.name}'
+            )
+        for message in messages:
+            full_name = f'{proto_prefix}.{message.name}'
+            if message.options.map_entry:
+                self._map_entries[full_name] = message
+                continue
+            python_name = f'{python_prefix}{message.name}'
+            self._type_names[full_name] = python_name
+            self._register_types(
+                full_name, f'{python_name}.', message.nested_type, message.enum_type
+            )
+
+    def get_symbols(self, name: str) -> List[str]:
+        file = self._files[name]
+        symbols = [service.name for service in file.service]
+        symbols.extend(enum.name for enum in file.enum_type)
+        pending = list(file.message_type)
+        while pending:
+            message = pending.pop()
+            if message.options.map_entry:
+                continue
+            symbols.append(message.name)
+            symbols.extend(enum.name for enum in message.enum_type)
+            pending.extend(message.nested_type)
+        return symbols
+
+    def parse_file(self, name: str) -> File:
+        file = self._files[name]
+        self._locations = {
+            tuple(location.path): location
+            for location in file.source_code_info.location
+        }
+        elements = []
+        if file.package:
+            elements.append(Package(name=file.package))
+        elements.extend(ProtoImport(name=dependency) for dependency in file.dependency)
+
+        declarations = []
+        for i, service in enumerate(file.service):
+            path = (_FILE_SERVICE, i)
+            declarations.append((path, self._parse_service(service, path)))
+        for i, message in enumerate(file.message_type):
+            path = (_FILE_MESSAGE_TYPE, i)
+            declarations.append((path, self._parse_message(message, path)))
+        for i, enum in enumerate(file.enum_type):
+            path = (_FILE_ENUM_TYPE, i)
+            declarations.append((path, self._parse_enum(enum)))
+        elements.extend(self._in_source_order(declarations))
+        return File(syntax=file.syntax or None, file_elements=elements)
+
+    def _in_source_order(self, declarations: List[Tuple[SourcePath, object]]) -> List:
+        if not self._locations:
+            return [element for _, element in declarations]
+        return [
+            element
+            for _, element in sorted(
+                declarations, key=lambda declaration: self._get_span(declaration[0])
+            )
+        ]
+
+    def _get_span(self, path: SourcePath) -> List[int]:
+        location = self._locations.get(path)
+        if location is None:
+            return []
+        return list(location.span)
+
+    def _parse_message(self, message: DescriptorProto, path: SourcePath) -> Message:
+        declarations = []
+        one_ofs: Dict[int, OneOf] = {}
+        for i, field in enumerate(message.field):
+            element = self._parse_field(field)
+            if field.HasField('oneof_index') and not field.proto3_optional:
+                one_of = one_ofs.get(field.oneof_index)
+                if one_of is not None:
+                    one_of.elements.append(element)
+                    continue
+                element = OneOf(
+                    name=message.oneof_decl[field.oneof_index].name,
+                    elements=[element],
+                )
+                one_ofs[field.oneof_index] = element
+            declarations.append(((*path, _MESSAGE_FIELD, i), element))
+        for i, nested in enumerate(message.nested_type):
+            if nested.options.map_entry:
+                continue
+            nested_path = (*path, _MESSAGE_NESTED_TYPE, i)
+            declarations.append((nested_path, self._parse_message(nested, nested_path)))
+        for i, enum in enumerate(message.enum_type):
+            declarations.append(
+                ((*path, _MESSAGE_ENUM_TYPE, i), self._parse_enum(enum))
+            )
+        return Message(name=message.name, elements=self._in_source_order(declarations))
+
+    def _parse_field(self, field: FieldDescriptorProto):
+        map_entry = self._map_entries.get(field.type_name)
+        if map_entry is not None:
+            key, value = map_entry.field
+            return MapField(
+                name=field.name,
+                number=field.number,
+                key_type=self._get_type(key),
+                value_type=self._get_type(value),
+                options=[],
+            )
+        cardinality: Optional[FieldCardinality] = None
+        if field.label == FieldDescriptorProto.LABEL_REPEATED:
+            cardinality = FieldCardinality.REPEATED
+        elif field.proto3_optional:
+            cardinality = FieldCardinality.OPTIONAL
+        return Field(
+            name=field.name,
+            number=field.number,
+            type=self._get_type(field),
+            cardinality=cardinality,
+            options=[],
+        )
+
+    def _get_type(self, field: FieldDescriptorProto) -> str:
+        if field.type in _SCALAR_TYPES:
+            return _SCALAR_TYPES[field.type]
+        return self._resolve_type_name(field.type_name)
+
+    def _resolve_type_name(self, type_name: str) -> str:
+        # types defined in the generated files resolve to the name of the class
+        # within its module, so the first segment is always the top-level class;
+        # anything else (google.protobuf well known types) keeps its proto name
+        return self._type_names.get(type_name, type_name.lstrip('.'))
+
+    def _parse_enum(self, enum: EnumDescriptorProto) -> Enum:
+        return Enum(
+            name=enum.name,
+            elements=[
+                EnumValue(name=value.name, number=value.number, options=[])
+                for value in enum.value
+            ],
+        )
+
+    def _parse_service(
+        self, service: ServiceDescriptorProto, path: SourcePath
+    ) -> Service:
+        elements = []
+        for i, method in enumerate(service.method):
+            location = self._locations.get((*path, _SERVICE_METHOD, i))
+            if i == 0 and location is not None and location.leading_comments:
+                # the text parser turns the comment opening the service body
+                # into the service docstring
+                first_line = location.leading_comments.splitlines()[0]
+                elements.append(Comment(text=f'//{first_line}'))
+            elements.append(
+                Method(
+                    name=method.name,
+                    input_type=MessageType(
+                        type=self._resolve_type_name(method.input_type),
+                        stream=method.client_streaming,
+                    ),
+                    output_type=MessageType(
+                        type=self._resolve_type_name(method.output_type),
+                        stream=method.server_streaming,
+                    ),
+                    elements=[],
+                )
+            )
+        return Service(name=service.name, elements=elements)
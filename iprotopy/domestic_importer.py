@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Set
+from typing import Optional, Set
 
 from iprotopy.import_types import AstImport
 from iprotopy.importer import Importer
@@ -9,12 +9,19 @@ class DomesticImporter:
     def __init__(self, importer: Importer, pyfile: Path):
         self._importer = importer
         self._pyfile = pyfile
+        self._referrer: Optional[str] = None
+
+    def set_referrer(self, name: Optional[str]):
+        self._referrer = name
 
     def define_dependency(self, name: str):
         self._importer.define_dependency(name, self._pyfile)
 
     def import_dependency(self, name: str):
-        self._importer.import_dependency(name, self._pyfile)
+        self._importer.import_dependency(name, self._pyfile, self._referrer)
+
+    def get_definition_module(self, name: str) -> str:
+        return self._importer.get_definition_module(name)
 
     def get_imports(self) -> Set[AstImport]:
         return self._importer.get_imports(self._pyfile)
@@ -2,13 +2,19 @@ from ast import Assign, ClassDef, Constant, Load, Name, Store, alias
 
 from proto_schema_parser.ast import Comment, EnumValue
 
+from iprotopy.constants import SOURCE_PACKAGE_NAME
 from iprotopy.domestic_importer import DomesticImporter
 from iprotopy.imports import ImportFrom
+from iprotopy.package_generator_settings import (
+    EnumRepresentation,
+    PackageGeneratorSettings,
+)
 
 
 class EnumGenerator:
-    def __init__(self, importer: DomesticImporter):
+    def __init__(self, importer: DomesticImporter, settings: PackageGeneratorSettings):
         self._importer = importer
+        self._settings = settings
 
     def process_enum(self, element) -> ClassDef:
         enum_body = []
@@ -26,9 +32,14 @@ class EnumGenerator:
             else:
                 raise NotImplementedError(f'Unknown enum_element {enum_element}')
 
-        enum_type = 'IntEnum'
+        if self._settings.enum_representation == EnumRepresentation.INT_CONSTANTS:
+            enum_type = 'IntEnumConstants'
+            enum_module = SOURCE_PACKAGE_NAME
+        else:
+            enum_type = 'IntEnum'
+            enum_module = 'enum'
         self._importer.add_import(
-            ImportFrom(module='enum', names=[alias(name=enum_type)], level=0)
+            ImportFrom(module=enum_module, names=[alias(name=enum_type)], level=0)
         )
         enum_name = element.name
         self._importer.define_dependency(enum_name)
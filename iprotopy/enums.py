@@ -0,0 +1,33 @@
+from enum import IntEnum
+from typing import Dict, Type
+
+
+class IntEnumConstants:
+    # subclasses only hold int constants, which is much cheaper to create than
+    # an IntEnum; the equivalent IntEnum is built when it is first needed.
+    # Like namedtuple's _asdict, the methods start with an underscore so that
+    # they never clash with the names of the generated constants
+    @classmethod
+    def _as_enum(cls) -> Type[IntEnum]:
+        enum_type = cls.__dict__.get('_enum_type')
+        if enum_type is None:
+            enum_type = IntEnum(  # type:ignore
+                cls.__name__,
+                cls._get_members(),
+                module=cls.__module__,
+                qualname=cls.__qualname__,
+            )
+            cls._enum_type = enum_type
+        return enum_type
+
+    @classmethod
+    def _get_members(cls) -> Dict[str, int]:
+        return {
+            name: value
+            for name, value in vars(cls).items()
+            if not name.startswith('_') and isinstance(value, int)
+        }
+
+    @classmethod
+    def _get_name(cls, value: int) -> str:
+        return cls._as_enum()(value).name
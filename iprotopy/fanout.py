@@ -0,0 +1,258 @@
+import logging
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Iterator, List, Optional, Set, Type, TypeVar
+
+from iprotopy.recording import BaseStreamRecorder
+from iprotopy.serialization import dataclass_deserializer
+from iprotopy.wire_decoding import wire_deserializer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# capacity, max readers, write position, sequence, closed, reserved position;
+# the reserved position is moved before a record is written and the write
+# position after it, so readers can tell which bytes may be overwritten
+_HEADER = struct.Struct('<QQQQQQ')
+_WRITE_POSITION_OFFSET = 16
+_SEQUENCE_OFFSET = 24
+_CLOSED_OFFSET = 32
+_RESERVED_POSITION_OFFSET = 40
+# active, read position
+_READER = struct.Struct('<QQ')
+# length, sequence, timestamp
+_RECORD = struct.Struct('<IQq')
+_POSITION = struct.Struct('<Q')
+
+_published_names: Set[str] = set()
+
+
+def _get_data_offset(max_readers: int) -> int:
+    return _HEADER.size + max_readers * _READER.size
+
+
+class _RingBuffer:
+    def __init__(self, memory: shared_memory.SharedMemory):
+        self._memory = memory
+        self._buffer = memory.buf
+        capacity, max_readers, *_ = _HEADER.unpack_from(self._buffer, 0)
+        self.capacity: int = capacity
+        self.max_readers: int = max_readers
+        self._data_offset = _get_data_offset(max_readers)
+
+    def get_position(self, offset: int) -> int:
+        return _POSITION.unpack_from(self._buffer, offset)[0]
+
+    def set_position(self, offset: int, value: int):
+        _POSITION.pack_into(self._buffer, offset, value)
+
+    def get_reader_offset(self, reader_id: int) -> int:
+        if not 0 <= reader_id < self.max_readers:
+            raise ValueError(f'reader_id must be in [0, {self.max_readers})')
+        return _HEADER.size + reader_id * _READER.size
+
+    def write(self, position: int, data: bytes):
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        offset = self._data_offset + start
+        self._buffer[offset : offset + first] = data[:first]
+        if first < len(data):
+            # the record wraps around the end of the ring
+            rest = len(data) - first
+            self._buffer[self._data_offset : self._data_offset + rest] = data[first:]
+
+    def read(self, position: int, size: int) -> bytes:
+        start = position % self.capacity
+        first = min(size, self.capacity - start)
+        offset = self._data_offset + start
+        data = bytes(self._buffer[offset : offset + first])
+        if first < size:
+            rest = size - first
+            data += bytes(self._buffer[self._data_offset : self._data_offset + rest])
+        return data
+
+    def close(self):
+        del self._buffer
+        self._memory.close()
+
+
+class FanOutPublisher(BaseStreamRecorder):
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        capacity: int = 64 * 1024 * 1024,
+        max_readers: int = 8,
+        slow_reader_threshold: float = 0.5,
+        check_interval: int = 64,
+    ):
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=True, size=_get_data_offset(max_readers) + capacity
+        )
+        self._memory.buf[: _get_data_offset(max_readers)] = bytes(
+            _get_data_offset(max_readers)
+        )
+        _HEADER.pack_into(self._memory.buf, 0, capacity, max_readers, 0, 0, 0, 0)
+        _published_names.add(self._memory.name)
+        self._ring = _RingBuffer(self._memory)
+        self._write_position = 0
+        self._sequence = 0
+        self._slow_reader_lag = int(capacity * slow_reader_threshold)
+        self._check_interval = check_interval
+        self.slow_readers: List[int] = []
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def record(self, data: bytes, timestamp_ns: Optional[int] = None):
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        size = _RECORD.size + len(data)
+        if size > self._ring.capacity:
+            raise ValueError(
+                f'Message of {len(data)} bytes does not fit the ring buffer'
+            )
+        ring = self._ring
+        ring.set_position(_RESERVED_POSITION_OFFSET, self._write_position + size)
+        ring.write(
+            self._write_position,
+            _RECORD.pack(len(data), self._sequence, timestamp_ns),
+        )
+        ring.write(self._write_position + _RECORD.size, data)
+        self._write_position += size
+        self._sequence += 1
+        # readers see the record only once the position covers it
+        ring.set_position(_SEQUENCE_OFFSET, self._sequence)
+        ring.set_position(_WRITE_POSITION_OFFSET, self._write_position)
+        if self._sequence % self._check_interval == 0:
+            self._check_readers()
+
+    def _check_readers(self):
+        slow_readers = []
+        for reader_id in range(self._ring.max_readers):
+            offset = self._ring.get_reader_offset(reader_id)
+            active, position = _READER.unpack_from(self._memory.buf, offset)
+            if active and self._write_position - position > self._slow_reader_lag:
+                slow_readers.append(reader_id)
+        for reader_id in set(slow_readers) - set(self.slow_readers):
+            logger.warning(
+                'Fan-out reader %s of %s is falling behind', reader_id, self.name
+            )
+        self.slow_readers = slow_readers
+
+    def close(self):
+        self._ring.set_position(_CLOSED_OFFSET, 1)
+        self._ring.close()
+        self._memory.unlink()
+        _published_names.discard(self._memory.name)
+
+
+class FanOutSubscriber:
+    def __init__(
+        self,
+        name: str,
+        reader_id: int,
+        protobuf_type: Type[Any],
+        dataclass_type: Type[T],
+        wire_decoding: bool = False,
+        poll_interval: float = 0.0005,
+    ):
+        self._memory = _attach(name)
+        self._ring = _RingBuffer(self._memory)
+        self._reader_offset = self._ring.get_reader_offset(reader_id)
+        self._reader_id = reader_id
+        self._poll_interval = poll_interval
+        if wire_decoding:
+            self._deserializer = wire_deserializer(protobuf_type, dataclass_type)
+        else:
+            self._deserializer = dataclass_deserializer(protobuf_type, dataclass_type)
+        # start with the next published message
+        self._position = self._ring.get_position(_WRITE_POSITION_OFFSET)
+        self._sequence = self._ring.get_position(_SEQUENCE_OFFSET)
+        self.lost = 0
+        _READER.pack_into(self._memory.buf, self._reader_offset, 1, self._position)
+
+    def read_bytes(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            data = self._try_read()
+            if data is not None:
+                return data
+            if self.is_closed():
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self._poll_interval)
+
+    def read(self, timeout: Optional[float] = None) -> Optional[T]:
+        data = self.read_bytes(timeout)
+        if data is None:
+            return None
+        return self._deserializer(data)
+
+    def __iter__(self) -> Iterator[T]:
+        while True:
+            message = self.read()
+            if message is None:
+                return
+            yield message
+
+    def is_closed(self) -> bool:
+        return bool(self._ring.get_position(_CLOSED_OFFSET)) and (
+            self._position == self._ring.get_position(_WRITE_POSITION_OFFSET)
+        )
+
+    def _try_read(self) -> Optional[bytes]:
+        ring = self._ring
+        write_position = ring.get_position(_WRITE_POSITION_OFFSET)
+        if write_position == self._position:
+            return None
+        if not self._is_overrun(ring.get_position(_RESERVED_POSITION_OFFSET)):
+            length, sequence, _ = _RECORD.unpack(
+                ring.read(self._position, _RECORD.size)
+            )
+            data = ring.read(self._position + _RECORD.size, length)
+            # the publisher may have lapped the reader while copying
+            if not self._is_overrun(ring.get_position(_RESERVED_POSITION_OFFSET)):
+                self._position += _RECORD.size + length
+                self._sequence = sequence + 1
+                ring.set_position(self._reader_offset + 8, self._position)
+                return data
+        self._skip_to_latest()
+        return None
+
+    def _is_overrun(self, reserved_position: int) -> bool:
+        return reserved_position - self._position > self._ring.capacity
+
+    def _skip_to_latest(self):
+        sequence = self._ring.get_position(_SEQUENCE_OFFSET)
+        self._position = self._ring.get_position(_WRITE_POSITION_OFFSET)
+        lost = sequence - self._sequence
+        self._sequence = sequence
+        self.lost += lost
+        self._ring.set_position(self._reader_offset + 8, self._position)
+        logger.warning(
+            'Fan-out reader %s was overrun and lost %s messages', self._reader_id, lost
+        )
+
+    def close(self):
+        self._ring.set_position(self._reader_offset, 0)
+        self._ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    memory = shared_memory.SharedMemory(name=name)
+    # only the publisher owns the segment, the tracker of a subscriber process
+    # would unlink it when the subscriber exits; forked subscribers and those
+    # in the publishing process share the tracker of the publisher
+    if memory.name not in _published_names:
+        resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
@@ -5,7 +5,7 @@ from ast import (
 )
 from pathlib import Path
 from types import NoneType
-from typing import List
+from typing import List, Optional, Set
 
 from proto_schema_parser import Message, Option, Parser
 from proto_schema_parser.ast import (
@@ -20,6 +20,7 @@ from proto_schema_parser.ast import (
     Import as ProtoImport,
 )
 
+from iprotopy.descriptor_parser import DescriptorParser
 from iprotopy.domestic_importer import DomesticImporter
 from iprotopy.enum_generator import EnumGenerator
 from iprotopy.importer import Importer
@@ -50,38 +51,50 @@ class SourceGenerator:
         self._pyfile = pyfile
         self._body: List[ast.stmt] = []
         self._settings = settings
+        self._proto_imports: List[str] = []
+        self._package: Optional[str] = None
+        self._interned_names: Set[str] = set()
+
+    @property
+    def proto_imports(self) -> List[str]:
+        return self._proto_imports
+
+    @property
+    def interned_names(self) -> Set[str]:
+        return self._interned_names
 
     def generate_source(self) -> Module:
         logger.debug(f'Generating source for {self._proto_file}')
-        with open(self._proto_file) as f:
-            text = f.read()
-
-        file: File = self._parser.parse(text)
+        file = self._parse_file()
 
         for element in file.file_elements:
+            self._importer.set_referrer(getattr(element, 'name', None))
             if isinstance(element, Message):
                 proto_message_processor = MessageClassGenerator(
-                    self._importer, self._type_mapper
+                    self._importer, self._type_mapper, self._settings
                 )
                 self._body.append(
                     proto_message_processor.process_proto_message(element)
                 )
+                self._interned_names.update(proto_message_processor.interned_names)
             elif isinstance(element, Package):
+                self._package = element.name
                 continue
             elif isinstance(element, Option):
                 continue
             elif isinstance(element, ProtoImport):
+                self._proto_imports.append(element.name)
                 continue
             elif isinstance(element, Service):
                 service_generator = ServiceGenerator(
-                    self._importer, self._pyfile, self._settings
+                    self._importer, self._pyfile, self._settings, self._package
                 )
                 self._body.append(service_generator.process_service(element))
                 # todo AsyncServiceGenerator
             elif isinstance(element, Comment):
                 continue
             elif isinstance(element, Enum):
-                proto_enum_processor = EnumGenerator(self._importer)
+                proto_enum_processor = EnumGenerator(self._importer, self._settings)
                 self._body.append(proto_enum_processor.process_enum(element))
             elif isinstance(element, NoneType):
                 continue
@@ -89,4 +102,39 @@ class SourceGenerator:
                 continue
             else:
                 raise NotImplementedError(f'Unknown element {element}')
+        self._importer.set_referrer(None)
         return Module(body=self._body, type_ignores=[])
+
+    def _parse_file(self) -> File:
+        with open(self._proto_file) as f:
+            text = f.read()
+
+        return self._parser.parse(text)
+
+
+class DescriptorSourceGenerator(SourceGenerator):
+    def __init__(
+        self,
+        proto_file: Path,
+        out_dir: Path,
+        pyfile: Path,
+        descriptor_parser: DescriptorParser,
+        proto_name: str,
+        type_mapper: TypeMapper,
+        global_importer: Importer,
+        settings: PackageGeneratorSettings,
+    ):
+        super().__init__(
+            proto_file,
+            out_dir,
+            pyfile,
+            Parser(),
+            type_mapper,
+            global_importer,
+            settings,
+        )
+        self._descriptor_parser = descriptor_parser
+        self._proto_name = proto_name
+
+    def _parse_file(self) -> File:
+        return self._descriptor_parser.parse_file(self._proto_name)
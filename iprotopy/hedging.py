@@ -0,0 +1,152 @@
+import dataclasses
+import queue
+import threading
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    import grpc
+
+    from iprotopy.scheduling import CallScheduler
+
+
+@dataclasses.dataclass
+class HedgingPolicy:
+    # seconds to wait before the hedge is sent, also used until enough
+    # latencies are observed when percentile is set
+    delay: Optional[float] = None
+    # hedge once the call is slower than this percentile of observed latencies
+    percentile: Optional[float] = None
+    min_samples: int = 20
+    window: int = 1000
+    # the largest share of calls that may be hedged
+    budget: float = 0.05
+    # methods that are safe to send twice, None means every method
+    methods: Optional[Collection[str]] = None
+
+    def is_hedged(self, method_name: str) -> bool:
+        return self.methods is None or method_name in self.methods
+
+
+class Hedger:
+    def __init__(self, policy: HedgingPolicy, channels: Sequence['grpc.Channel'] = ()):
+        self.policy = policy
+        # hedges go to these channels in turn, or to the primary one if empty
+        self.channels = list(channels)
+        self.calls = 0
+        self.hedged_calls = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def call(
+        self,
+        method_name: str,
+        stubs: Sequence[Any],
+        request: Any,
+        metadata: Any = None,
+        scheduler: Optional['CallScheduler'] = None,
+    ) -> Tuple[Any, 'grpc.Call']:
+        # returns the response with the call that produced it, like with_call;
+        # the primary call is scheduled by the caller, hedges are scheduled here
+        primary_stub, *hedge_stubs = stubs
+        multicallable = getattr(primary_stub, method_name)
+        if not self.policy.is_hedged(method_name):
+            return multicallable.with_call(request=request, metadata=metadata)
+
+        start = time.perf_counter()
+        delay = self._get_delay(method_name)
+        if delay is None:
+            # not enough latencies observed yet to pick the delay
+            result = multicallable.with_call(request=request, metadata=metadata)
+            self.record_latency(method_name, time.perf_counter() - start)
+            return result
+
+        with self._lock:
+            self.calls += 1
+        completed: queue.Queue = queue.Queue()
+        futures = [multicallable.future(request=request, metadata=metadata)]
+        futures[0].add_done_callback(completed.put)
+        try:
+            winner = completed.get(timeout=delay)
+        except queue.Empty:
+            winner = None
+        if winner is None:
+            hedge_number = self._take_budget()
+            if hedge_number is not None:
+                hedge_stub = primary_stub
+                if hedge_stubs:
+                    hedge_stub = hedge_stubs[hedge_number % len(hedge_stubs)]
+                if scheduler is not None:
+                    scheduler.acquire(method_name)
+                hedge = getattr(hedge_stub, method_name).future(
+                    request=request, metadata=metadata
+                )
+                hedge.add_done_callback(completed.put)
+                futures.append(hedge)
+            winner = self._wait_for_winner(completed, len(futures))
+        for future in futures:
+            if future is not winner:
+                future.cancel()
+        response = winner.result()
+        self.record_latency(method_name, time.perf_counter() - start)
+        return response, winner
+
+    def record_latency(self, method_name: str, latency: float):
+        # calls made without the hedger can be recorded to pick the delay
+        with self._lock:
+            latencies = self._latencies.get(method_name)
+            if latencies is None:
+                latencies = self._latencies[method_name] = deque(
+                    maxlen=self.policy.window
+                )
+            latencies.append(latency)
+
+    def _wait_for_winner(self, completed: queue.Queue, pending: int) -> Any:
+        while True:
+            future = completed.get()
+            pending -= 1
+            # a failed call only wins when nothing else can succeed
+            if pending == 0 or future.exception() is None:
+                return future
+
+    def _get_delay(self, method_name: str) -> Optional[float]:
+        policy = self.policy
+        if policy.percentile is None:
+            return policy.delay
+        with self._lock:
+            latencies = list(self._latencies.get(method_name, ()))
+        if len(latencies) < policy.min_samples:
+            return policy.delay
+        ordered = sorted(latencies)
+        index = min(int(len(ordered) * policy.percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def _take_budget(self) -> Optional[int]:
+        with self._lock:
+            if self.hedged_calls >= self.calls * self.policy.budget:
+                return None
+            self.hedged_calls += 1
+            return self.hedged_calls
+
+
+def create_hedge_stubs(
+    service_type: type, stub: Any, metadata: Any, hedger: Optional[Hedger]
+) -> List[Any]:
+    if hedger is None:
+        return [stub]
+    # services on the hedge channels get the same customized stub methods
+    return [
+        stub,
+        *(service_type(channel, metadata)._stub for channel in hedger.channels),
+    ]
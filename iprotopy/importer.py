@@ -1,7 +1,7 @@
 import logging
 from ast import alias
 from pathlib import Path
-from typing import Dict, Set
+from typing import Dict, Iterable, Optional, Set
 
 from iprotopy.import_types import AstImport
 from iprotopy.imports import ImportFrom
@@ -15,18 +15,74 @@ class Importer:
         self._dependencies: Dict[Path, Set[str]] = {}
         self._default_dependencies = set(i.__name__ for i in (int, str, bool))
         self._imports: Dict[Path, Set[AstImport]] = {}
+        self._references: Dict[str, Set[str]] = {}
 
     def define_dependency(self, name: str, package: Path):
-        if name in self._definitions:
+        # definitions collected ahead of generation are registered again by it
+        if name in self._definitions and self._definitions[name] != package:
             logger.warning('Class %s already registered', name)
         self._definitions[name] = package
 
-    def import_dependency(self, name: str, package: Path):
+    def import_dependency(
+        self, name: str, package: Path, referrer: Optional[str] = None
+    ):
         if name in self._default_dependencies:
             return
         dependencies = self._dependencies.get(package, set())
         dependencies.add(name)
         self._dependencies[package] = dependencies
+        if referrer is not None:
+            references = self._references.get(referrer, set())
+            references.add(name)
+            self._references[referrer] = references
+
+    def get_reachable(self, roots: Iterable[str]) -> Set[str]:
+        reachable = set()
+        pending = [self._resolve_root(root) for root in roots]
+        while pending:
+            name = pending.pop()
+            if name in reachable:
+                continue
+            if name not in self._definitions:
+                raise ValueError(f'Class {name} not registered but reachable')
+            reachable.add(name)
+            pending.extend(self._references.get(name, ()))
+        return reachable
+
+    def _resolve_root(self, root: str) -> str:
+        # a root may be qualified by its module or by a package containing it,
+        # e.g. demo.marketdata.MarketDataService or demo.MarketDataService
+        prefix, _, name = root.rpartition('.')
+        if name in self._definitions:
+            module = self.get_definition_module(name)
+            if not prefix or module == prefix or module.startswith(f'{prefix}.'):
+                return name
+        raise ValueError(
+            f'Unknown generation root {root}, expected a class name '
+            'optionally qualified by its module or package'
+        )
+
+    def prune(self, reachable: Set[str]):
+        pruned_dependencies: Dict[Path, Set[str]] = {
+            package: set() for package in self._dependencies
+        }
+        for referrer, references in self._references.items():
+            if referrer not in reachable:
+                continue
+            package = self._definitions[referrer]
+            pruned_dependencies[package].update(references)
+        self._dependencies = pruned_dependencies
+
+    def prune_imports(self, package: Path, used_names: Set[str]):
+        # imports added for pruned classes are dropped along with them
+        self._imports[package] = {
+            import_
+            for import_ in self._imports.get(package, ())
+            if any(
+                (name.asname or name.name).split('.')[0] in used_names
+                for name in import_.names
+            )
+        }
 
     def get_imports(self, package: Path) -> Set[AstImport]:
         dependencies_imports = {
@@ -43,21 +99,33 @@ class Importer:
                 f'Class {class_name} not registered but needed in {package}'
             )
         return ImportFrom(
-            module=self._path_to_module(self._definitions[class_name]),
+            module=self.path_to_module(self._definitions[class_name]),
             names=[alias(name=class_name)],
             level=0,
         )
 
-    def _path_to_module(self, path: Path) -> str:
+    def get_definition_module(self, name: str) -> str:
+        return self.path_to_module(self._definitions[name])
+
+    def path_to_module(self, path: Path) -> str:
         module_path = path.with_suffix('')
         return str(module_path).replace('/', '.').replace('\\', '.')
 
-    def remove_circular_dependencies(self):
-        for class_name, package in self._definitions.items():
-            dependencies = self._dependencies.get(package, set())
+    def remove_circular_dependencies(self, package: Optional[Path] = None):
+        packages = list(self._dependencies) if package is None else [package]
+        for dependent_package in packages:
+            dependencies = self._dependencies.get(dependent_package, set())
+            dependencies.difference_update(
+                [
+                    class_name
+                    for class_name in dependencies
+                    if self._definitions.get(class_name) == dependent_package
+                ]
+            )
 
-            if class_name in dependencies:
-                dependencies.remove(class_name)
+    def release(self, package: Path):
+        self._dependencies.pop(package, None)
+        self._imports.pop(package, None)
 
     def add_import(self, import_statement: AstImport, package: Path):
         imports = self._imports.get(package, set())
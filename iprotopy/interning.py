@@ -0,0 +1,35 @@
+import threading
+from typing import Dict
+
+
+class InternTable:
+    def __init__(self, max_size: int = 65536):
+        self.max_size = max_size
+        self._strings: Dict[str, str] = {}
+        # conversions run on several threads and share the default table;
+        # lookups stay lock-free, only the changes are serialized
+        self._lock = threading.Lock()
+
+    def intern(self, value: str) -> str:
+        strings = self._strings
+        interned = strings.get(value)
+        if interned is None:
+            with self._lock:
+                interned = strings.get(value)
+                if interned is None:
+                    if len(strings) >= self.max_size:
+                        # dicts keep insertion order, so this evicts the
+                        # oldest string
+                        del strings[next(iter(strings))]
+                    interned = strings[value] = value
+        return interned
+
+    def clear(self):
+        with self._lock:
+            self._strings.clear()
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+default_intern_table = InternTable()
@@ -1,62 +1,185 @@
 import ast
-from ast import AnnAssign, ClassDef, Load, Name, Pass, alias
-from typing import List
+from ast import (
+    AnnAssign,
+    Assign,
+    ClassDef,
+    Constant,
+    Load,
+    Name,
+    Pass,
+    Store,
+    Tuple,
+    alias,
+)
+from typing import Dict, List, Optional, Set
 
-from proto_schema_parser import Field, Message
+from proto_schema_parser import Field, FieldCardinality, Message
 from proto_schema_parser.ast import Comment, Enum, OneOf, Reserved
 
-from iprotopy.class_field_generator import ClassFieldGenerator
+from iprotopy.class_field_generator import NUMERIC_TYPECODES, ClassFieldGenerator
+from iprotopy.dataclass_method_generator import DataclassMethodGenerator
 from iprotopy.domestic_importer import DomesticImporter
 from iprotopy.enum_generator import EnumGenerator
 from iprotopy.imports import ImportFrom
 from iprotopy.one_of_generator import OneOfGenerator
+from iprotopy.package_generator_settings import (
+    PackageGeneratorSettings,
+    RepeatedNumericType,
+)
 from iprotopy.type_mapper import TypeMapper
 
 
 class MessageClassGenerator:
-    def __init__(self, importer: DomesticImporter, type_mapper: TypeMapper):
+    def __init__(
+        self,
+        importer: DomesticImporter,
+        type_mapper: TypeMapper,
+        settings: PackageGeneratorSettings,
+    ):
         self._importer = importer
         self._type_mapper = type_mapper
+        self._settings = settings
         self._class_field_generator = ClassFieldGenerator(
             self._importer, self._type_mapper
         )
         self._one_of_generator = OneOfGenerator(self._class_field_generator)
+        self._dataclass_method_generator = DataclassMethodGenerator(self._importer)
+        self._interned_names: Set[str] = set()
 
-    def process_proto_message(self, current_element) -> ClassDef:
+    @property
+    def interned_names(self) -> Set[str]:
+        # the names of the interned_fields setting that matched a field
+        return self._interned_names
+
+    def process_proto_message(
+        self, current_element, parent_path: Optional[str] = None
+    ) -> ClassDef:
+        class_name = current_element.name
+        class_path = (
+            class_name if parent_path is None else f'{parent_path}.{class_name}'
+        )
         class_body = []
+        one_of_groups: Dict[str, List[str]] = {}
+        string_fields: List[str] = []
+        array_fields: Dict[str, str] = {}
         for element in current_element.elements:
-            if isinstance(element, Field):
+            if isinstance(element, Field) and self._is_array_field(element):
+                field_name = self._class_field_generator.get_field_name(element.name)
+                array_fields[field_name] = NUMERIC_TYPECODES[element.type]
+                class_body.append(self._process_array_field(element))
+            elif isinstance(element, Field):
+                if element.type == 'string':
+                    string_fields.append(element.name)
                 class_body.append(self._class_field_generator.process_field(element))
             elif isinstance(element, Comment):
                 # todo process comments
                 continue
             elif isinstance(element, Enum):
-                proto_enum_processor = EnumGenerator(self._importer)
+                proto_enum_processor = EnumGenerator(self._importer, self._settings)
                 class_body.append(proto_enum_processor.process_enum(element))
             elif isinstance(element, OneOf):
-                class_body.extend(self._one_of_generator.process(element))
+                one_of_fields = list(self._one_of_generator.process(element))
+                one_of_groups[element.name] = [
+                    field.target.id for field in one_of_fields
+                ]
+                string_fields.extend(
+                    field.name
+                    for field in element.elements
+                    if isinstance(field, Field) and field.type == 'string'
+                )
+                class_body.extend(one_of_fields)
             elif isinstance(element, Message):
-                class_body.append(self.process_proto_message(element))
+                class_body.append(self.process_proto_message(element, class_path))
             elif isinstance(element, Reserved):
                 continue
             else:
                 raise NotImplementedError(f'Unknown element {element}')
-        if not class_body:
-            class_body.append(Pass())
-        self._importer.add_import(
-            ImportFrom(module='dataclasses', names=[alias(name='dataclass')], level=0)
-        )
-        class_name = current_element.name
+        if one_of_groups:
+            class_body.append(
+                self._one_of_generator.create_groups_attribute(one_of_groups)
+            )
+        if array_fields:
+            class_body.append(
+                Assign(
+                    targets=[Name(id='__arrays__', ctx=Store())],
+                    value=ast.Dict(
+                        keys=[
+                            Constant(value=field_name) for field_name in array_fields
+                        ],
+                        values=[
+                            Constant(value=typecode)
+                            for typecode in array_fields.values()
+                        ],
+                    ),
+                )
+            )
+        interned_fields = self._get_interned_fields(class_path, string_fields)
+        if interned_fields:
+            class_body.append(
+                Assign(
+                    targets=[Name(id='__interned__', ctx=Store())],
+                    value=Tuple(
+                        elts=[Constant(value=field) for field in interned_fields],
+                        ctx=Load(),
+                    ),
+                )
+            )
         class_body = self._reorder_fields(class_body)
+        if self._settings.expanded_dataclasses:
+            class_body.extend(
+                self._dataclass_method_generator.create_members(
+                    [field for field in class_body if isinstance(field, AnnAssign)]
+                )
+            )
+            decorator_list = []
+        else:
+            if not class_body:
+                class_body.append(Pass())
+            self._importer.add_import(
+                ImportFrom(
+                    module='dataclasses', names=[alias(name='dataclass')], level=0
+                )
+            )
+            decorator_list = [Name(id='dataclass', ctx=Load())]
         self._importer.define_dependency(class_name)
         return ClassDef(
             name=class_name,
             bases=[],
             keywords=[],
             body=class_body,
-            decorator_list=[Name(id='dataclass', ctx=Load())],
+            decorator_list=decorator_list,
         )
 
+    def _is_array_field(self, field: Field) -> bool:
+        return (
+            self._settings.repeated_numeric_type != RepeatedNumericType.LIST
+            and field.cardinality == FieldCardinality.REPEATED
+            and field.type in NUMERIC_TYPECODES
+        )
+
+    def _process_array_field(self, field: Field) -> AnnAssign:
+        if self._settings.repeated_numeric_type == RepeatedNumericType.NUMPY:
+            return self._class_field_generator.process_array_field(
+                field, 'numpy', 'ndarray'
+            )
+        return self._class_field_generator.process_array_field(field, 'array', 'array')
+
+    def _get_interned_fields(
+        self, class_path: str, string_fields: List[str]
+    ) -> List[str]:
+        interned = self._settings.interned_fields
+        if not interned:
+            return []
+        interned_fields = []
+        for field_name in string_fields:
+            names = {field_name, f'{class_path}.{field_name}'}.intersection(interned)
+            if names:
+                self._interned_names.update(names)
+                interned_fields.append(
+                    self._class_field_generator.get_field_name(field_name)
+                )
+        return interned_fields
+
     def _reorder_fields(self, class_body: List[ast.stmt]) -> List[ast.stmt]:
         default_fields = []
         other_fields = []
@@ -0,0 +1,191 @@
+import logging
+import queue
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+RequestT = TypeVar('RequestT')
+ResponseT = TypeVar('ResponseT')
+
+_CLOSED: Any = object()
+
+
+class SubscriptionClosed(Exception):
+    pass
+
+
+class Subscription(Generic[ResponseT]):
+    def __init__(self, multiplexer: 'StreamMultiplexer', keys: List[Hashable]):
+        self.keys = keys
+        self._multiplexer = multiplexer
+        self._responses: queue.Queue = queue.Queue()
+        self._closed = False
+
+    def get(self, timeout: Optional[float] = None) -> ResponseT:
+        response = self._responses.get(timeout=timeout)
+        if response is _CLOSED:
+            # keep the subscription closed for later calls
+            self._responses.put(_CLOSED)
+            raise SubscriptionClosed
+        if isinstance(response, Exception):
+            # the stream is gone, later calls fail the same way
+            self._responses.put(response)
+            raise response
+        return response
+
+    def __iter__(self) -> Iterator[ResponseT]:
+        while True:
+            try:
+                yield self.get()
+            except SubscriptionClosed:
+                return
+
+    def unsubscribe(self):
+        if not self._closed:
+            self._closed = True
+            self._multiplexer.unsubscribe(self)
+
+    def _put(self, response: Any):
+        self._responses.put(response)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unsubscribe()
+
+
+class StreamMultiplexer(Generic[RequestT, ResponseT]):
+    def __init__(
+        self,
+        stream_method: Callable[[Iterable[RequestT]], Iterable[ResponseT]],
+        subscribe_request: Callable[[List[Hashable]], RequestT],
+        unsubscribe_request: Callable[[List[Hashable]], RequestT],
+        get_key: Callable[[ResponseT], Optional[Hashable]],
+    ):
+        self._stream_method = stream_method
+        self._subscribe_request = subscribe_request
+        self._unsubscribe_request = unsubscribe_request
+        self._get_key = get_key
+        self._requests: queue.Queue = queue.Queue()
+        self._subscriptions: Dict[Hashable, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._responses: Optional[Iterable[ResponseT]] = None
+        self._closing = False
+
+    def subscribe(self, keys: Iterable[Hashable]) -> Subscription[ResponseT]:
+        subscription: Subscription[ResponseT] = Subscription(self, list(keys))
+        with self._lock:
+            new_keys = []
+            for key in subscription.keys:
+                subscriptions = self._subscriptions.setdefault(key, set())
+                if not subscriptions:
+                    new_keys.append(key)
+                subscriptions.add(subscription)
+            # only keys nobody was subscribed to reach the server
+            if new_keys:
+                self._requests.put(self._subscribe_request(new_keys))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            removed_keys = []
+            for key in subscription.keys:
+                subscriptions = self._subscriptions.get(key)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[key]
+                    removed_keys.append(key)
+            if removed_keys:
+                self._requests.put(self._unsubscribe_request(removed_keys))
+        subscription._put(_CLOSED)
+
+    def close(self):
+        with self._lock:
+            self._requests.put(_CLOSED)
+            thread = self._thread
+            responses = self._responses
+            self._closing = thread is not None
+        if thread is None:
+            return
+        # the server may keep streaming after the requests end, only
+        # cancelling the call ends the stream for sure
+        if responses is not None:
+            _cancel(responses)
+        thread.join()
+
+    def _iter_requests(self, requests: queue.Queue) -> Iterator[RequestT]:
+        while True:
+            request = requests.get()
+            if request is _CLOSED:
+                return
+            yield request
+
+    def _run(self):
+        error: Any = _CLOSED
+        try:
+            responses = self._stream_method(self._iter_requests(self._requests))
+            with self._lock:
+                self._responses = responses
+                closing = self._closing
+            if closing:
+                _cancel(responses)
+            for response in responses:
+                self._route(response)
+        except Exception as e:
+            with self._lock:
+                closing = self._closing
+            # a stream cancelled by close ends like a closed one
+            if not closing:
+                logger.exception('Multiplexed stream failed')
+                error = e
+        with self._lock:
+            subscriptions = set().union(*self._subscriptions.values())
+            self._subscriptions.clear()
+            self._thread = None
+            self._responses = None
+            self._closing = False
+            # requests the ended stream did not send must not reach the next
+            # one, which only subscribes to the keys asked for from now on
+            requests = self._requests
+            self._requests = queue.Queue()
+        # ends the request iterator in case the stream still reads it
+        requests.put(_CLOSED)
+        for subscription in subscriptions:
+            subscription._put(error)
+
+    def _route(self, response: ResponseT):
+        key = self._get_key(response)
+        with self._lock:
+            if key is None:
+                # responses without a key (e.g. pings) go to every consumer
+                subscriptions = set().union(*self._subscriptions.values())
+            else:
+                subscriptions = tuple(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            subscription._put(response)
+
+
+def _cancel(responses: Iterable[Any]):
+    cancel = getattr(responses, 'cancel', None)
+    if cancel is not None:
+        cancel()
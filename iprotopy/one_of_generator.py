@@ -1,5 +1,6 @@
-from ast import AnnAssign
-from typing import Iterable
+from ast import AnnAssign, Assign, Constant, Dict, Load, Name, Store, Tuple
+from typing import Dict as TypingDict
+from typing import Iterable, List
 
 from proto_schema_parser import Field
 from proto_schema_parser.ast import Comment, FieldCardinality, OneOf
@@ -27,3 +28,18 @@ class OneOfGenerator:
                 pass
             else:
                 raise NotImplementedError(f'Unknown element {element}')
+
+    def create_groups_attribute(self, groups: TypingDict[str, List[str]]) -> Assign:
+        return Assign(
+            targets=[Name(id='__oneofs__', ctx=Store())],
+            value=Dict(
+                keys=[Constant(value=group_name) for group_name in groups],
+                values=[
+                    Tuple(
+                        elts=[Constant(value=field_name) for field_name in fields],
+                        ctx=Load(),
+                    )
+                    for fields in groups.values()
+                ],
+            ),
+        )
@@ -1,73 +1,350 @@
+import ast
 import logging
+import re
 from ast import (
+    ClassDef,
+    Constant,
     Module,
+    Name,
 )
 from pathlib import Path
-from typing import Dict, Optional, Set
+from typing import Collection, Dict, List, Optional, Set
 
-import astor
-from proto_schema_parser.parser import Parser
+from proto_schema_parser import Parser
 
 from iprotopy.base_service_source_generator import BaseServiceSourceGenerator
+from iprotopy.descriptor_parser import DescriptorParser
 from iprotopy.domestic_importer import DomesticImporter
-from iprotopy.file_generator import SourceGenerator
+from iprotopy.file_generator import DescriptorSourceGenerator, SourceGenerator
 from iprotopy.import_types import AstImport
 from iprotopy.importer import Importer
 from iprotopy.imports import Import, ImportFrom
-from iprotopy.package_generator_settings import PackageGeneratorSettings
+from iprotopy.package_generator_settings import (
+    GeneratorFrontend,
+    PackageGeneratorSettings,
+)
+from iprotopy.package_init_generator import PackageInitGenerator
 from iprotopy.protos_generator import ProtosGenerator
+from iprotopy.source_renderer import get_source_renderer
+from iprotopy.source_writer import SourceWriter
+from iprotopy.symbol_scanner import SymbolScanner
 from iprotopy.type_mapper import TypeMapper
 
 logger = logging.getLogger(__name__)
 
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+
 
 class PackageGenerator:
-    def __init__(self, settings: Optional[PackageGeneratorSettings] = None):
+    def __init__(
+        self,
+        settings: Optional[PackageGeneratorSettings] = None,
+        parser: Optional[Parser] = None,
+    ):
         if settings is None:
             settings = PackageGeneratorSettings()
         self._settings = settings
-        self._parser = Parser()
+        # a single generation parses every file once, so parsed files are
+        # only worth keeping by callers that regenerate, like the watcher
+        if parser is None:
+            parser = Parser()
+        self._parser = parser
         self._type_mapper = TypeMapper()
+        self._renderer = get_source_renderer(settings.render_backend)
+        self._writer = SourceWriter(
+            self._renderer,
+            self._settings.compile_bytecode,
+            self._settings.compile_workers,
+        )
 
-    def generate_sources(self, proto_dir: Path, out_dir: Path):
+    def generate_sources(
+        self,
+        proto_dir: Path,
+        out_dir: Path,
+        changed_proto_files: Optional[Collection[Path]] = None,
+    ):
         importer = Importer()
-        protos_generator = ProtosGenerator(importer)
-        protos_generator.generate_protos(proto_dir, out_dir)
+        writer = self._writer
+        proto_files = list(proto_dir.rglob('*.proto'))
+        protos_generator = ProtosGenerator(importer, self._settings.in_process_protoc)
+        protos_generator.register_modules(proto_files, proto_dir)
 
         out_dir.mkdir(parents=True, exist_ok=True)
-        (out_dir / '__init__.py').touch()
-        proto_files = list(proto_dir.rglob('*.proto'))
-        modules: Dict[Path, Module] = {}
+        descriptor_parser = None
+        protos_generated = False
+        if self._settings.frontend == GeneratorFrontend.DESCRIPTOR_SET:
+            if self._settings.generation_roots is None and changed_proto_files is None:
+                # a single protoc run emits both the python modules and descriptors
+                descriptor_set = protos_generator.generate_protos(
+                    proto_dir, out_dir, proto_files, descriptor_set=True
+                )
+                protos_generated = True
+            else:
+                descriptor_set = protos_generator.generate_descriptor_set(
+                    proto_dir, proto_files
+                )
+            descriptor_parser = DescriptorParser(descriptor_set)
+
+        self._create_lib_dependencies(out_dir, importer, writer)
+        package_init_generator = PackageInitGenerator(importer)
+        interned_names: Set[str] = set()
+
+        if self._settings.generation_roots is None:
+            # every class is registered up front, so each module can be
+            # written as soon as it is generated instead of keeping them all
+            self._register_symbols(importer, proto_files, proto_dir, descriptor_parser)
+            for proto_file in proto_files:
+                pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
+                logger.debug(pyfile)
+                source_generator = self._get_source_generator(
+                    proto_file, proto_dir, out_dir, importer, descriptor_parser
+                )
+                module = source_generator.generate_source()
+                interned_names.update(source_generator.interned_names)
+                importer.remove_circular_dependencies(pyfile)
+                self._write_module(
+                    module, pyfile, out_dir, importer, package_init_generator
+                )
+        else:
+            proto_files = self._generate_reachable(
+                proto_files,
+                proto_dir,
+                out_dir,
+                importer,
+                descriptor_parser,
+                package_init_generator,
+                interned_names,
+            )
+        self._check_interned_fields(interned_names)
+
+        if not protos_generated:
+            protoc_files = self._get_protoc_files(
+                proto_files, proto_dir, out_dir, changed_proto_files
+            )
+            if protoc_files:
+                protos_generator.generate_protos(proto_dir, out_dir, protoc_files)
 
-        self._create_lib_dependencies(out_dir, importer)
+        self._create_package_init(package_init_generator, out_dir, writer)
+        writer.compile()
 
+    def _generate_reachable(
+        self,
+        proto_files: List[Path],
+        proto_dir: Path,
+        out_dir: Path,
+        importer: Importer,
+        descriptor_parser: Optional[DescriptorParser],
+        package_init_generator: PackageInitGenerator,
+        interned_names: Set[str],
+    ) -> List[Path]:
+        # reachability is only known once every file is generated, so the
+        # modules are kept in memory until they are pruned
+        modules: Dict[Path, Module] = {}
+        proto_imports: Dict[Path, List[str]] = {}
         for proto_file in proto_files:
             pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
             logger.debug(pyfile)
-            source_generator = SourceGenerator(
+            source_generator = self._get_source_generator(
+                proto_file, proto_dir, out_dir, importer, descriptor_parser
+            )
+            modules[proto_file] = source_generator.generate_source()
+            proto_imports[proto_file] = source_generator.proto_imports
+            interned_names.update(source_generator.interned_names)
+
+        proto_files = self._prune_unreachable(
+            importer, modules, proto_imports, proto_dir
+        )
+        importer.remove_circular_dependencies()
+        for proto_file, module in modules.items():
+            pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
+            self._write_module(
+                module, pyfile, out_dir, importer, package_init_generator
+            )
+        return proto_files
+
+    def _check_interned_fields(self, interned_names: Set[str]):
+        unknown = set(self._settings.interned_fields or ()) - interned_names
+        if unknown:
+            raise ValueError(
+                f'Unknown interned fields: {", ".join(sorted(unknown))}, '
+                'expected string field names or Message.field paths'
+            )
+
+    def _register_symbols(
+        self,
+        importer: Importer,
+        proto_files: List[Path],
+        proto_dir: Path,
+        descriptor_parser: Optional[DescriptorParser],
+    ):
+        symbol_scanner = SymbolScanner()
+        for proto_file in proto_files:
+            pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
+            if descriptor_parser is not None:
+                symbols = descriptor_parser.get_symbols(
+                    proto_file.relative_to(proto_dir).as_posix()
+                )
+            else:
+                symbols = symbol_scanner.scan(proto_file)
+            for symbol in symbols:
+                importer.define_dependency(symbol, pyfile)
+
+    def _write_module(
+        self,
+        module: Module,
+        pyfile: Path,
+        out_dir: Path,
+        importer: Importer,
+        package_init_generator: PackageInitGenerator,
+    ):
+        imports = importer.get_imports(pyfile)
+        package_init_generator.add_module(pyfile, self._get_class_names(module))
+        self._insert_imports(module, imports)
+        self._writer.write(module, out_dir / pyfile)
+        importer.release(pyfile)
+
+    def remove_sources(
+        self, proto_dir: Path, out_dir: Path, proto_files: Collection[Path]
+    ):
+        for proto_file in proto_files:
+            pyfile = out_dir / proto_file.relative_to(proto_dir).with_suffix('.py')
+            self._writer.remove(pyfile)
+            for suffix in ('_pb2.py', '_pb2.pyi', '_pb2_grpc.py', '_pb2_grpc.pyi'):
+                pyfile.with_name(f'{pyfile.stem}{suffix}').unlink(missing_ok=True)
+
+    def _get_protoc_files(
+        self,
+        proto_files: List[Path],
+        proto_dir: Path,
+        out_dir: Path,
+        changed_proto_files: Optional[Collection[Path]],
+    ) -> List[Path]:
+        if changed_proto_files is None:
+            return proto_files
+        # _pb2 modules only depend on their own proto, files that were never
+        # compiled (e.g. newly reachable from the generation roots) are added
+        return [
+            proto_file
+            for proto_file in proto_files
+            if proto_file in changed_proto_files
+            or not (
+                out_dir
+                / proto_file.relative_to(proto_dir).with_name(
+                    f'{proto_file.stem}_pb2.py'
+                )
+            ).exists()
+        ]
+
+    def _get_source_generator(
+        self,
+        proto_file: Path,
+        proto_dir: Path,
+        out_dir: Path,
+        importer: Importer,
+        descriptor_parser: Optional[DescriptorParser],
+    ) -> SourceGenerator:
+        pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
+        if descriptor_parser is not None:
+            return DescriptorSourceGenerator(
                 proto_file,
                 out_dir,
                 pyfile,
-                self._parser,
+                descriptor_parser,
+                proto_file.relative_to(proto_dir).as_posix(),
                 self._type_mapper,
                 importer,
                 self._settings,
             )
-            module = source_generator.generate_source()
-            modules[proto_file] = module
+        return SourceGenerator(
+            proto_file,
+            out_dir,
+            pyfile,
+            self._parser,
+            self._type_mapper,
+            importer,
+            self._settings,
+        )
 
-        importer.remove_circular_dependencies()
+    def _prune_unreachable(
+        self,
+        importer: Importer,
+        modules: Dict[Path, Module],
+        proto_imports: Dict[Path, List[str]],
+        proto_dir: Path,
+    ) -> List[Path]:
+        reachable = importer.get_reachable(self._settings.generation_roots)
+        importer.prune(reachable)
 
-        for proto_file in proto_files:
-            pyfile = proto_file.relative_to(proto_dir).with_suffix('.py')
-            imports = importer.get_imports(pyfile)
-            module = modules[proto_file]
-            self._insert_imports(module, imports)
-            result_src = astor.to_source(module)
-            filepath = out_dir / pyfile
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            with open(filepath, 'w') as f:
-                f.write(result_src)
+        pruned_proto_files = []
+        for proto_file, module in modules.items():
+            module.body = [
+                element
+                for element in module.body
+                if not isinstance(element, ClassDef) or element.name in reachable
+            ]
+            if self._get_class_names(module):
+                pruned_proto_files.append(proto_file)
+                importer.prune_imports(
+                    proto_file.relative_to(proto_dir).with_suffix('.py'),
+                    self._get_used_names(module),
+                )
+        logger.info(
+            'Generating %s of %s proto files reachable from %s',
+            len(pruned_proto_files),
+            len(modules),
+            ', '.join(self._settings.generation_roots),
+        )
+
+        # _pb2 modules of the kept files import _pb2 modules of every proto
+        # they import, so protoc still has to see the whole import closure
+        required_proto_files = set()
+        pending = list(pruned_proto_files)
+        while pending:
+            proto_file = pending.pop()
+            if proto_file in required_proto_files:
+                continue
+            required_proto_files.add(proto_file)
+            for proto_import in proto_imports.get(proto_file, ()):
+                imported_file = proto_dir / proto_import
+                if imported_file in modules:
+                    pending.append(imported_file)
+
+        for proto_file in list(modules):
+            if proto_file not in pruned_proto_files:
+                del modules[proto_file]
+        return [
+            proto_file
+            for proto_file in proto_imports
+            if proto_file in required_proto_files
+        ]
+
+    def _get_used_names(self, module: Module) -> Set[str]:
+        used_names = set()
+        for node in ast.walk(module):
+            if isinstance(node, Name):
+                used_names.add(node.id)
+            elif isinstance(node, Constant) and isinstance(node.value, str):
+                # forward references are written as strings
+                used_names.update(_IDENTIFIER.findall(node.value))
+        return used_names
+
+    def _get_class_names(self, module: Module) -> List[str]:
+        return [
+            element.name for element in module.body if isinstance(element, ClassDef)
+        ]
+
+    def _create_package_init(
+        self,
+        package_init_generator: PackageInitGenerator,
+        out_dir: Path,
+        writer: SourceWriter,
+    ):
+        filepath = out_dir / '__init__.py'
+        if not self._settings.lazy_package_init:
+            # an index left by an earlier generation is emptied as well
+            filepath.write_text('')
+            return
+        writer.write(package_init_generator.create_source(), filepath)
 
     def _insert_imports(self, module: Module, imports: Set[AstImport]):
         body_imports = []
@@ -81,19 +358,15 @@ class PackageGenerator:
         body_imports.sort()
         module.body = body_imports + body
 
-    def _create_lib_dependencies(self, out_dir, importer):
-        self._create_base_service(importer, out_dir)
+    def _create_lib_dependencies(self, out_dir, importer, writer):
+        self._create_base_service(importer, out_dir, writer)
 
-    def _create_base_service(self, importer, out_dir):
+    def _create_base_service(self, importer, out_dir, writer):
         pyfile = Path('base_service').with_suffix('.py')
         base_service_source_generator = BaseServiceSourceGenerator(
-            DomesticImporter(importer, pyfile)
+            DomesticImporter(importer, pyfile), self._settings
         )
         module = base_service_source_generator.create_source()
         imports = importer.get_imports(pyfile)
         self._insert_imports(module, imports)
-        result_src = astor.to_source(module)
-        filepath = out_dir / pyfile
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'w') as f:
-            f.write(result_src)
+        writer.write(module, out_dir / pyfile)
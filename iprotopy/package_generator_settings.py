@@ -1,5 +1,6 @@
 import dataclasses
 from enum import Enum
+from typing import List, Optional
 
 
 class StringCase(Enum):
@@ -10,6 +11,48 @@ class StringCase(Enum):
     PASCAL = 'PASCAL'
 
 
+class RenderBackend(Enum):
+    ASTOR = 'ASTOR'
+    UNPARSE = 'UNPARSE'
+
+
+class RepeatedNumericType(Enum):
+    LIST = 'LIST'
+    ARRAY = 'ARRAY'
+    NUMPY = 'NUMPY'
+
+
+class EnumRepresentation(Enum):
+    INT_ENUM = 'INT_ENUM'
+    INT_CONSTANTS = 'INT_CONSTANTS'
+
+
+class GeneratorFrontend(Enum):
+    PROTO_PARSER = 'PROTO_PARSER'
+    DESCRIPTOR_SET = 'DESCRIPTOR_SET'
+
+
 @dataclasses.dataclass
 class PackageGeneratorSettings:
     service_method_name_case: StringCase = StringCase.ORIGINAL
+    render_backend: RenderBackend = RenderBackend.ASTOR
+    compile_bytecode: bool = False
+    compile_workers: Optional[int] = None
+    lazy_package_init: bool = True
+    lazy_grpc_stubs: bool = False
+    generation_roots: Optional[List[str]] = None
+    frontend: GeneratorFrontend = GeneratorFrontend.PROTO_PARSER
+    wire_decoding: bool = False
+    fused_serialization: bool = False
+    pooled_stream_requests: bool = False
+    projection_argument: bool = False
+    interned_fields: Optional[List[str]] = None
+    stream_recording: bool = False
+    request_hedging: bool = False
+    in_process_protoc: bool = False
+    call_scheduling: bool = False
+    keep_protobuf_source: bool = False
+    parallel_conversion: bool = False
+    repeated_numeric_type: RepeatedNumericType = RepeatedNumericType.LIST
+    enum_representation: EnumRepresentation = EnumRepresentation.INT_ENUM
+    expanded_dataclasses: bool = False
@@ -0,0 +1,228 @@
+import logging
+from ast import (
+    Assign,
+    Attribute,
+    BinOp,
+    BitOr,
+    Call,
+    Compare,
+    Constant,
+    Dict,
+    FormattedValue,
+    FunctionDef,
+    If,
+    Is,
+    JoinedStr,
+    List,
+    Load,
+    Module,
+    Name,
+    Raise,
+    Return,
+    Store,
+    Subscript,
+    alias,
+    arg,
+    arguments,
+)
+from pathlib import Path
+from typing import Dict as TypingDict
+from typing import Iterable
+
+from iprotopy.importer import Importer
+from iprotopy.imports import ImportFrom
+
+logger = logging.getLogger(__name__)
+
+
+class PackageInitGenerator:
+    def __init__(self, importer: Importer):
+        self._importer = importer
+        self._lazy_index: TypingDict[str, str] = {}
+
+    def add_module(self, pyfile: Path, class_names: Iterable[str]):
+        module_name = self._importer.path_to_module(pyfile)
+        for class_name in class_names:
+            if class_name in self._lazy_index:
+                logger.warning(
+                    'Class %s is exported from %s and %s, keeping the latter',
+                    class_name,
+                    self._lazy_index[class_name],
+                    module_name,
+                )
+            self._lazy_index[class_name] = module_name
+
+    def create_source(self) -> Module:
+        class_names = sorted(self._lazy_index)
+        body = [
+            ImportFrom(
+                module='importlib', names=[alias(name='import_module')], level=0
+            ),
+            ImportFrom(module='typing', names=[alias(name='TYPE_CHECKING')], level=0),
+            If(
+                test=Name(id='TYPE_CHECKING', ctx=Load()),
+                body=sorted(
+                    ImportFrom(
+                        module=self._lazy_index[class_name],
+                        names=[alias(name=class_name)],
+                        level=0,
+                    )
+                    for class_name in class_names
+                ),
+                orelse=[],
+            ),
+            Assign(
+                targets=[Name(id='_lazy_index', ctx=Store())],
+                value=Dict(
+                    keys=[Constant(value=class_name) for class_name in class_names],
+                    values=[
+                        Constant(value=self._lazy_index[class_name])
+                        for class_name in class_names
+                    ],
+                ),
+            ),
+            Assign(
+                targets=[Name(id='__all__', ctx=Store())],
+                value=List(
+                    elts=[Constant(value=class_name) for class_name in class_names],
+                    ctx=Load(),
+                ),
+            ),
+            self._get_getattr_function(),
+            self._get_dir_function(),
+        ]
+        if not class_names:
+            # empty if body is not valid python
+            body.pop(2)
+        return Module(body=body, type_ignores=[])
+
+    def _get_getattr_function(self) -> FunctionDef:
+        return FunctionDef(
+            name='__getattr__',
+            args=arguments(
+                posonlyargs=[],
+                args=[arg(arg='name')],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=[
+                Assign(
+                    targets=[Name(id='module_name', ctx=Store())],
+                    value=Call(
+                        func=Attribute(
+                            value=Name(id='_lazy_index', ctx=Load()),
+                            attr='get',
+                            ctx=Load(),
+                        ),
+                        args=[Name(id='name', ctx=Load())],
+                        keywords=[],
+                    ),
+                ),
+                If(
+                    test=Compare(
+                        left=Name(id='module_name', ctx=Load()),
+                        ops=[Is()],
+                        comparators=[Constant(value=None)],
+                    ),
+                    body=[
+                        Raise(
+                            exc=Call(
+                                func=Name(id='AttributeError', ctx=Load()),
+                                args=[
+                                    JoinedStr(
+                                        values=[
+                                            Constant(value='module '),
+                                            FormattedValue(
+                                                value=Name(id='__name__', ctx=Load()),
+                                                conversion=ord('r'),
+                                            ),
+                                            Constant(value=' has no attribute '),
+                                            FormattedValue(
+                                                value=Name(id='name', ctx=Load()),
+                                                conversion=ord('r'),
+                                            ),
+                                        ]
+                                    )
+                                ],
+                                keywords=[],
+                            )
+                        )
+                    ],
+                    orelse=[],
+                ),
+                Assign(
+                    targets=[Name(id='value', ctx=Store())],
+                    value=Call(
+                        func=Name(id='getattr', ctx=Load()),
+                        args=[
+                            Call(
+                                func=Name(id='import_module', ctx=Load()),
+                                args=[Name(id='module_name', ctx=Load())],
+                                keywords=[],
+                            ),
+                            Name(id='name', ctx=Load()),
+                        ],
+                        keywords=[],
+                    ),
+                ),
+                Assign(
+                    targets=[
+                        Subscript(
+                            value=Call(
+                                func=Name(id='globals', ctx=Load()),
+                                args=[],
+                                keywords=[],
+                            ),
+                            slice=Name(id='name', ctx=Load()),
+                            ctx=Store(),
+                        )
+                    ],
+                    value=Name(id='value', ctx=Load()),
+                ),
+                Return(value=Name(id='value', ctx=Load())),
+            ],
+            decorator_list=[],
+        )
+
+    def _get_dir_function(self) -> FunctionDef:
+        return FunctionDef(
+            name='__dir__',
+            args=arguments(
+                posonlyargs=[],
+                args=[],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=[
+                Return(
+                    value=Call(
+                        func=Name(id='sorted', ctx=Load()),
+                        args=[
+                            BinOp(
+                                left=Call(
+                                    func=Name(id='set', ctx=Load()),
+                                    args=[
+                                        Call(
+                                            func=Name(id='globals', ctx=Load()),
+                                            args=[],
+                                            keywords=[],
+                                        )
+                                    ],
+                                    keywords=[],
+                                ),
+                                op=BitOr(),
+                                right=Call(
+                                    func=Name(id='set', ctx=Load()),
+                                    args=[Name(id='__all__', ctx=Load())],
+                                    keywords=[],
+                                ),
+                            )
+                        ],
+                        keywords=[],
+                    )
+                )
+            ],
+            decorator_list=[],
+        )
@@ -0,0 +1,145 @@
+import dataclasses
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from iprotopy.convertion import protobuf_to_dataclass, to_unsafe_field_name
+
+T = TypeVar('T')
+ConverterT = TypeVar('ConverterT', bound='ParallelConverter')
+
+
+def is_free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class ParallelConverter:
+    def __init__(
+        self,
+        threshold: int = 20000,
+        chunk_size: int = 10000,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        # repeated message fields with fewer items than the threshold are
+        # converted serially
+        self._threshold = threshold
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def convert(
+        self,
+        pb_obj: Any,
+        dataclass_type: Type[T],
+        projection: Optional[Iterable[str]] = None,
+        keep_source: bool = False,
+    ) -> T:
+        large_fields = {}
+        if projection is None and not keep_source:
+            for field_name, item_type in _get_message_lists(dataclass_type).items():
+                items = getattr(pb_obj, to_unsafe_field_name(field_name))
+                if len(items) >= self._threshold:
+                    large_fields[field_name] = item_type
+        if not large_fields:
+            return protobuf_to_dataclass(
+                pb_obj, dataclass_type, projection=projection, keep_source=keep_source
+            )
+
+        futures = {
+            field_name: self._submit_chunks(pb_obj, field_name, item_type)
+            for field_name, item_type in large_fields.items()
+        }
+        other_fields = [
+            field_name
+            for field_name in get_type_hints(dataclass_type)
+            if field_name not in large_fields
+        ]
+        # the remaining fields are converted while the chunks are in flight
+        dataclass_obj = protobuf_to_dataclass(
+            pb_obj, dataclass_type, projection=other_fields
+        )
+        for field_name, chunk_futures in futures.items():
+            items: List[Any] = []
+            for future in chunk_futures:
+                items.extend(future.result())
+            setattr(dataclass_obj, field_name, items)
+        return dataclass_obj
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self: ConverterT) -> ConverterT:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _submit_chunks(self, pb_obj: Any, field_name: str, item_type: Type[Any]):
+        executor = self._get_executor()
+        protobuf_type = type(pb_obj)
+        unsafe_field_name = to_unsafe_field_name(field_name)
+        items = getattr(pb_obj, unsafe_field_name)
+        futures = []
+        for start in range(0, len(items), self._chunk_size):
+            # items travel to the workers as a serialized message holding
+            # only the chunk, so processes and threads take the same input
+            chunk = protobuf_type()
+            getattr(chunk, unsafe_field_name).extend(
+                items[start : start + self._chunk_size]
+            )
+            futures.append(
+                executor.submit(
+                    _convert_chunk,
+                    protobuf_type,
+                    unsafe_field_name,
+                    item_type,
+                    chunk.SerializeToString(),
+                )
+            )
+        return futures
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if is_free_threaded():
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+
+@lru_cache(maxsize=None)
+def _get_message_lists(dataclass_type: Type[Any]) -> Dict[str, Type[Any]]:
+    message_lists = {}
+    for field_name, field_type in get_type_hints(dataclass_type).items():
+        if get_origin(field_type) is not list:
+            continue
+        (item_type,) = get_args(field_type)
+        if dataclasses.is_dataclass(item_type):
+            message_lists[field_name] = item_type
+    return message_lists
+
+
+def _convert_chunk(
+    protobuf_type: Type[Any], field_name: str, item_type: Type[T], data: bytes
+) -> List[T]:
+    pb_obj = protobuf_type.FromString(data)
+    return [
+        protobuf_to_dataclass(item, item_type) for item in getattr(pb_obj, field_name)
+    ]
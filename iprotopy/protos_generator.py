@@ -1,39 +1,101 @@
 import subprocess
+import tempfile
+from importlib import resources
 from pathlib import Path
+from typing import List, Optional
+
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
 
 from iprotopy.importer import Importer
 
 
 class ProtosGenerator:
-    def __init__(self, importer: Importer):
+    def __init__(self, importer: Importer, in_process: bool = False):
         self._importer = importer
+        # a long running process saves starting an interpreter for every run
+        self._in_process = in_process
 
-    def generate_protos(self, proto_include_path: Path, models_path: Path):
+    def generate_protos(
+        self,
+        proto_include_path: Path,
+        models_path: Path,
+        proto_files: Optional[List[Path]] = None,
+        descriptor_set: bool = False,
+    ) -> Optional[FileDescriptorSet]:
         models_path.mkdir(parents=True, exist_ok=True)
 
-        proto_files = list(proto_include_path.rglob('*.proto'))
+        if proto_files is None:
+            proto_files = list(proto_include_path.rglob('*.proto'))
+            self.register_modules(proto_files, proto_include_path)
+
+        return self._run_protoc(
+            proto_include_path,
+            proto_files,
+            [
+                f'--mypy_out={models_path}',
+                f'--python_out={models_path}',
+                f'--grpc_python_out={models_path}',
+            ],
+            descriptor_set,
+        )
 
-        self._register_modules(proto_files, proto_include_path)
+    def generate_descriptor_set(
+        self, proto_include_path: Path, proto_files: List[Path]
+    ) -> FileDescriptorSet:
+        return self._run_protoc(proto_include_path, proto_files, [], True)
 
+    def _run_protoc(
+        self,
+        proto_include_path: Path,
+        proto_files: List[Path],
+        outputs: List[str],
+        descriptor_set: bool,
+    ) -> Optional[FileDescriptorSet]:
         if not proto_files:
             raise ValueError(f'No .proto files found in {proto_include_path}')
 
-        command = [
-            'python',
-            '-m',
-            'grpc_tools.protoc',
-            f'--proto_path={proto_include_path}',
-            f'--mypy_out={models_path}',
-            f'--python_out={models_path}',
-            f'--grpc_python_out={models_path}',
-        ] + [str(proto) for proto in proto_files]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            descriptor_set_path = Path(tmp_dir) / 'descriptor_set.pb'
+            if descriptor_set:
+                outputs = outputs + [
+                    f'--descriptor_set_out={descriptor_set_path}',
+                    '--include_source_info',
+                ]
+            arguments = (
+                [f'--proto_path={proto_include_path}']
+                + outputs
+                + [str(proto) for proto in proto_files]
+            )
+            if self._in_process:
+                self._run_protoc_in_process(arguments)
+            else:
+                self._run_protoc_subprocess(arguments)
+
+            if not descriptor_set:
+                return None
+            return FileDescriptorSet.FromString(descriptor_set_path.read_bytes())
 
+    def _run_protoc_subprocess(self, arguments: List[str]):
+        command = ['python', '-m', 'grpc_tools.protoc'] + arguments
         try:
             subprocess.run(command, check=True)
         except subprocess.CalledProcessError as e:
             raise ValueError(f'Error while generating protos: {e}') from e
 
-    def _register_modules(self, proto_files: list[Path], proto_include_path: Path):
+    def _run_protoc_in_process(self, arguments: List[str]):
+        from grpc_tools import protoc
+
+        # python -m grpc_tools.protoc adds the bundled well known types the same way
+        well_known_types = resources.files('grpc_tools') / '_proto'
+        exit_code = protoc.main(
+            ['grpc_tools.protoc'] + arguments + [f'--proto_path={well_known_types}']
+        )
+        if exit_code != 0:
+            raise ValueError(
+                f'Error while generating protos: protoc exited with {exit_code}'
+            )
+
+    def register_modules(self, proto_files: list[Path], proto_include_path: Path):
         for proto_file in proto_files:
             package = proto_file.relative_to(proto_include_path).parent
             filename = proto_file.stem
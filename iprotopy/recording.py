@@ -0,0 +1,170 @@
+import abc
+import mmap
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Type, TypeVar, Union
+
+from iprotopy.serialization import dataclass_deserializer
+from iprotopy.wire_decoding import wire_deserializer
+
+T = TypeVar('T')
+
+# every record is its length followed by the serialized message, the index
+# holds the offset of the record and the time it was received for each record
+_LENGTH = struct.Struct('<I')
+_INDEX_ENTRY = struct.Struct('<qq')
+INDEX_SUFFIX = '.idx'
+
+
+class BaseStreamRecorder(abc.ABC):
+    @abc.abstractmethod
+    def record(self, data: bytes, timestamp_ns: Optional[int] = None):
+        pass
+
+    @abc.abstractmethod
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class StreamRecorder(BaseStreamRecorder):
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        with ExitStack() as stack:
+            self._data_file = stack.enter_context(open(path, 'ab'))
+            self._index_file = stack.enter_context(open(_get_index_path(path), 'ab'))
+            # the data file is only closed here if the index can not be opened
+            stack.pop_all()
+        self._offset = self._data_file.tell()
+        self._lock = threading.Lock()
+
+    def record(self, data: bytes, timestamp_ns: Optional[int] = None):
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        with self._lock:
+            self._data_file.write(_LENGTH.pack(len(data)))
+            self._data_file.write(data)
+            self._index_file.write(_INDEX_ENTRY.pack(self._offset, timestamp_ns))
+            self._offset += _LENGTH.size + len(data)
+
+    def flush(self):
+        with self._lock:
+            # the index never points past the data written so far
+            self._data_file.flush()
+            self._index_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._data_file.close()
+            self._index_file.close()
+
+
+def record_responses(
+    recorder: Optional[BaseStreamRecorder], deserializer: Callable[[bytes], T]
+) -> Callable[[bytes], T]:
+    if recorder is None:
+        return deserializer
+
+    def deserialize(data: bytes) -> T:
+        recorder.record(data)
+        return deserializer(data)
+
+    return deserialize
+
+
+class StreamReplayer:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        protobuf_type: Type[Any],
+        dataclass_type: Type[T],
+        wire_decoding: bool = False,
+    ):
+        path = Path(path)
+        if wire_decoding:
+            self._deserializer = wire_deserializer(protobuf_type, dataclass_type)
+        else:
+            self._deserializer = dataclass_deserializer(protobuf_type, dataclass_type)
+        self._data = _map_file(path)
+        self._index = _map_file(_get_index_path(path))
+        self._entries = memoryview(self._index).cast('q') if self._index else None
+        entries = self._entries if self._entries is not None else []
+        self._offsets = entries[0::2]
+        self._timestamps = entries[1::2]
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> T:
+        return self._deserializer(self.get_bytes(index))
+
+    def __iter__(self) -> Iterator[T]:
+        return self.replay()
+
+    def get_bytes(self, index: int) -> bytes:
+        offset = self._offsets[index]
+        (length,) = _LENGTH.unpack_from(self._data, offset)
+        start = offset + _LENGTH.size
+        return self._data[start : start + length]
+
+    def get_timestamp(self, index: int) -> int:
+        return self._timestamps[index]
+
+    def seek(self, timestamp_ns: int) -> int:
+        return bisect_left(self._timestamps, timestamp_ns)
+
+    def replay(self, start: int = 0, stop: Optional[int] = None) -> Iterator[T]:
+        deserializer = self._deserializer
+        get_bytes = self.get_bytes
+        for index in range(*slice(start, stop).indices(len(self))):
+            yield deserializer(get_bytes(index))
+
+    def replay_batches(
+        self, batch_size: int, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[List[T]]:
+        deserializer = self._deserializer
+        get_bytes = self.get_bytes
+        start, stop, _ = slice(start, stop).indices(len(self))
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            yield [
+                deserializer(get_bytes(index))
+                for index in range(batch_start, batch_stop)
+            ]
+
+    def close(self):
+        if self._entries is not None:
+            # views of a mapped file must be released before it is closed
+            self._offsets.release()
+            self._timestamps.release()
+            self._entries.release()
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _get_index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _map_file(path: Path) -> Optional[mmap.mmap]:
+    with open(path, 'rb') as file:
+        if not file.seek(0, 2):
+            # empty files can not be mapped
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
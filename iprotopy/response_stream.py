@@ -0,0 +1,20 @@
+from typing import Any, Callable, Generic, Iterator, TypeVar
+
+T = TypeVar('T')
+
+
+class ResponseStream(Generic[T]):
+    # converts the responses of a streaming call lazily, like a generator
+    # would, but keeps the call so that its consumer can still cancel it
+    def __init__(self, call: Any, convert: Callable[[Any], T]):
+        self._call = call
+        self._convert = convert
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        return self._convert(next(self._call))
+
+    def cancel(self) -> bool:
+        return self._call.cancel()
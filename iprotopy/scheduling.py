@@ -0,0 +1,183 @@
+import dataclasses
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+@dataclasses.dataclass
+class RateLimit:
+    # calls per window, e.g. RateLimit(300, 60) for 300 calls a minute
+    limit: float
+    window: float = 1.0
+
+
+@dataclasses.dataclass
+class SchedulerMetrics:
+    calls: int = 0
+    delayed_calls: int = 0
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        # tokens go negative for callers that have to wait, so concurrent
+        # callers are dispatched in the order they reserved
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(self._updated - now, 0.0)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def update(
+        self,
+        rate: float,
+        capacity: float,
+        remaining: Optional[float] = None,
+        reset: Optional[float] = None,
+    ):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = rate
+            self.capacity = capacity
+            if remaining is None:
+                return
+            if remaining <= 0 and reset:
+                # the quota is exhausted until it resets, the updated time is
+                # moved forward so nothing is refilled before that
+                self._tokens = capacity + min(self._tokens, 0)
+                self._updated = max(self._updated, now + reset)
+            else:
+                self._tokens = min(self._tokens, remaining)
+
+    def _refill(self, now: float):
+        if now <= self._updated:
+            return
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+class CallScheduler:
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        groups: Optional[Dict[str, str]] = None,
+        default_limit: Optional[RateLimit] = None,
+        default_window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        # limits are keyed by method name or by the group a method belongs to
+        self._limits = dict(limits or {})
+        self._groups = dict(groups or {})
+        self._default_limit = default_limit
+        self._default_window = default_window
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, SchedulerMetrics] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, method_name: str) -> float:
+        key = self._groups.get(method_name, method_name)
+        bucket = self._get_bucket(key)
+        metrics = self._get_metrics(key)
+        wait = 0.0 if bucket is None else bucket.reserve()
+        with self._lock:
+            metrics.calls += 1
+            if wait > 0:
+                metrics.delayed_calls += 1
+                metrics.queued += 1
+                metrics.total_wait += wait
+                metrics.max_wait = max(metrics.max_wait, wait)
+        if wait > 0:
+            self._sleep(wait)
+            with self._lock:
+                metrics.queued -= 1
+        return wait
+
+    def update_from_metadata(
+        self, method_name: str, metadata: Optional[Iterable[Tuple[str, str]]]
+    ):
+        headers = {key.lower(): value for key, value in metadata or ()}
+        limit_header = headers.get('x-ratelimit-limit')
+        if limit_header is None:
+            return
+        numbers = [float(number) for number in _NUMBER.findall(limit_header)]
+        if not numbers:
+            return
+        limit = numbers[0]
+        window = numbers[1] if len(numbers) > 1 else self._default_window
+        remaining = _get_number(headers.get('x-ratelimit-remaining'))
+        reset = _get_number(headers.get('x-ratelimit-reset'))
+
+        key = self._groups.get(method_name, method_name)
+        with self._lock:
+            self._limits[key] = RateLimit(limit, window)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(
+                    limit / window, limit, self._clock
+                )
+        bucket.update(limit / window, limit, remaining, reset)
+
+    def get_metrics(self) -> Dict[str, SchedulerMetrics]:
+        with self._lock:
+            return {
+                key: dataclasses.replace(metrics)
+                for key, metrics in self._metrics.items()
+            }
+
+    def _get_bucket(self, key: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            return bucket
+        limit = self._limits.get(key, self._default_limit)
+        if limit is None:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(
+                    limit.limit / limit.window, limit.limit, self._clock
+                )
+        return bucket
+
+    def _get_metrics(self, key: str) -> SchedulerMetrics:
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(key, SchedulerMetrics())
+        return metrics
+
+
+def _get_number(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    match = _NUMBER.search(value)
+    if match is None:
+        return None
+    return float(match.group())
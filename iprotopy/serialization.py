@@ -0,0 +1,70 @@
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, Type, TypeVar
+
+from iprotopy.convertion import (
+    dataclass_to_protobuf,
+    get_unmodified_source,
+    protobuf_to_dataclass,
+)
+
+T = TypeVar('T')
+
+
+@lru_cache(maxsize=None)
+def dataclass_serializer(protobuf_type: Type[Any]) -> Callable[[Any], bytes]:
+    descriptor = protobuf_type.DESCRIPTOR
+
+    def serialize(dataclass_obj: Any) -> bytes:
+        source = get_unmodified_source(dataclass_obj)
+        if source is not None and source.DESCRIPTOR is descriptor:
+            return source.SerializeToString()
+        return dataclass_to_protobuf(dataclass_obj, protobuf_type()).SerializeToString()
+
+    return serialize
+
+
+@lru_cache(maxsize=None)
+def dataclass_deserializer(
+    protobuf_type: Type[Any], dataclass_type: Type[T], keep_source: bool = False
+) -> Callable[[bytes], T]:
+    from_string = protobuf_type.FromString
+
+    def deserialize(data: bytes) -> T:
+        return protobuf_to_dataclass(
+            from_string(data), dataclass_type, keep_source=keep_source
+        )
+
+    return deserialize
+
+
+@lru_cache(maxsize=None)
+def pooled_dataclass_serializer(protobuf_type: Type[Any]) -> Callable[[Any], bytes]:
+    # serializers run concurrently for different calls, so each thread
+    # keeps its own message
+    local = threading.local()
+    descriptor = protobuf_type.DESCRIPTOR
+
+    def serialize(dataclass_obj: Any) -> bytes:
+        source = get_unmodified_source(dataclass_obj)
+        if source is not None and source.DESCRIPTOR is descriptor:
+            return source.SerializeToString()
+        message = getattr(local, 'message', None)
+        if message is None:
+            message = local.message = protobuf_type()
+        else:
+            message.Clear()
+        return dataclass_to_protobuf(dataclass_obj, message).SerializeToString()
+
+    return serialize
+
+
+def pooled_protobuf_requests(
+    requests: Iterable[Any], protobuf_type: Type[T]
+) -> Iterator[T]:
+    # grpc serializes a request before pulling the next one from the iterator,
+    # so the message can be cleared and refilled once the generator resumes
+    message = protobuf_type()
+    for request in requests:
+        message.Clear()  # type:ignore
+        yield dataclass_to_protobuf(request, message)
@@ -1,7 +1,20 @@
 import ast
-from ast import Assign, Attribute, ClassDef, Constant, Expr, Load, Name, Store
+from ast import (
+    Assign,
+    Attribute,
+    Call,
+    ClassDef,
+    Constant,
+    Expr,
+    FunctionDef,
+    Load,
+    Name,
+    Store,
+    arg,
+    arguments,
+)
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from proto_schema_parser.ast import Comment, Method, Service
 
@@ -17,9 +30,11 @@ class ServiceGenerator:
         importer: DomesticImporter,
         pyfile: Path,
         settings: PackageGeneratorSettings,
+        package: Optional[str] = None,
     ):
         self._importer = importer
         self._pyfile = pyfile
+        self._package = package
         self._settings = settings
         self._string_case_converter = StringCaseConverter()
         self._service_method_generator = ServiceMethodGenerator(
@@ -33,18 +48,30 @@ class ServiceGenerator:
 
         body.extend(self._get_protobuf_attributes(service))
 
+        multicallables = []
+        methods = []
         for element in service.elements:
             if isinstance(element, Comment):
                 continue
             elif isinstance(element, Method):
-                body.append(
+                methods.append(
                     self._service_method_generator.process_service_method(element)
                 )
+                multicallable = self._service_method_generator.get_multicallable(
+                    element, self._get_method_path(service, element)
+                )
+                if multicallable is not None:
+                    multicallables.append((element.name, multicallable))
                 continue
             else:
                 raise NotImplementedError(f'Unknown element {element}')
 
+        if multicallables:
+            body.append(self._get_init(multicallables))
+        body.extend(methods)
+
         bases = self._get_bases()
+        self._importer.define_dependency(service.name)
         return ClassDef(
             name=service.name,
             bases=bases,
@@ -53,10 +80,72 @@ class ServiceGenerator:
             decorator_list=[],
         )
 
+    def _get_method_path(self, service: Service, method: Method) -> str:
+        service_name = service.name
+        if self._package:
+            service_name = f'{self._package}.{service_name}'
+        return f'/{service_name}/{method.name}'
+
+    def _get_init(self, multicallables: List[tuple[str, ast.expr]]) -> FunctionDef:
+        # stub methods with custom (de)serializers replace the ones built by
+        # the _pb2_grpc stub, so they are created once per service instance
+        return FunctionDef(
+            name='__init__',
+            args=arguments(
+                posonlyargs=[],
+                args=[arg(arg='self'), arg(arg='channel')],
+                vararg=arg(arg='args'),
+                kwonlyargs=[],
+                kw_defaults=[],
+                kwarg=arg(arg='kwargs'),
+                defaults=[],
+            ),
+            body=[
+                Expr(
+                    value=Call(
+                        func=Attribute(
+                            value=Call(
+                                func=Name(id='super', ctx=Load()),
+                                args=[],
+                                keywords=[],
+                            ),
+                            attr='__init__',
+                            ctx=Load(),
+                        ),
+                        args=[
+                            Name(id='channel', ctx=Load()),
+                            ast.Starred(value=Name(id='args', ctx=Load()), ctx=Load()),
+                        ],
+                        keywords=[
+                            ast.keyword(value=Name(id='kwargs', ctx=Load())),
+                        ],
+                    )
+                ),
+                *(
+                    Assign(
+                        targets=[
+                            Attribute(
+                                value=Attribute(
+                                    value=Name(id='self', ctx=Load()),
+                                    attr='_stub',
+                                    ctx=Load(),
+                                ),
+                                attr=method_name,
+                                ctx=Store(),
+                            )
+                        ],
+                        value=multicallable,
+                    )
+                    for method_name, multicallable in multicallables
+                ),
+            ],
+            decorator_list=[],
+        )
+
     def _try_add_docstring(self, body: List[ast.stmt], service: Service):
+        # the comment itself is skipped along with the other service comments
         if service.elements and isinstance(service.elements[0], Comment):
             body.append(Expr(value=Constant(value=service.elements[0].text)))
-            service.elements = service.elements[1:]
 
     def _get_bases(self) -> List[ast.expr]:
         self._importer.import_dependency('BaseService')
@@ -68,22 +157,47 @@ class ServiceGenerator:
         protobuf_grpc_package_name = f'{package_name}_pb2_grpc'
 
         self._importer.import_dependency(protobuf_package_name)
-        self._importer.import_dependency(protobuf_grpc_package_name)
-        return [
+        attributes = [
             Assign(
                 targets=[Name(id='_protobuf', ctx=Store())],
                 value=Name(id=protobuf_package_name, ctx=Load()),
             ),
-            Assign(
-                targets=[Name(id='_protobuf_grpc', ctx=Store())],
-                value=Name(id=protobuf_grpc_package_name, ctx=Load()),
-            ),
-            Assign(
-                targets=[Name(id='_protobuf_stub', ctx=Store())],
-                value=Attribute(
-                    value=Name(id='_protobuf_grpc', ctx=Load()),
-                    attr=f'{service.name}Stub',
-                    ctx=Load(),
-                ),
-            ),
         ]
+        if self._settings.lazy_grpc_stubs:
+            grpc_module = self._importer.get_definition_module(
+                protobuf_grpc_package_name
+            )
+            attributes.extend(
+                [
+                    Assign(
+                        targets=[Name(id='_protobuf_grpc_module', ctx=Store())],
+                        value=Constant(
+                            value=f'{grpc_module}.{protobuf_grpc_package_name}'
+                        ),
+                    ),
+                    Assign(
+                        targets=[Name(id='_protobuf_stub_name', ctx=Store())],
+                        value=Constant(value=f'{service.name}Stub'),
+                    ),
+                ]
+            )
+            return attributes
+
+        self._importer.import_dependency(protobuf_grpc_package_name)
+        attributes.extend(
+            [
+                Assign(
+                    targets=[Name(id='_protobuf_grpc', ctx=Store())],
+                    value=Name(id=protobuf_grpc_package_name, ctx=Load()),
+                ),
+                Assign(
+                    targets=[Name(id='_protobuf_stub', ctx=Store())],
+                    value=Attribute(
+                        value=Name(id='_protobuf_grpc', ctx=Load()),
+                        attr=f'{service.name}Stub',
+                        ctx=Load(),
+                    ),
+                ),
+            ]
+        )
+        return attributes
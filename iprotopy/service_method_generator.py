@@ -5,11 +5,17 @@ from ast import (
     Assign,
     Attribute,
     Call,
+    Compare,
     Constant,
     Expr,
     For,
     FunctionDef,
     GeneratorExp,
+    If,
+    IfExp,
+    Is,
+    IsNot,
+    Lambda,
     Load,
     Name,
     Return,
@@ -57,24 +63,195 @@ class BaseServiceMethodGenerator(abc.ABC):
     def _get_function_body(self, method: Method) -> list[ast.stmt]:
         pass
 
-    def _add_function_body_imports(self):
-        self._importer.add_import(
-            ImportFrom(
-                module=SOURCE_PACKAGE_NAME,
-                names=[alias(name='dataclass_to_protobuf')],
-                level=0,
+    def get_multicallable(
+        self, method: Method, method_path: str
+    ) -> typing.Optional[ast.expr]:
+        request_serializer = self._get_request_serializer(method)
+        response_deserializer = self._get_response_deserializer(method)
+        if (
+            request_serializer is None
+            and response_deserializer is None
+            and not self._is_response_recorded()
+        ):
+            return None
+        if request_serializer is None:
+            request_serializer = Attribute(
+                value=self._get_protobuf_class(method.input_type.type),
+                attr='SerializeToString',
+                ctx=Load(),
             )
+        if response_deserializer is None:
+            response_deserializer = Attribute(
+                value=self._get_protobuf_class(method.output_type.type),
+                attr='FromString',
+                ctx=Load(),
+            )
+        if self._is_response_recorded():
+            self._add_source_package_import('record_responses')
+            response_deserializer = Call(
+                func=Name(id='record_responses', ctx=Load()),
+                args=[
+                    Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_recorder',
+                        ctx=Load(),
+                    ),
+                    response_deserializer,
+                ],
+                keywords=[],
+            )
+        return self._get_multicallable(
+            method_path, request_serializer, response_deserializer
         )
-        self._importer.add_import(
-            ImportFrom(
-                module=SOURCE_PACKAGE_NAME,
-                names=[alias(name='protobuf_to_dataclass')],
-                level=0,
+
+    def _is_response_recorded(self) -> bool:
+        return self._settings.stream_recording and self._is_output_stream
+
+    def _is_request_serialized(self) -> bool:
+        return self._settings.fused_serialization
+
+    def _is_request_pooled(self) -> bool:
+        return self._settings.pooled_stream_requests and self._is_input_stream
+
+    def _is_wire_decoded(self) -> bool:
+        return self._settings.wire_decoding and (
+            self._settings.fused_serialization
+            or (self._is_output_stream and not self._is_input_stream)
+        )
+
+    def _is_response_deserialized(self) -> bool:
+        return self._settings.fused_serialization or self._is_wire_decoded()
+
+    def _get_request_serializer(self, method: Method) -> typing.Optional[ast.expr]:
+        if not self._is_request_serialized():
+            return None
+        serializer_name = 'dataclass_serializer'
+        if self._is_request_pooled():
+            serializer_name = 'pooled_dataclass_serializer'
+        self._add_source_package_import(serializer_name)
+        return Call(
+            func=Name(id=serializer_name, ctx=Load()),
+            args=[self._get_protobuf_class(method.input_type.type)],
+            keywords=[],
+        )
+
+    def _get_response_deserializer(self, method: Method) -> typing.Optional[ast.expr]:
+        if self._is_wire_decoded():
+            deserializer_name = 'wire_deserializer'
+        elif self._settings.fused_serialization:
+            deserializer_name = 'dataclass_deserializer'
+        else:
+            return None
+        self._add_source_package_import(deserializer_name)
+        keywords = []
+        if deserializer_name == 'dataclass_deserializer':
+            keywords.extend(self._get_keep_source_keywords())
+        return Call(
+            func=Name(id=deserializer_name, ctx=Load()),
+            args=[
+                self._get_protobuf_class(method.output_type.type),
+                Name(id=method.output_type.type, ctx=Load()),
+            ],
+            keywords=keywords,
+        )
+
+    def _get_keep_source_keywords(self) -> typing.List[keyword]:
+        if not self._settings.keep_protobuf_source:
+            return []
+        return [keyword(arg='keep_source', value=Constant(value=True))]
+
+    def _get_request_value(self, request_class_name: str) -> ast.expr:
+        if self._is_request_serialized():
+            return Name(id='request', ctx=Load())
+        return Call(
+            func=Name(id='dataclass_to_protobuf', ctx=Load()),
+            args=[
+                Name(id='request', ctx=Load()),
+                Call(
+                    func=self._get_protobuf_class(request_class_name),
+                    args=[],
+                    keywords=[],
+                ),
+            ],
+            keywords=[],
+        )
+
+    def _get_response_value(self, response_class_name: str) -> ast.expr:
+        if self._is_response_deserialized():
+            return Name(id='response', ctx=Load())
+        keywords = []
+        if self._has_projection_argument():
+            keywords.append(
+                keyword(arg='projection', value=Name(id='projection', ctx=Load()))
             )
+        keywords.extend(self._get_keep_source_keywords())
+        return Call(
+            func=Name(id='protobuf_to_dataclass', ctx=Load()),
+            args=[
+                Name(id='response', ctx=Load()),
+                Name(id=response_class_name, ctx=Load()),
+            ],
+            keywords=keywords,
+        )
+
+    def _has_projection_argument(self) -> bool:
+        # responses converted by the channel deserializer are never projected
+        return (
+            self._settings.projection_argument and not self._is_response_deserialized()
+        )
+
+    def _get_multicallable(
+        self,
+        method_path: str,
+        request_serializer: ast.expr,
+        response_deserializer: ast.expr,
+    ) -> ast.expr:
+        stream_kind = 'stream' if self._is_input_stream else 'unary'
+        stream_kind += '_stream' if self._is_output_stream else '_unary'
+        return Call(
+            func=Attribute(
+                value=Name(id='channel', ctx=Load()),
+                attr=stream_kind,
+                ctx=Load(),
+            ),
+            args=[Constant(value=method_path)],
+            keywords=[
+                keyword(arg='request_serializer', value=request_serializer),
+                keyword(arg='response_deserializer', value=response_deserializer),
+            ],
+        )
+
+    def _get_protobuf_class(self, class_name: str) -> ast.expr:
+        return Attribute(
+            value=Attribute(
+                value=Name(id='self', ctx=Load()),
+                attr='_protobuf',
+                ctx=Load(),
+            ),
+            attr=class_name,
+            ctx=Load(),
+        )
+
+    def _add_function_body_imports(self):
+        if not self._is_request_serialized() and not self._is_request_pooled():
+            self._add_source_package_import('dataclass_to_protobuf')
+        if not self._is_response_deserialized():
+            self._add_source_package_import('protobuf_to_dataclass')
+
+    def _add_source_package_import(self, name: str):
+        self._importer.add_import(
+            ImportFrom(module=SOURCE_PACKAGE_NAME, names=[alias(name=name)], level=0)
         )
 
     def _get_args(self, input_class: str) -> arguments:
         input_annotation = self._get_annotation(input_class, self._is_input_stream)
+        kwonlyargs = []
+        kw_defaults = []
+        if self._has_projection_argument():
+            kwonlyargs.append(
+                arg(arg='projection', annotation=self._get_projection_annotation())
+            )
+            kw_defaults.append(Constant(value=None))
         return arguments(
             posonlyargs=[],
             args=[
@@ -84,11 +261,28 @@ class BaseServiceMethodGenerator(abc.ABC):
                     annotation=input_annotation,
                 ),
             ],
-            kwonlyargs=[],
-            kw_defaults=[],
+            kwonlyargs=kwonlyargs,
+            kw_defaults=kw_defaults,
             defaults=[],
         )
 
+    def _get_projection_annotation(self) -> ast.expr:
+        self._importer.add_import(
+            ImportFrom(module='typing', names=[alias(name='Iterable')], level=0)
+        )
+        self._importer.add_import(
+            ImportFrom(module='typing', names=[alias(name='Optional')], level=0)
+        )
+        return Subscript(
+            value=Name(id='Optional', ctx=Load()),
+            slice=Subscript(
+                value=Name(id='Iterable', ctx=Load()),
+                slice=Name(id='str', ctx=Load()),
+                ctx=Load(),
+            ),
+            ctx=Load(),
+        )
+
     def _get_annotation(self, class_type: str, is_stream: bool) -> ast.expr:
         self._importer.import_dependency(class_type)
         if is_stream:
@@ -129,83 +323,219 @@ class ServiceMethodUnaryUnaryFunctionGenerator(BaseServiceMethodGenerator):
         method_name = method.name
         request_class_name = method.input_type.type
         response_class_name = method.output_type.type
-        body = [
-            Assign(
-                targets=[Name(id='protobuf_request', ctx=Store())],
-                value=Call(
-                    func=Name(id='dataclass_to_protobuf', ctx=Load()),
-                    args=[
-                        Name(id='request', ctx=Load()),
+        body = []
+        protobuf_request: ast.expr = self._get_request_value(request_class_name)
+        if not self._is_request_serialized():
+            body.append(
+                Assign(
+                    targets=[Name(id='protobuf_request', ctx=Store())],
+                    value=protobuf_request,
+                )
+            )
+            protobuf_request = Name(id='protobuf_request', ctx=Load())
+        call_statement: ast.stmt = Assign(
+            targets=[
+                Tuple(
+                    elts=[
+                        Name(id='response', ctx=Store()),
+                        Name(id='call', ctx=Store()),
+                    ],
+                    ctx=Store(),
+                )
+            ],
+            value=Call(
+                func=Attribute(
+                    value=Attribute(
+                        value=Attribute(
+                            value=Name(id='self', ctx=Load()),
+                            attr='_stub',
+                            ctx=Load(),
+                        ),
+                        attr=method_name,
+                        ctx=Load(),
+                    ),
+                    attr='with_call',
+                    ctx=Load(),
+                ),
+                args=[],
+                keywords=[
+                    keyword(
+                        arg='request',
+                        value=protobuf_request,
+                    ),
+                    keyword(
+                        arg='metadata',
+                        value=Attribute(
+                            value=Name(id='self', ctx=Load()),
+                            attr='_metadata',
+                            ctx=Load(),
+                        ),
+                    ),
+                ],
+            ),
+        )
+        if self._settings.request_hedging:
+            call_statement = self._get_hedged_call(
+                method_name, protobuf_request, call_statement
+            )
+        call_statements = [call_statement]
+        if self._settings.call_scheduling:
+            body.append(self._get_scheduler_call(method_name, 'acquire', []))
+            call_statements.append(
+                self._get_scheduler_call(
+                    method_name,
+                    'update_from_metadata',
+                    [
                         Call(
                             func=Attribute(
-                                value=Attribute(
-                                    value=Name(id='self', ctx=Load()),
-                                    attr='_protobuf',
-                                    ctx=Load(),
-                                ),
-                                attr=request_class_name,
+                                value=Name(id='call', ctx=Load()),
+                                attr='initial_metadata',
                                 ctx=Load(),
                             ),
                             args=[],
                             keywords=[],
-                        ),
+                        )
                     ],
-                    keywords=[],
+                )
+            )
+        body.extend(
+            [
+                *call_statements,
+                Return(value=self._get_converted_response(response_class_name)),
+            ]
+        )
+        return body
+
+    def _get_converted_response(self, response_class_name: str) -> ast.expr:
+        response_value = self._get_response_value(response_class_name)
+        if not self._settings.parallel_conversion or self._is_response_deserialized():
+            return response_value
+        return IfExp(
+            test=Compare(
+                left=Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_converter',
+                    ctx=Load(),
                 ),
+                ops=[Is()],
+                comparators=[Constant(value=None)],
             ),
-            Assign(
-                targets=[
-                    Tuple(
-                        elts=[
-                            Name(id='response', ctx=Store()),
-                            Name(id='call', ctx=Store()),
-                        ],
-                        ctx=Store(),
-                    )
-                ],
-                value=Call(
-                    func=Attribute(
-                        value=Attribute(
+            body=response_value,
+            orelse=Call(
+                func=Attribute(
+                    value=Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_converter',
+                        ctx=Load(),
+                    ),
+                    attr='convert',
+                    ctx=Load(),
+                ),
+                args=response_value.args,
+                keywords=response_value.keywords,
+            ),
+        )
+
+    def _get_scheduler_call(
+        self, method_name: str, attr: str, args: typing.List[ast.expr]
+    ) -> ast.stmt:
+        return If(
+            test=Compare(
+                left=Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_scheduler',
+                    ctx=Load(),
+                ),
+                ops=[IsNot()],
+                comparators=[Constant(value=None)],
+            ),
+            body=[
+                Expr(
+                    value=Call(
+                        func=Attribute(
                             value=Attribute(
                                 value=Name(id='self', ctx=Load()),
-                                attr='_stub',
+                                attr='_scheduler',
                                 ctx=Load(),
                             ),
-                            attr=method_name,
+                            attr=attr,
                             ctx=Load(),
                         ),
-                        attr='with_call',
-                        ctx=Load(),
-                    ),
-                    args=[],
-                    keywords=[
-                        keyword(
-                            arg='request',
-                            value=Name(id='protobuf_request', ctx=Load()),
-                        ),
-                        keyword(
-                            arg='metadata',
+                        args=[Constant(value=method_name), *args],
+                        keywords=[],
+                    )
+                )
+            ],
+            orelse=[],
+        )
+
+    def _get_hedged_call(
+        self,
+        method_name: str,
+        protobuf_request: ast.expr,
+        call_statement: ast.stmt,
+    ) -> ast.stmt:
+        args = [
+            Constant(value=method_name),
+            Attribute(
+                value=Name(id='self', ctx=Load()),
+                attr='_hedge_stubs',
+                ctx=Load(),
+            ),
+            protobuf_request,
+            Attribute(
+                value=Name(id='self', ctx=Load()),
+                attr='_metadata',
+                ctx=Load(),
+            ),
+        ]
+        if self._settings.call_scheduling:
+            # hedges take their own tokens from the scheduler
+            args.append(
+                Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_scheduler',
+                    ctx=Load(),
+                )
+            )
+        return If(
+            test=Compare(
+                left=Attribute(
+                    value=Name(id='self', ctx=Load()),
+                    attr='_hedger',
+                    ctx=Load(),
+                ),
+                ops=[Is()],
+                comparators=[Constant(value=None)],
+            ),
+            body=[call_statement],
+            orelse=[
+                Assign(
+                    targets=[
+                        Tuple(
+                            elts=[
+                                Name(id='response', ctx=Store()),
+                                Name(id='call', ctx=Store()),
+                            ],
+                            ctx=Store(),
+                        )
+                    ],
+                    value=Call(
+                        func=Attribute(
                             value=Attribute(
                                 value=Name(id='self', ctx=Load()),
-                                attr='_metadata',
+                                attr='_hedger',
                                 ctx=Load(),
                             ),
+                            attr='call',
+                            ctx=Load(),
                         ),
-                    ],
-                ),
-            ),
-            Return(
-                value=Call(
-                    func=Name(id='protobuf_to_dataclass', ctx=Load()),
-                    args=[
-                        Name(id='response', ctx=Load()),
-                        Name(id=response_class_name, ctx=Load()),
-                    ],
-                    keywords=[],
+                        args=args,
+                        keywords=[],
+                    ),
                 )
-            ),
-        ]
-        return body
+            ],
+        )
 
 
 class ServiceMethodUnaryStreamFunctionGenerator(BaseServiceMethodGenerator):
@@ -232,25 +562,7 @@ class ServiceMethodUnaryStreamFunctionGenerator(BaseServiceMethodGenerator):
                     keywords=[
                         keyword(
                             arg='request',
-                            value=Call(
-                                func=Name(id='dataclass_to_protobuf', ctx=Load()),
-                                args=[
-                                    Name(id='request', ctx=Load()),
-                                    Call(
-                                        func=Attribute(
-                                            value=Name(id='self', ctx=Load()),
-                                            attr=Attribute(
-                                                value=Name(id='_protobuf', ctx=Load()),
-                                                attr=request_class_name,
-                                                ctx=Load(),
-                                            ),
-                                        ),
-                                        args=[],
-                                        keywords=[],
-                                    ),
-                                ],
-                                keywords=[],
-                            ),
+                            value=self._get_request_value(request_class_name),
                         ),
                         keyword(
                             arg='metadata',
@@ -264,16 +576,7 @@ class ServiceMethodUnaryStreamFunctionGenerator(BaseServiceMethodGenerator):
                 ),
                 body=[
                     Expr(
-                        value=Yield(
-                            value=Call(
-                                func=Name(id='protobuf_to_dataclass', ctx=Load()),
-                                args=[
-                                    Name(id='response', ctx=Load()),
-                                    Name(id=response_class_name, ctx=Load()),
-                                ],
-                                keywords=[],
-                            )
-                        )
+                        value=Yield(value=self._get_response_value(response_class_name))
                     )
                 ],
                 orelse=[],
@@ -303,80 +606,81 @@ class ServiceMethodStreamStreamFunctionGenerator(BaseServiceMethodGenerator):
         method_name = method.name
         request_class_name = method.input_type.type
         response_class_name = method.output_type.type
-        body = [
-            For(
-                target=Name(id='response', ctx=Store()),
-                iter=Call(
-                    func=Attribute(
-                        value=Attribute(
-                            value=Name(id='self', ctx=Load()), attr='_stub', ctx=Load()
-                        ),
-                        attr=method_name,
+        call = Call(
+            func=Attribute(
+                value=Attribute(
+                    value=Name(id='self', ctx=Load()), attr='_stub', ctx=Load()
+                ),
+                attr=method_name,
+                ctx=Load(),
+            ),
+            args=[],
+            keywords=[
+                keyword(
+                    arg='request_iterator',
+                    value=self._get_request_iterator(request_class_name),
+                ),
+                keyword(
+                    arg='metadata',
+                    value=Attribute(
+                        value=Name(id='self', ctx=Load()),
+                        attr='_metadata',
                         ctx=Load(),
                     ),
-                    args=[],
-                    keywords=[
-                        keyword(
-                            arg='request_iterator',
-                            value=GeneratorExp(
-                                elt=Call(
-                                    func=Name(id='dataclass_to_protobuf', ctx=Load()),
-                                    args=[
-                                        Name(id='request', ctx=Load()),
-                                        Call(
-                                            func=Attribute(
-                                                value=Attribute(
-                                                    value=Name(id='self', ctx=Load()),
-                                                    attr='_protobuf',
-                                                    ctx=Load(),
-                                                ),
-                                                attr=request_class_name,
-                                                ctx=Load(),
-                                            ),
-                                            args=[],
-                                            keywords=[],
-                                        ),
-                                    ],
-                                    keywords=[],
-                                ),
-                                generators=[
-                                    comprehension(
-                                        target=Name(id='request', ctx=Store()),
-                                        iter=Name(id='requests', ctx=Load()),
-                                        ifs=[],
-                                        is_async=0,
-                                    )
-                                ],
-                            ),
-                        ),
-                        keyword(
-                            arg='metadata',
-                            value=Attribute(
-                                value=Name(id='self', ctx=Load()),
-                                attr='_metadata',
-                                ctx=Load(),
+                ),
+            ],
+        )
+        # long-lived streams only end when they are cancelled, so the call
+        # is returned instead of being hidden in a generator
+        if self._is_response_deserialized():
+            return [Return(value=call)]
+        self._add_source_package_import('ResponseStream')
+        return [
+            Return(
+                value=Call(
+                    func=Name(id='ResponseStream', ctx=Load()),
+                    args=[
+                        call,
+                        Lambda(
+                            args=arguments(
+                                posonlyargs=[],
+                                args=[arg(arg='response')],
+                                kwonlyargs=[],
+                                kw_defaults=[],
+                                defaults=[],
                             ),
+                            body=self._get_response_value(response_class_name),
                         ),
                     ],
-                ),
-                body=[
-                    Expr(
-                        value=Yield(
-                            value=Call(
-                                func=Name(id='protobuf_to_dataclass', ctx=Load()),
-                                args=[
-                                    Name(id='response', ctx=Load()),
-                                    Name(id=response_class_name, ctx=Load()),
-                                ],
-                                keywords=[],
-                            )
-                        )
-                    )
-                ],
-                orelse=[],
+                    keywords=[],
+                )
             )
         ]
-        return body
+
+    def _get_request_iterator(self, request_class_name: str) -> ast.expr:
+        if self._is_request_serialized():
+            return Name(id='requests', ctx=Load())
+        if self._is_request_pooled():
+            self._add_source_package_import('pooled_protobuf_requests')
+            return Call(
+                func=Name(id='pooled_protobuf_requests', ctx=Load()),
+                args=[
+                    Name(id='requests', ctx=Load()),
+                    self._get_protobuf_class(request_class_name),
+                ],
+                keywords=[],
+            )
+        return GeneratorExp(
+            elt=self._get_request_value(request_class_name),
+            generators=[
+                comprehension(
+                    target=Name(id='request', ctx=Store()),
+                    iter=Name(id='requests', ctx=Load()),
+                    ifs=[],
+                    is_async=0,
+                )
+            ],
+        )
 
 
 class ServiceMethodGenerator:
@@ -410,3 +714,15 @@ class ServiceMethodGenerator:
         )
 
         return method_generator.create(method)
+
+    def get_multicallable(
+        self, method: Method, method_path: str
+    ) -> typing.Optional[ast.expr]:
+        is_input_stream = method.input_type.stream
+        is_output_stream = method.output_type.stream
+
+        method_generator = self._method_generators[(is_input_stream, is_output_stream)](
+            self._importer, self._settings, self._string_case_converter
+        )
+
+        return method_generator.get_multicallable(method, method_path)
@@ -0,0 +1,36 @@
+import abc
+import ast
+from ast import Module
+
+import astor
+
+from iprotopy.package_generator_settings import RenderBackend
+
+
+class BaseSourceRenderer(abc.ABC):
+    @abc.abstractmethod
+    def render(self, module: Module) -> str:
+        pass
+
+
+class AstorSourceRenderer(BaseSourceRenderer):
+    def render(self, module: Module) -> str:
+        return astor.to_source(module)
+
+
+class UnparseSourceRenderer(BaseSourceRenderer):
+    def render(self, module: Module) -> str:
+        # unparse reads line numbers to look up type comments
+        return ast.unparse(ast.fix_missing_locations(module)) + '\n'
+
+
+def get_source_renderer(backend: RenderBackend) -> BaseSourceRenderer:
+    if backend == RenderBackend.ASTOR:
+        return AstorSourceRenderer()
+    elif backend == RenderBackend.UNPARSE:
+        if not hasattr(ast, 'unparse'):
+            # ast.unparse is available since python 3.9
+            return AstorSourceRenderer()
+        return UnparseSourceRenderer()
+    else:
+        raise ValueError(f'Unknown render backend: {backend}')
@@ -0,0 +1,62 @@
+import hashlib
+import logging
+import py_compile
+from ast import Module
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from iprotopy.source_renderer import BaseSourceRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class SourceWriter:
+    def __init__(
+        self,
+        renderer: BaseSourceRenderer,
+        compile_bytecode: bool = False,
+        compile_workers: Optional[int] = None,
+    ):
+        self._renderer = renderer
+        self._compile_bytecode = compile_bytecode
+        self._compile_workers = compile_workers
+        self._written: List[Path] = []
+        # digests rather than sources, so memory does not grow with the tree
+        self._digests: Dict[Path, bytes] = {}
+
+    def write(self, module: Module, filepath: Path):
+        result_src = self._renderer.render(module)
+        digest = hashlib.blake2b(result_src.encode(), digest_size=16).digest()
+        if self._digests.get(filepath) == digest:
+            # unchanged since the previous generation with this writer
+            return
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'w') as f:
+            f.write(result_src)
+        self._digests[filepath] = digest
+        if self._compile_bytecode:
+            # a writer kept by the watcher lives as long as the process
+            self._written.append(filepath)
+
+    def remove(self, filepath: Path):
+        self._digests.pop(filepath, None)
+        filepath.unlink(missing_ok=True)
+
+    def compile(self):
+        if not self._compile_bytecode:
+            return
+        files = [str(filepath) for filepath in self._written]
+        logger.debug('Compiling %s generated files', len(files))
+        if self._compile_workers is not None and self._compile_workers > 1:
+            with ProcessPoolExecutor(max_workers=self._compile_workers) as executor:
+                list(executor.map(_compile_file, files))
+        else:
+            for file in files:
+                _compile_file(file)
+        self._written.clear()
+
+
+def _compile_file(file: str) -> str:
+    # pyc goes to the default __pycache__ location so the import system picks it up
+    return py_compile.compile(file, doraise=True)
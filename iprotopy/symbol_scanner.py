@@ -0,0 +1,17 @@
+import re
+from pathlib import Path
+from typing import List
+
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'')
+_DECLARATION = re.compile(r'\b(?:message|enum|service)\s+([A-Za-z_]\w*)\s*\{')
+
+
+class SymbolScanner:
+    # finds the names of the classes a proto file generates without parsing it
+    def scan(self, proto_file: Path) -> List[str]:
+        with open(proto_file) as f:
+            text = f.read()
+        text = _COMMENT.sub(' ', text)
+        text = _STRING.sub('""', text)
+        return _DECLARATION.findall(text)
@@ -0,0 +1,82 @@
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from iprotopy.caching_parser import CachingParser
+from iprotopy.package_generator import PackageGenerator
+from iprotopy.package_generator_settings import PackageGeneratorSettings
+
+logger = logging.getLogger(__name__)
+
+FileState = Tuple[int, int]
+
+
+class ProtoWatcher:
+    def __init__(
+        self,
+        proto_dir: Path,
+        out_dir: Path,
+        settings: Optional[PackageGeneratorSettings] = None,
+        interval: float = 0.2,
+    ):
+        self._proto_dir = proto_dir
+        self._out_dir = out_dir
+        self._interval = interval
+        self._generator = PackageGenerator(settings, CachingParser())
+        self._files: Dict[Path, FileState] = {}
+        # files of a failed generation are regenerated with the next change
+        self._failed: Set[Path] = set()
+
+    def run(self):
+        logger.info('Watching %s', self._proto_dir)
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Generation failed, waiting for changes')
+            time.sleep(self._interval)
+
+    def poll(self) -> bool:
+        files = self._scan()
+        changed = {
+            proto_file
+            for proto_file, state in files.items()
+            if self._files.get(proto_file) != state
+        }
+        removed = self._files.keys() - files.keys()
+        if not changed and not removed:
+            return False
+
+        is_first_generation = not self._files
+        self._files = files
+        if removed:
+            self._generator.remove_sources(self._proto_dir, self._out_dir, removed)
+        if not files:
+            return True
+
+        changed |= self._failed
+        self._failed = changed
+        start = time.perf_counter()
+        self._generator.generate_sources(
+            self._proto_dir,
+            self._out_dir,
+            None if is_first_generation else changed,
+        )
+        self._failed = set()
+        logger.info(
+            'Regenerated %s changed proto files in %.3fs',
+            len(changed),
+            time.perf_counter() - start,
+        )
+        return True
+
+    def _scan(self) -> Dict[Path, FileState]:
+        files = {}
+        for proto_file in self._proto_dir.rglob('*.proto'):
+            try:
+                stat = proto_file.stat()
+            except FileNotFoundError:
+                continue
+            files[proto_file] = (stat.st_mtime_ns, stat.st_size)
+        return files
@@ -0,0 +1,418 @@
+import dataclasses
+import struct
+from array import array
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+
+from iprotopy.convertion import (
+    PRIMITIVE_TYPES,
+    NoneType,
+    UnknownType,
+    to_unsafe_field_name,
+)
+from iprotopy.enums import IntEnumConstants
+from iprotopy.interning import default_intern_table
+
+T = TypeVar('T')
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+_WIRE_START_GROUP = 3
+_WIRE_END_GROUP = 4
+_WIRE_FIXED32 = 5
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DOUBLE = struct.Struct('<d')
+_FLOAT = struct.Struct('<f')
+_INT64 = struct.Struct('<q')
+_UINT64 = struct.Struct('<Q')
+_INT32 = struct.Struct('<i')
+_UINT32 = struct.Struct('<I')
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_field(data: bytes, pos: int, wire_type: int) -> int:
+    if wire_type == _WIRE_VARINT:
+        return _read_varint(data, pos)[1]
+    elif wire_type == _WIRE_FIXED64:
+        return pos + 8
+    elif wire_type == _WIRE_LENGTH_DELIMITED:
+        length, pos = _read_varint(data, pos)
+        return pos + length
+    elif wire_type == _WIRE_FIXED32:
+        return pos + 4
+    elif wire_type == _WIRE_START_GROUP:
+        while True:
+            tag, pos = _read_varint(data, pos)
+            if tag & 7 == _WIRE_END_GROUP:
+                return pos
+            pos = _skip_field(data, pos, tag & 7)
+    raise ValueError(f'Unknown wire type {wire_type}')
+
+
+def _signed64(value: int) -> int:
+    if value >= 1 << 63:
+        return value - (1 << 64)
+    return value
+
+
+def _zigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+_VARINT_CONVERTERS: Dict[int, Callable[[int], Any]] = {
+    FieldDescriptor.TYPE_INT32: _signed64,
+    FieldDescriptor.TYPE_INT64: _signed64,
+    FieldDescriptor.TYPE_ENUM: _signed64,
+    FieldDescriptor.TYPE_UINT32: int,
+    FieldDescriptor.TYPE_UINT64: int,
+    FieldDescriptor.TYPE_SINT32: _zigzag,
+    FieldDescriptor.TYPE_SINT64: _zigzag,
+    FieldDescriptor.TYPE_BOOL: bool,
+}
+
+_FIXED_STRUCTS: Dict[int, struct.Struct] = {
+    FieldDescriptor.TYPE_DOUBLE: _DOUBLE,
+    FieldDescriptor.TYPE_FLOAT: _FLOAT,
+    FieldDescriptor.TYPE_FIXED64: _UINT64,
+    FieldDescriptor.TYPE_SFIXED64: _INT64,
+    FieldDescriptor.TYPE_FIXED32: _UINT32,
+    FieldDescriptor.TYPE_SFIXED32: _INT32,
+}
+
+_SCALAR_DEFAULTS: Dict[int, Any] = {
+    FieldDescriptor.TYPE_STRING: '',
+    FieldDescriptor.TYPE_BYTES: b'',
+    FieldDescriptor.TYPE_BOOL: False,
+    FieldDescriptor.TYPE_DOUBLE: 0.0,
+    FieldDescriptor.TYPE_FLOAT: 0.0,
+}
+
+
+def _decode_timestamp(data: bytes) -> datetime:
+    seconds = 0
+    nanos = 0
+    pos = 0
+    end = len(data)
+    while pos < end:
+        tag, pos = _read_varint(data, pos)
+        if tag == 0x08:
+            value, pos = _read_varint(data, pos)
+            seconds = _signed64(value)
+        elif tag == 0x10:
+            value, pos = _read_varint(data, pos)
+            nanos = _signed64(value)
+        else:
+            pos = _skip_field(data, pos, tag & 7)
+    # same arithmetic as convertion.ts_to_datetime
+    return _EPOCH + timedelta(seconds=seconds + (nanos / 1e9))
+
+
+@dataclasses.dataclass
+class _FieldPlan:
+    name: str
+    descriptor: FieldDescriptor
+    repeated: bool
+    optional: bool
+    oneof_members: Tuple[str, ...]
+    # bytes of a length delimited message payload to the field value
+    decode_message: Optional[Callable[[bytes], Any]] = None
+    # raw scalar to the field value
+    convert: Optional[Callable[[Any], Any]] = None
+    # list of repeated values to the field value
+    collect: Optional[Callable[[List[Any]], Any]] = None
+    # oneof members are None unless they are the member that is set
+    in_oneof: bool = False
+
+
+class MessageDecoder:
+    def __init__(self, descriptor: Descriptor, dataclass_type: Type[Any]):
+        self._descriptor = descriptor
+        self._dataclass_type = dataclass_type
+        self._fields: Optional[Dict[int, _FieldPlan]] = None
+
+    def decode(self, data: bytes) -> Any:
+        fields = self._fields
+        if fields is None:
+            fields = self._fields = self._create_plan()
+        values: Dict[str, Any] = {}
+        pos = 0
+        end = len(data)
+        while pos < end:
+            tag, pos = _read_varint(data, pos)
+            wire_type = tag & 7
+            plan = fields.get(tag >> 3)
+            if plan is None:
+                pos = _skip_field(data, pos, wire_type)
+                continue
+            pos = self._decode_field(data, pos, wire_type, plan, values)
+            for member in plan.oneof_members:
+                # setting one member of a oneof clears the others
+                values.pop(member, None)
+        return self._create_instance(values)
+
+    def _decode_field(
+        self,
+        data: bytes,
+        pos: int,
+        wire_type: int,
+        plan: _FieldPlan,
+        values: Dict[str, Any],
+    ) -> int:
+        field_type = plan.descriptor.type
+        if wire_type == _WIRE_LENGTH_DELIMITED:
+            length, pos = _read_varint(data, pos)
+            payload = data[pos : pos + length]
+            pos += length
+            if field_type == FieldDescriptor.TYPE_MESSAGE:
+                if plan.repeated:
+                    values.setdefault(plan.name, []).append(payload)
+                else:
+                    # repeated occurrences of a message field are merged
+                    values[plan.name] = values.get(plan.name, b'') + payload
+                return pos
+            elif field_type == FieldDescriptor.TYPE_STRING:
+                value = payload.decode('utf-8')
+            elif field_type == FieldDescriptor.TYPE_BYTES:
+                value = payload
+            else:
+                # packed repeated scalars
+                items = values.setdefault(plan.name, [])
+                items.extend(self._decode_packed(payload, plan))
+                return pos
+        elif wire_type == _WIRE_VARINT:
+            value, pos = _read_varint(data, pos)
+            value = _VARINT_CONVERTERS[field_type](value)
+        elif wire_type == _WIRE_FIXED64 or wire_type == _WIRE_FIXED32:
+            fixed_struct = _FIXED_STRUCTS[field_type]
+            (value,) = fixed_struct.unpack_from(data, pos)
+            pos += fixed_struct.size
+        else:
+            return _skip_field(data, pos, wire_type)
+
+        if plan.repeated:
+            values.setdefault(plan.name, []).append(value)
+        else:
+            values[plan.name] = value
+        return pos
+
+    def _decode_packed(self, payload: bytes, plan: _FieldPlan) -> List[Any]:
+        field_type = plan.descriptor.type
+        fixed_struct = _FIXED_STRUCTS.get(field_type)
+        if fixed_struct is not None:
+            count = len(payload) // fixed_struct.size
+            return list(struct.unpack(f'<{count}{fixed_struct.format[-1]}', payload))
+        convert = _VARINT_CONVERTERS[field_type]
+        items = []
+        pos = 0
+        end = len(payload)
+        while pos < end:
+            value, pos = _read_varint(payload, pos)
+            items.append(convert(value))
+        return items
+
+    def _create_instance(self, values: Dict[str, Any]) -> Any:
+        kwargs = {}
+        for plan in self._fields.values():
+            value = values.get(plan.name, _MISSING)
+            if value is _MISSING and plan.in_oneof:
+                value = None
+            elif plan.repeated:
+                if value is _MISSING:
+                    value = []
+                elif plan.decode_message is not None:
+                    value = [plan.decode_message(item) for item in value]
+                elif plan.convert is not None:
+                    value = [plan.convert(item) for item in value]
+                if plan.collect is not None:
+                    value = plan.collect(value)
+            elif plan.decode_message is not None:
+                if value is _MISSING:
+                    value = b''
+                if plan.optional and not value:
+                    value = None
+                else:
+                    value = plan.decode_message(value)
+            else:
+                if value is _MISSING:
+                    value = self._get_default(plan)
+                if plan.optional and value == '':
+                    value = None
+                elif plan.convert is not None:
+                    value = plan.convert(value)
+            kwargs[plan.name] = value
+        return self._dataclass_type(**kwargs)
+
+    def _get_default(self, plan: _FieldPlan) -> Any:
+        return _SCALAR_DEFAULTS.get(plan.descriptor.type, 0)
+
+    def _create_plan(self) -> Dict[int, _FieldPlan]:
+        fields = {}
+        hints = get_type_hints(self._dataclass_type)
+        interned_fields = frozenset(getattr(self._dataclass_type, '__interned__', ()))
+        array_fields = getattr(self._dataclass_type, '__arrays__', {})
+        for field_name, field_type in hints.items():
+            field_descriptor = self._descriptor.fields_by_name[
+                to_unsafe_field_name(field_name)
+            ]
+            if field_name in array_fields:
+                plan = self._create_array_plan(
+                    field_name, field_type, field_descriptor, array_fields[field_name]
+                )
+            else:
+                plan = self._create_field_plan(
+                    field_name, field_type, field_descriptor, interned_fields
+                )
+            fields[field_descriptor.number] = plan
+        one_of_members = {
+            member
+            for members in getattr(self._dataclass_type, '__oneofs__', {}).values()
+            for member in members
+        }
+        for plan in fields.values():
+            if plan.name in one_of_members:
+                # a member that is set keeps its value even when it is empty
+                plan.in_oneof = True
+                plan.optional = False
+        names_by_field = {plan.descriptor.name: plan.name for plan in fields.values()}
+        for plan in fields.values():
+            oneof = plan.descriptor.containing_oneof
+            if oneof is None:
+                continue
+            plan.oneof_members = tuple(
+                names_by_field[member.name]
+                for member in oneof.fields
+                if member.name != plan.descriptor.name and member.name in names_by_field
+            )
+        return fields
+
+    def _create_array_plan(
+        self,
+        field_name: str,
+        field_type: Any,
+        field_descriptor: FieldDescriptor,
+        typecode: str,
+    ) -> _FieldPlan:
+        plan = _FieldPlan(
+            name=field_name,
+            descriptor=field_descriptor,
+            repeated=True,
+            optional=False,
+            oneof_members=(),
+        )
+        if field_type is array:
+            plan.collect = partial(array, typecode)
+        else:
+            # only reachable when the generated module imported numpy
+            import numpy
+
+            plan.collect = partial(numpy.array, dtype=typecode)
+        return plan
+
+    def _create_field_plan(
+        self,
+        field_name: str,
+        field_type: Any,
+        field_descriptor: FieldDescriptor,
+        interned_fields: FrozenSet[str],
+    ) -> _FieldPlan:
+        origin = get_origin(field_type)
+        optional = False
+        repeated = False
+        if origin is list:
+            (field_type,) = get_args(field_type)
+            repeated = True
+        elif origin is Union:
+            args = get_args(field_type)
+            if len(args) > 2 or args[1] is not NoneType:
+                raise UnknownType(f'type "{field_type}" unknown')
+            field_type = args[0]
+            optional = True
+        plan = _FieldPlan(
+            name=field_name,
+            descriptor=field_descriptor,
+            repeated=repeated,
+            optional=optional,
+            oneof_members=(),
+        )
+        if field_descriptor.type == FieldDescriptor.TYPE_MESSAGE:
+            if isinstance(field_type, type) and issubclass(field_type, datetime):
+                plan.decode_message = _decode_timestamp
+            elif dataclasses.is_dataclass(field_type):
+                plan.decode_message = get_message_decoder(
+                    field_descriptor.message_type, field_type
+                ).decode
+            else:
+                raise UnknownType(f'type "{field_type}" unknown')
+        elif isinstance(field_type, type) and issubclass(field_type, Enum):
+            plan.convert = field_type
+        elif isinstance(field_type, type) and issubclass(field_type, IntEnumConstants):
+            # constants are plain ints, the decoded value is used as is
+            pass
+        elif field_type not in PRIMITIVE_TYPES and field_type is not bytes:
+            raise UnknownType(f'type "{field_type}" unknown')
+        elif field_type is str and field_name in interned_fields:
+            plan.convert = default_intern_table.intern
+        return plan
+
+
+_MISSING: Any = object()
+_decoders: Dict[Tuple[str, Type[Any]], MessageDecoder] = {}
+
+
+def get_message_decoder(
+    descriptor: Descriptor, dataclass_type: Type[Any]
+) -> MessageDecoder:
+    key = (descriptor.full_name, dataclass_type)
+    decoder = _decoders.get(key)
+    if decoder is None:
+        # the plan is built on first decode, so recursive messages work
+        decoder = _decoders[key] = MessageDecoder(descriptor, dataclass_type)
+    return decoder
+
+
+@lru_cache(maxsize=None)
+def wire_deserializer(
+    protobuf_type: Type[Any], dataclass_type: Type[T]
+) -> Callable[[bytes], T]:
+    return get_message_decoder(protobuf_type.DESCRIPTOR, dataclass_type).decode
+
+
+def bytes_to_dataclass(
+    data: bytes, protobuf_type: Type[Any], dataclass_type: Type[T]
+) -> T:
+    return wire_deserializer(protobuf_type, dataclass_type)(data)
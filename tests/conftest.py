@@ -0,0 +1,141 @@
+import importlib
+import sys
+from concurrent import futures
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Set
+
+import grpc
+import pytest
+
+from iprotopy import PackageGenerator
+from iprotopy.package_generator_settings import (
+    GeneratorFrontend,
+    PackageGeneratorSettings,
+)
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+def _get_module_names(out_dir: Path) -> Set[str]:
+    return {
+        path.stem
+        for path in out_dir.iterdir()
+        if path.name not in ('__init__.py', '__pycache__')
+    }
+
+
+def _pop_modules(names: Set[str]) -> Dict[str, object]:
+    return {
+        name: sys.modules.pop(name)
+        for name in list(sys.modules)
+        if name.split('.')[0] in names
+    }
+
+
+@contextmanager
+def _use_package(out_dir: Path) -> Iterator[None]:
+    # every generated package has the same top level modules (demo and
+    # base_service), so the ones imported before are set aside meanwhile.
+    # Forward references are resolved through sys.modules, so anything
+    # imported here has to be used before the context exits
+    names = _get_module_names(out_dir)
+    saved = _pop_modules(names)
+    sys.path.insert(0, str(out_dir))
+    importlib.invalidate_caches()
+    try:
+        yield
+    finally:
+        sys.path.remove(str(out_dir))
+        _pop_modules(names)
+        sys.modules.update(saved)
+
+
+@pytest.fixture(scope='session')
+def use_package():
+    return _use_package
+
+
+@pytest.fixture(scope='session')
+def generate_package(tmp_path_factory):
+    def generate(**settings) -> Path:
+        out_dir = tmp_path_factory.mktemp('generated')
+        PackageGenerator(PackageGeneratorSettings(**settings)).generate_sources(
+            PROTO_DIR, out_dir
+        )
+        return out_dir
+
+    return generate
+
+
+@pytest.fixture(
+    scope='session',
+    params=list(GeneratorFrontend),
+    ids=[frontend.value.lower() for frontend in GeneratorFrontend],
+)
+def generated_package(request, generate_package):
+    out_dir = generate_package(frontend=request.param)
+    with _use_package(out_dir):
+        yield out_dir
+
+
+@pytest.fixture(scope='module')
+def marketdata(generated_package):
+    return importlib.import_module('demo.marketdata')
+
+
+@pytest.fixture(scope='module')
+def marketdata_pb2(generated_package):
+    return importlib.import_module('demo.marketdata_pb2')
+
+
+@pytest.fixture(scope='module')
+def marketdata_pb2_grpc(generated_package):
+    return importlib.import_module('demo.marketdata_pb2_grpc')
+
+
+@pytest.fixture(scope='module')
+def common(generated_package):
+    return importlib.import_module('demo.common')
+
+
+@pytest.fixture(scope='module')
+def common_pb2(generated_package):
+    return importlib.import_module('demo.common_pb2')
+
+
+@pytest.fixture(scope='module')
+def variants(generated_package):
+    return importlib.import_module('demo.variants')
+
+
+@pytest.fixture(scope='module')
+def variants_pb2(generated_package):
+    return importlib.import_module('demo.variants_pb2')
+
+
+@pytest.fixture()
+def serve():
+    # starts an in process server with the given method handlers of a service
+    # and returns a channel connected to it
+    servers: List[grpc.Server] = []
+    channels: List[grpc.Channel] = []
+
+    def serve_handlers(
+        service_name: str, handlers: Dict[str, grpc.RpcMethodHandler]
+    ) -> grpc.Channel:
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        server.add_generic_rpc_handlers(
+            (grpc.method_handlers_generic_handler(service_name, handlers),)
+        )
+        port = server.add_insecure_port('localhost:0')
+        server.start()
+        servers.append(server)
+        channels.append(grpc.insecure_channel(f'localhost:{port}'))
+        return channels[-1]
+
+    yield serve_handlers
+    for channel in channels:
+        channel.close()
+    for server in servers:
+        server.stop(None)
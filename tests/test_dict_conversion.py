@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from iprotopy import protobuf_to_dict
+
+
+def test_nested_message(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1, 2], prices=[0.5])
+    candle = pb_message.candles.add(volume=5, is_complete=True, status=1)
+    candle.open.currency = 'usd'
+    candle.time.seconds = 1700000000
+    candle.inner.value = 1.5
+
+    result = protobuf_to_dict(pb_message, marketdata.GetCandlesResponse)
+
+    assert result == {
+        'candles': [
+            {
+                'open': {'currency': 'usd', 'units': 0, 'nano': 0},
+                'close': {'currency': '', 'units': 0, 'nano': 0},
+                'volume': 5,
+                'time': '2023-11-14T22:13:20+00:00',
+                'is_complete': True,
+                'status': marketdata.SecurityTradingStatus(1).name,
+                'inner': {'value': 1.5},
+            }
+        ],
+        'volumes': [1, 2],
+        'prices': [0.5],
+    }
+    json.dumps(result)
+
+
+def test_keyword_and_optional_fields(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesRequest(instrument_id='uid')
+
+    result = protobuf_to_dict(pb_message, marketdata.GetCandlesRequest)
+
+    assert result == {
+        'instrument_id': 'uid',
+        'from_': '1970-01-01T00:00:00+00:00',
+        'to': '1970-01-01T00:00:00+00:00',
+        'limit': 0,
+    }
+
+
+def test_empty_optional_message(marketdata, marketdata_pb2):
+    result = protobuf_to_dict(
+        marketdata_pb2.MarketDataResponse(), marketdata.MarketDataResponse
+    )
+
+    assert result == {'last_price': None, 'ping': None, 'candle': None}
+
+
+@pytest.mark.parametrize(
+    'kwargs, expected',
+    [
+        ({'num': 0}, {'num': 0}),
+        ({'text': ''}, {'text': ''}),
+        ({'sub': {}}, {'sub': {'value': 0}}),
+        ({'color': 0}, {'color': 'COLOR_UNSPECIFIED'}),
+        ({'text': 'hi'}, {'text': 'hi'}),
+    ],
+)
+def test_oneof_members(variants, variants_pb2, kwargs, expected):
+    result = protobuf_to_dict(variants_pb2.Variant(**kwargs), variants.Variant)
+
+    assert result == {
+        'num': None,
+        'text': None,
+        'sub': None,
+        'color': None,
+        **expected,
+    }
+
+
+def test_empty_message_member(marketdata, marketdata_pb2):
+    result = protobuf_to_dict(
+        marketdata_pb2.MarketDataResponse(ping={}), marketdata.MarketDataResponse
+    )
+
+    assert result == {
+        'last_price': None,
+        'ping': {'time': '1970-01-01T00:00:00+00:00'},
+        'candle': None,
+    }
@@ -0,0 +1,84 @@
+import importlib
+from enum import IntEnum
+
+import pytest
+
+from iprotopy import (
+    IntEnumConstants,
+    dataclass_to_protobuf,
+    protobuf_to_dataclass,
+    protobuf_to_dict,
+)
+from iprotopy.package_generator_settings import EnumRepresentation
+from iprotopy.wire_decoding import bytes_to_dataclass
+
+
+@pytest.fixture(scope='module')
+def constants_package_dir(generate_package):
+    return generate_package(enum_representation=EnumRepresentation.INT_CONSTANTS)
+
+
+@pytest.fixture()
+def constants_modules(constants_package_dir, use_package):
+    with use_package(constants_package_dir):
+        yield (
+            importlib.import_module('demo.common'),
+            importlib.import_module('demo.marketdata'),
+            importlib.import_module('demo.marketdata_pb2'),
+        )
+
+
+def test_generated_constants(constants_package_dir):
+    source = (constants_package_dir / 'demo' / 'common.py').read_text()
+
+    assert 'from iprotopy import IntEnumConstants' in source
+    assert 'class SecurityTradingStatus(IntEnumConstants):' in source
+    assert 'IntEnum' not in source.replace('IntEnumConstants', '')
+
+
+def test_lazy_enum(constants_modules):
+    common, _, _ = constants_modules
+    status_type = common.SecurityTradingStatus
+
+    enum_type = status_type._as_enum()
+
+    assert issubclass(status_type, IntEnumConstants)
+    assert type(status_type.SECURITY_TRADING_STATUS_NORMAL) is int
+    assert issubclass(enum_type, IntEnum)
+    assert status_type._as_enum() is enum_type
+    assert enum_type(1).name == 'SECURITY_TRADING_STATUS_NORMAL'
+    assert status_type._get_name(0) == 'SECURITY_TRADING_STATUS_UNSPECIFIED'
+
+
+def test_constants_named_like_methods():
+    class Action(IntEnumConstants):
+        as_enum = 0
+        get_name = 1
+
+    assert Action._get_name(1) == 'get_name'
+    assert Action._as_enum().as_enum == 0
+
+
+def test_converters(constants_modules):
+    common, marketdata, marketdata_pb2 = constants_modules
+    pb_message = marketdata_pb2.Candle(volume=3, status=1)
+    pb_message.open.units = 1
+    pb_message.close.units = 2
+    pb_message.time.seconds = 100
+    pb_message.inner.value = 0.5
+
+    result = protobuf_to_dataclass(pb_message, marketdata.Candle)
+
+    assert result.status == common.SecurityTradingStatus.SECURITY_TRADING_STATUS_NORMAL
+    assert type(result.status) is int
+    assert (
+        bytes_to_dataclass(
+            pb_message.SerializeToString(), marketdata_pb2.Candle, marketdata.Candle
+        )
+        == result
+    )
+    assert (
+        protobuf_to_dict(pb_message, marketdata.Candle)['status']
+        == 'SECURITY_TRADING_STATUS_NORMAL'
+    )
+    assert dataclass_to_protobuf(result, marketdata_pb2.Candle()) == pb_message
@@ -0,0 +1,63 @@
+import dataclasses
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from iprotopy import PackageGenerator, dataclass_to_protobuf, protobuf_to_dataclass
+from iprotopy.package_generator_settings import PackageGeneratorSettings
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+@pytest.fixture(scope='module')
+def expanded_common(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp('expanded')
+    settings = PackageGeneratorSettings(expanded_dataclasses=True)
+    PackageGenerator(settings).generate_sources(PROTO_DIR, out_dir)
+    spec = importlib.util.spec_from_file_location(
+        'expanded_common', out_dir / 'demo' / 'common.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_no_decorator(expanded_common):
+    source = Path(expanded_common.__file__).read_text()
+
+    assert '@dataclass' not in source
+    assert '__dataclass_fields__ = LazyDataclassFields()' in source
+
+
+def test_matches_dataclass(common, expanded_common):
+    for name in ('MoneyValue', 'Ping'):
+        expected = getattr(common, name)
+        expanded = getattr(expanded_common, name)
+
+        assert dataclasses.is_dataclass(expanded)
+        assert [field.name for field in dataclasses.fields(expanded)] == [
+            field.name for field in dataclasses.fields(expected)
+        ]
+        assert expanded.__match_args__ == expected.__match_args__
+        assert expanded.__hash__ is None
+
+
+def test_methods(common, expanded_common):
+    value = expanded_common.MoneyValue(currency='usd', units=1, nano=5)
+
+    assert repr(value) == repr(common.MoneyValue(currency='usd', units=1, nano=5))
+    assert value == expanded_common.MoneyValue('usd', 1, 5)
+    assert value != expanded_common.MoneyValue('usd', 1, 6)
+    assert value != common.MoneyValue('usd', 1, 5)
+    assert dataclasses.asdict(value) == {'currency': 'usd', 'units': 1, 'nano': 5}
+    assert dataclasses.replace(value, units=2).units == 2
+
+
+def test_converters(expanded_common, common_pb2):
+    pb_message = common_pb2.MoneyValue(currency='usd', units=3, nano=7)
+
+    result = protobuf_to_dataclass(pb_message, expanded_common.MoneyValue)
+
+    assert result == expanded_common.MoneyValue('usd', 3, 7)
+    assert dataclass_to_protobuf(result, common_pb2.MoneyValue()) == pb_message
@@ -0,0 +1,92 @@
+import multiprocessing
+
+import pytest
+
+from iprotopy import FanOutPublisher, FanOutSubscriber, protobuf_to_dataclass
+
+
+@pytest.fixture()
+def publisher():
+    publisher = FanOutPublisher(capacity=1024, max_readers=2, check_interval=1)
+    yield publisher
+    publisher.close()
+
+
+def _last_price(marketdata_pb2, i):
+    return marketdata_pb2.LastPrice(figi=f'figi{i}', instrument_uid='x' * 50)
+
+
+@pytest.mark.parametrize('wire_decoding', [False, True])
+def test_messages_wrap_around(publisher, marketdata, marketdata_pb2, wire_decoding):
+    subscriber = FanOutSubscriber(
+        publisher.name,
+        0,
+        marketdata_pb2.LastPrice,
+        marketdata.LastPrice,
+        wire_decoding=wire_decoding,
+    )
+    for i in range(100):
+        pb_message = _last_price(marketdata_pb2, i)
+        publisher.record(pb_message.SerializeToString())
+        assert subscriber.read(timeout=0) == protobuf_to_dataclass(
+            pb_message, marketdata.LastPrice
+        )
+    assert subscriber.read(timeout=0) is None
+    assert subscriber.lost == 0
+    subscriber.close()
+
+
+def test_slow_reader(publisher, marketdata, marketdata_pb2):
+    slow = FanOutSubscriber(
+        publisher.name, 0, marketdata_pb2.LastPrice, marketdata.LastPrice
+    )
+    fast = FanOutSubscriber(
+        publisher.name, 1, marketdata_pb2.LastPrice, marketdata.LastPrice
+    )
+    for i in range(8):
+        publisher.record(_last_price(marketdata_pb2, i).SerializeToString())
+        fast.read(timeout=0)
+    assert publisher.slow_readers == [0]
+
+    for i in range(8, 30):
+        publisher.record(_last_price(marketdata_pb2, i).SerializeToString())
+        fast.read(timeout=0)
+    assert slow.read(timeout=0) is None
+    assert slow.lost == 30
+    publisher.record(_last_price(marketdata_pb2, 30).SerializeToString())
+    assert slow.read(timeout=0).figi == 'figi30'
+    assert fast.lost == 0
+    slow.close()
+    fast.close()
+
+
+def _consume(name, generated_package, results):
+    import sys
+
+    sys.path.insert(0, str(generated_package))
+    from demo import marketdata, marketdata_pb2
+
+    with FanOutSubscriber(
+        name, 0, marketdata_pb2.LastPrice, marketdata.LastPrice
+    ) as subscriber:
+        results.put('ready')
+        results.put([message.figi for message in subscriber])
+
+
+def test_subscriber_process(generated_package, marketdata_pb2):
+    publisher = FanOutPublisher(capacity=1024 * 1024)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(
+        target=_consume, args=(publisher.name, generated_package, results)
+    )
+    process.start()
+    assert results.get(timeout=30) == 'ready'
+    for i in range(200):
+        publisher.record(_last_price(marketdata_pb2, i).SerializeToString())
+    publisher.close()
+
+    figis = results.get(timeout=30)
+    process.join(timeout=30)
+    assert figis[-1] == 'figi199'
+    assert len(figis) == 200
@@ -0,0 +1,78 @@
+import ast
+import importlib
+
+import pytest
+
+from iprotopy.package_generator_settings import GeneratorFrontend
+
+
+def _get_class_names(path):
+    module = ast.parse(path.read_text())
+    return {node.name for node in module.body if isinstance(node, ast.ClassDef)}
+
+
+def _get_imported_names(path):
+    module = ast.parse(path.read_text())
+    return {
+        alias.asname or alias.name
+        for node in module.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        for alias in node.names
+    }
+
+
+@pytest.mark.parametrize('frontend', list(GeneratorFrontend))
+@pytest.mark.parametrize(
+    'root',
+    [
+        'MarketDataService',
+        'demo.MarketDataService',
+        'demo.marketdata.MarketDataService',
+    ],
+)
+def test_emitted_classes(generate_package, use_package, frontend, root):
+    out_dir = generate_package(generation_roots=[root], frontend=frontend)
+
+    assert {path.name for path in (out_dir / 'demo').glob('*.py')} == {
+        'common.py',
+        'common_pb2.py',
+        'common_pb2_grpc.py',
+        'marketdata.py',
+        'marketdata_pb2.py',
+        'marketdata_pb2_grpc.py',
+    }
+    assert _get_class_names(out_dir / 'demo' / 'marketdata.py') == {
+        'MarketDataService',
+        'GetCandlesRequest',
+        'GetCandlesResponse',
+        'Candle',
+        'GetLastPricesRequest',
+        'LastPrice',
+    }
+    assert _get_class_names(out_dir / 'demo' / 'common.py') == {
+        'MoneyValue',
+        'SecurityTradingStatus',
+    }
+    with use_package(out_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        assert marketdata.Candle.Inner.__name__ == 'Inner'
+        assert not hasattr(marketdata, 'MarketDataStreamService')
+
+
+def test_pruned_imports(generate_package):
+    out_dir = generate_package(generation_roots=['GetCandlesRequest'])
+
+    assert not (out_dir / 'demo' / 'common.py').exists()
+    assert _get_imported_names(out_dir / 'demo' / 'marketdata.py') == {
+        'dataclass',
+        'datetime',
+        'Optional',
+    }
+
+
+@pytest.mark.parametrize(
+    'root', ['Unknown', 'other.MarketDataService', 'demo.common.MarketDataService']
+)
+def test_unknown_root(generate_package, root):
+    with pytest.raises(ValueError, match=f'Unknown generation root {root}'):
+        generate_package(generation_roots=[root])
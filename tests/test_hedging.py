@@ -0,0 +1,120 @@
+import importlib
+import threading
+import time
+from datetime import datetime, timezone
+
+import grpc
+import pytest
+
+from iprotopy import CallScheduler, Hedger, HedgingPolicy
+
+
+class SlowFirstCall:
+    def __init__(self, marketdata_pb2):
+        self._marketdata_pb2 = marketdata_pb2
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cancelled = threading.Event()
+
+    def get_candles(self, request, context):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+        # each call reports its own limit, so the winning call can be told apart
+        context.send_initial_metadata((('x-ratelimit-limit', str(call_number)),))
+        if call_number == 1:
+            context.add_callback(self.cancelled.set)
+            time.sleep(1)
+        return self._marketdata_pb2.GetCandlesResponse(volumes=[call_number])
+
+
+@pytest.fixture()
+def servicer(marketdata_pb2):
+    return SlowFirstCall(marketdata_pb2)
+
+
+@pytest.fixture()
+def channel(serve, servicer, marketdata_pb2):
+    return serve(
+        'demo.MarketDataService',
+        {
+            'GetCandles': grpc.unary_unary_rpc_method_handler(
+                servicer.get_candles,
+                request_deserializer=marketdata_pb2.GetCandlesRequest.FromString,
+                response_serializer=(
+                    marketdata_pb2.GetCandlesResponse.SerializeToString
+                ),
+            )
+        },
+    )
+
+
+def test_hedge_wins(channel, servicer, marketdata_pb2, marketdata_pb2_grpc):
+    hedger = Hedger(HedgingPolicy(delay=0.05, budget=1.0))
+    stub = marketdata_pb2_grpc.MarketDataServiceStub(channel)
+
+    start = time.perf_counter()
+    response, call = hedger.call(
+        'GetCandles', [stub], marketdata_pb2.GetCandlesRequest()
+    )
+
+    assert time.perf_counter() - start < 0.5
+    assert list(response.volumes) == [2]
+    assert call.initial_metadata() == (('x-ratelimit-limit', '2'),)
+    assert hedger.hedged_calls == 1
+    assert servicer.cancelled.wait(1)
+
+
+def test_method_not_hedged(channel, servicer, marketdata_pb2, marketdata_pb2_grpc):
+    hedger = Hedger(HedgingPolicy(delay=0.05, budget=1.0, methods=['GetOther']))
+    stub = marketdata_pb2_grpc.MarketDataServiceStub(channel)
+
+    response, _ = hedger.call('GetCandles', [stub], marketdata_pb2.GetCandlesRequest())
+
+    assert list(response.volumes) == [1]
+    assert hedger.hedged_calls == 0
+    assert servicer.calls == 1
+
+
+def test_budget_exhausted(channel, servicer, marketdata_pb2, marketdata_pb2_grpc):
+    hedger = Hedger(HedgingPolicy(delay=0.05, budget=0.0))
+    stub = marketdata_pb2_grpc.MarketDataServiceStub(channel)
+
+    response, _ = hedger.call('GetCandles', [stub], marketdata_pb2.GetCandlesRequest())
+
+    assert list(response.volumes) == [1]
+    assert hedger.calls == 1
+    assert hedger.hedged_calls == 0
+
+
+def test_percentile_delay(channel, servicer, marketdata_pb2, marketdata_pb2_grpc):
+    hedger = Hedger(HedgingPolicy(percentile=90, min_samples=3, budget=1.0))
+    for latency in (0.01, 0.02, 0.03):
+        hedger.record_latency('GetCandles', latency)
+    stub = marketdata_pb2_grpc.MarketDataServiceStub(channel)
+
+    response, _ = hedger.call('GetCandles', [stub], marketdata_pb2.GetCandlesRequest())
+
+    assert list(response.volumes) == [2]
+    assert hedger.hedged_calls == 1
+
+
+def test_generated_service(generate_package, use_package, channel, servicer):
+    out_dir = generate_package(request_hedging=True, call_scheduling=True)
+    hedger = Hedger(HedgingPolicy(delay=0.05, budget=1.0))
+    scheduler = CallScheduler()
+
+    with use_package(out_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        service = marketdata.MarketDataService(channel, (), hedger, scheduler)
+
+        now = datetime.now(timezone.utc)
+        request = marketdata.GetCandlesRequest(instrument_id='', from_=now, to=now)
+        response = service.GetCandles(request)
+
+    assert response.volumes == [2]
+    assert hedger.hedged_calls == 1
+    # the hedge takes a token of its own
+    assert scheduler.get_metrics()['GetCandles'].calls == 2
+    # the limit comes from the metadata of the winning call
+    assert scheduler._get_bucket('GetCandles').capacity == 2
@@ -0,0 +1,97 @@
+import dataclasses
+import importlib
+import sys
+import threading
+
+import pytest
+
+from iprotopy import protobuf_to_dataclass
+from iprotopy.interning import InternTable
+from iprotopy.wire_decoding import bytes_to_dataclass
+
+
+@pytest.fixture(scope='module')
+def interned_last_price(marketdata):
+    @dataclasses.dataclass
+    class InternedLastPrice(marketdata.LastPrice):
+        __interned__ = ('figi',)
+
+    return InternedLastPrice
+
+
+def test_intern_table_is_bounded():
+    table = InternTable(max_size=2)
+    first = table.intern(''.join(['a', 'b']))
+
+    assert table.intern(''.join(['a', 'b'])) is first
+    table.intern('c')
+    table.intern('d')
+    assert len(table) == 2
+    assert table.intern(''.join(['a', 'b'])) is not first
+
+
+def test_intern_table_threads():
+    table = InternTable(max_size=8)
+    errors = []
+
+    def intern_values(offset):
+        try:
+            for i in range(50000):
+                table.intern(str(offset + i % 64))
+        except Exception as e:
+            errors.append(e)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(target=intern_values, args=(i * 16,)) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    assert len(table) <= 8
+
+
+@pytest.mark.parametrize('wire', [False, True])
+def test_interned_field(interned_last_price, marketdata_pb2, wire):
+    pb_message = marketdata_pb2.LastPrice(figi='BBG000B9XRY4', instrument_uid='uid')
+
+    def convert():
+        if wire:
+            return bytes_to_dataclass(
+                pb_message.SerializeToString(),
+                marketdata_pb2.LastPrice,
+                interned_last_price,
+            )
+        return protobuf_to_dataclass(pb_message, interned_last_price)
+
+    first, second = convert(), convert()
+
+    assert first.figi == 'BBG000B9XRY4'
+    assert first.figi is second.figi
+
+
+def test_generated_interned_fields(generate_package, use_package):
+    out_dir = generate_package(interned_fields=['LastPrice.figi', 'instrument_id'])
+
+    with use_package(out_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+
+        assert marketdata.LastPrice.__interned__ == ('figi',)
+        assert marketdata.GetCandlesRequest.__interned__ == ('instrument_id',)
+        assert marketdata.GetLastPricesRequest.__interned__ == ('instrument_id',)
+        assert not hasattr(marketdata.Candle, '__interned__')
+
+
+@pytest.mark.parametrize(
+    'interned_fields', [['demo.LastPrice.figi'], ['LastPrice.price'], ['unknown']]
+)
+def test_unknown_interned_fields(generate_package, interned_fields):
+    with pytest.raises(ValueError, match='Unknown interned fields'):
+        generate_package(interned_fields=interned_fields)
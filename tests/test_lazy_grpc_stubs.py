@@ -0,0 +1,88 @@
+import importlib
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import grpc
+import pytest
+
+import iprotopy
+
+
+@pytest.fixture(scope='module')
+def lazy_stubs_dir(generate_package):
+    return generate_package(lazy_grpc_stubs=True)
+
+
+@pytest.fixture()
+def channel(serve, marketdata_pb2):
+    return serve(
+        'demo.MarketDataService',
+        {
+            'GetCandles': grpc.unary_unary_rpc_method_handler(
+                lambda request, context: marketdata_pb2.GetCandlesResponse(volumes=[1]),
+                request_deserializer=marketdata_pb2.GetCandlesRequest.FromString,
+                response_serializer=(
+                    marketdata_pb2.GetCandlesResponse.SerializeToString
+                ),
+            )
+        },
+    )
+
+
+def test_construction_does_not_import_grpc(lazy_stubs_dir):
+    # grpc is already imported by this process, so a fresh one is checked
+    code = (
+        'import sys\n'
+        'from demo.marketdata import MarketDataService\n'
+        'MarketDataService(object(), ())\n'
+        "print('grpc' in sys.modules, 'demo.marketdata_pb2_grpc' in sys.modules)\n"
+    )
+    python_path = [
+        str(lazy_stubs_dir),
+        os.path.dirname(os.path.dirname(iprotopy.__file__)),
+    ]
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(python_path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ['False', 'False']
+
+
+def test_stub_resolved_on_first_call(lazy_stubs_dir, use_package, channel):
+    with use_package(lazy_stubs_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        service_type = marketdata.MarketDataService
+        service = service_type(channel, ())
+
+        assert 'demo.marketdata_pb2_grpc' not in sys.modules
+        assert service_type._protobuf_stub is None
+
+        now = datetime.now(timezone.utc)
+        response = service.GetCandles(
+            marketdata.GetCandlesRequest(instrument_id='', from_=now, to=now)
+        )
+
+        assert response.volumes == [1]
+        marketdata_pb2_grpc = sys.modules['demo.marketdata_pb2_grpc']
+        stub_type = marketdata_pb2_grpc.MarketDataServiceStub
+        assert service_type._protobuf_stub is stub_type
+        assert isinstance(service._stub, stub_type)
+        # other instances reuse the stub class cached on the service class
+        assert isinstance(service_type(channel, ())._stub, stub_type)
+        assert marketdata.MarketDataStreamService._protobuf_stub is None
+
+
+def test_unknown_attribute(lazy_stubs_dir, use_package):
+    with use_package(lazy_stubs_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        service = marketdata.MarketDataService(object(), ())
+
+        with pytest.raises(AttributeError):
+            _ = service.unknown
+        assert 'demo.marketdata_pb2_grpc' not in sys.modules
@@ -0,0 +1,182 @@
+import queue
+import threading
+import time
+
+import grpc
+import pytest
+
+from iprotopy import StreamMultiplexer
+
+
+@pytest.fixture()
+def server_requests():
+    return queue.Queue()
+
+
+def create_service(serve, marketdata, marketdata_pb2, stream):
+    channel = serve(
+        'demo.MarketDataStreamService',
+        {
+            'MarketDataStream': grpc.stream_stream_rpc_method_handler(
+                stream,
+                request_deserializer=marketdata_pb2.MarketDataRequest.FromString,
+                response_serializer=(
+                    marketdata_pb2.MarketDataResponse.SerializeToString
+                ),
+            )
+        },
+    )
+    return marketdata.MarketDataStreamService(channel, [])
+
+
+@pytest.fixture()
+def service(serve, marketdata, marketdata_pb2, server_requests):
+    def stream(request_iterator, context):
+        for request in request_iterator:
+            subscription = request.subscribe_last_price_request
+            server_requests.put(
+                (
+                    subscription.subscription_action,
+                    list(subscription.instrument_ids),
+                )
+            )
+            if subscription.subscription_action != 1:
+                continue
+            for instrument_id in subscription.instrument_ids:
+                yield marketdata_pb2.MarketDataResponse(
+                    last_price=marketdata_pb2.LastPrice(figi=instrument_id)
+                )
+            ping = marketdata_pb2.MarketDataResponse()
+            ping.ping.SetInParent()
+            yield ping
+
+    return create_service(serve, marketdata, marketdata_pb2, stream)
+
+
+def create_multiplexer(service, marketdata):
+    def create_request(action):
+        def request(keys):
+            return marketdata.MarketDataRequest(
+                subscribe_last_price_request=marketdata.SubscribeLastPriceRequest(
+                    subscription_action=action, instrument_ids=keys
+                )
+            )
+
+        return request
+
+    def get_key(response):
+        if response.last_price is None:
+            return None
+        return response.last_price.figi
+
+    return StreamMultiplexer(
+        service.MarketDataStream,
+        create_request(marketdata.SubscriptionAction.SUBSCRIPTION_ACTION_SUBSCRIBE),
+        create_request(marketdata.SubscriptionAction.SUBSCRIPTION_ACTION_UNSUBSCRIBE),
+        get_key,
+    )
+
+
+@pytest.fixture()
+def multiplexer(service, marketdata):
+    multiplexer = create_multiplexer(service, marketdata)
+    yield multiplexer
+    multiplexer.close()
+
+
+def test_shared_stream(multiplexer, server_requests):
+    first = multiplexer.subscribe(['a', 'b'])
+    assert server_requests.get(timeout=5) == (1, ['a', 'b'])
+    assert first.get(timeout=5).last_price.figi == 'a'
+    assert first.get(timeout=5).last_price.figi == 'b'
+    assert first.get(timeout=5).last_price is None
+
+    second = multiplexer.subscribe(['b', 'c'])
+    assert server_requests.get(timeout=5) == (1, ['c'])
+    assert second.get(timeout=5).last_price.figi == 'c'
+    assert second.get(timeout=5).last_price is None
+    assert first.get(timeout=5).last_price is None
+
+    first.unsubscribe()
+    assert server_requests.get(timeout=5) == (2, ['a'])
+    second.unsubscribe()
+    assert server_requests.get(timeout=5) == (2, ['b', 'c'])
+    assert list(first) == []
+
+
+@pytest.fixture()
+def endless_service(serve, marketdata, marketdata_pb2):
+    # like a real market data stream it keeps sending pings after the client
+    # has sent its last request
+    def stream(request_iterator, context):
+        next(request_iterator)
+        while context.is_active():
+            ping = marketdata_pb2.MarketDataResponse()
+            ping.ping.SetInParent()
+            yield ping
+            time.sleep(0.01)
+
+    return create_service(serve, marketdata, marketdata_pb2, stream)
+
+
+def test_close_cancels_endless_stream(endless_service, marketdata):
+    multiplexer = create_multiplexer(endless_service, marketdata)
+    subscription = multiplexer.subscribe(['a'])
+    assert subscription.get(timeout=5).last_price is None
+
+    closing = threading.Thread(target=multiplexer.close, daemon=True)
+    closing.start()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    # the subscription ends without an error after the pings received so far
+    assert all(response.last_price is None for response in subscription)
+
+
+class FailingStream:
+    # the first stream fails before it reads any request, the next ones
+    # answer each subscribed key
+    def __init__(self):
+        self.streams = 0
+        self.requests = []
+
+    def __call__(self, requests):
+        self.streams += 1
+        if self.streams == 1:
+            raise RuntimeError('stream failed')
+        for request in requests:
+            self.requests.append(request)
+            yield from request[1]
+
+
+@pytest.fixture()
+def failing_multiplexer():
+    stream = FailingStream()
+    multiplexer = StreamMultiplexer(
+        stream,
+        lambda keys: ('subscribe', keys),
+        lambda keys: ('unsubscribe', keys),
+        lambda response: response,
+    )
+    yield stream, multiplexer
+    multiplexer.close()
+
+
+def test_stream_error_is_kept(failing_multiplexer):
+    _, multiplexer = failing_multiplexer
+    subscription = multiplexer.subscribe(['a'])
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match='stream failed'):
+            subscription.get(timeout=5)
+
+
+def test_restart_drops_stale_requests(failing_multiplexer):
+    stream, multiplexer = failing_multiplexer
+    with pytest.raises(RuntimeError):
+        multiplexer.subscribe(['a']).get(timeout=5)
+
+    subscription = multiplexer.subscribe(['b'])
+
+    assert subscription.get(timeout=5) == 'b'
+    assert stream.requests == [('subscribe', ['b'])]
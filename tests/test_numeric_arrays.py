@@ -0,0 +1,118 @@
+import importlib
+from array import array
+
+import pytest
+
+from iprotopy import (
+    dataclass_to_protobuf,
+    protobuf_to_dataclass,
+    protobuf_to_dict,
+    update_dataclass_from_protobuf,
+)
+from iprotopy.package_generator_settings import RepeatedNumericType
+from iprotopy.wire_decoding import bytes_to_dataclass
+
+
+@pytest.fixture(scope='module')
+def array_package_dir(generate_package):
+    return generate_package(repeated_numeric_type=RepeatedNumericType.ARRAY)
+
+
+@pytest.fixture()
+def array_modules(array_package_dir, use_package):
+    with use_package(array_package_dir):
+        yield (
+            importlib.import_module('demo.marketdata'),
+            importlib.import_module('demo.marketdata_pb2'),
+        )
+
+
+def _create_pb_response(marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1, -2], prices=[0.5])
+    candle = pb_message.candles.add(volume=5)
+    # every submessage is set, so the round trip gives back the same message
+    candle.open.units = 1
+    candle.close.units = 2
+    candle.time.seconds = 100
+    candle.inner.value = 0.5
+    return pb_message
+
+
+def test_generated_annotations(array_package_dir):
+    source = (array_package_dir / 'demo' / 'marketdata.py').read_text()
+
+    assert 'from array import array' in source
+    assert 'volumes: array' in source
+    assert "__arrays__ = {'volumes': 'q', 'prices': 'd'}" in source
+    assert 'instrument_id: List[str]' in source
+
+
+def test_round_trip(array_modules):
+    marketdata, marketdata_pb2 = array_modules
+    pb_response = _create_pb_response(marketdata_pb2)
+
+    result = protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+
+    assert result.volumes == array('q', [1, -2])
+    assert result.prices == array('d', [0.5])
+    assert result.candles[0].volume == 5
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+    assert pb_message == pb_response
+
+
+def test_new_instance(array_modules):
+    marketdata, marketdata_pb2 = array_modules
+    response = marketdata.GetCandlesResponse(
+        candles=[], volumes=array('q', [3]), prices=array('d', [1.5, 2.5])
+    )
+
+    pb_message = dataclass_to_protobuf(response, marketdata_pb2.GetCandlesResponse())
+
+    assert list(pb_message.volumes) == [3]
+    assert list(pb_message.prices) == [1.5, 2.5]
+
+
+def test_wire_decoding(array_modules):
+    marketdata, marketdata_pb2 = array_modules
+    pb_response = _create_pb_response(marketdata_pb2)
+
+    result = bytes_to_dataclass(
+        pb_response.SerializeToString(),
+        marketdata_pb2.GetCandlesResponse,
+        marketdata.GetCandlesResponse,
+    )
+
+    assert result == protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+    assert type(result.volumes) is array
+
+
+def test_dict_and_update(array_modules):
+    marketdata, marketdata_pb2 = array_modules
+    pb_response = _create_pb_response(marketdata_pb2)
+
+    result_dict = protobuf_to_dict(pb_response, marketdata.GetCandlesResponse)
+    assert result_dict['volumes'] == [1, -2]
+
+    result = protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+    update_dataclass_from_protobuf(
+        marketdata_pb2.GetCandlesResponse(volumes=[7]), result
+    )
+    assert result.volumes == array('q', [7])
+    assert result.candles == []
+
+
+def test_numpy(generate_package, use_package):
+    numpy = pytest.importorskip('numpy')
+    out_dir = generate_package(repeated_numeric_type=RepeatedNumericType.NUMPY)
+
+    with use_package(out_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        marketdata_pb2 = importlib.import_module('demo.marketdata_pb2')
+        pb_response = _create_pb_response(marketdata_pb2)
+
+        result = protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+
+        assert result.volumes.dtype == numpy.int64
+        assert result.volumes.tolist() == [1, -2]
+        pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+        assert pb_message == pb_response
@@ -0,0 +1,83 @@
+import pytest
+
+from iprotopy import (
+    dataclass_to_protobuf,
+    protobuf_to_dataclass,
+    update_dataclass_from_protobuf,
+)
+
+# every member set to the default value of its type
+DEFAULT_MEMBERS = [('num', 0), ('text', ''), ('sub', {}), ('color', 0)]
+
+
+def test_groups_recorded(marketdata):
+    assert marketdata.MarketDataResponse.__oneofs__ == {
+        'payload': ('last_price', 'ping', 'candle')
+    }
+
+
+def test_only_active_member_converted(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.MarketDataResponse()
+    pb_message.candle.volume = 7
+
+    result = protobuf_to_dataclass(pb_message, marketdata.MarketDataResponse)
+
+    assert result.last_price is None
+    assert result.ping is None
+    assert result.candle.volume == 7
+
+
+def test_no_active_member(marketdata, marketdata_pb2):
+    result = protobuf_to_dataclass(
+        marketdata_pb2.MarketDataResponse(), marketdata.MarketDataResponse
+    )
+
+    assert result == marketdata.MarketDataResponse()
+
+
+@pytest.mark.parametrize('field_name, value', DEFAULT_MEMBERS)
+def test_default_member_keeps_presence(variants, variants_pb2, field_name, value):
+    pb_message = variants_pb2.Variant(**{field_name: value})
+
+    result = protobuf_to_dataclass(pb_message, variants.Variant)
+
+    assert [
+        member
+        for member in variants.Variant.__oneofs__['kind']
+        if getattr(result, member) is not None
+    ] == [field_name]
+    assert dataclass_to_protobuf(result, variants_pb2.Variant()) == pb_message
+
+
+def test_default_member_values(variants, variants_pb2):
+    def convert(**kwargs):
+        return protobuf_to_dataclass(variants_pb2.Variant(**kwargs), variants.Variant)
+
+    assert convert(num=0).num == 0
+    assert convert(text='').text == ''
+    assert convert(sub={}).sub == variants.Sub(value=0)
+    color = convert(color=0).color
+    assert color == variants.Color.COLOR_UNSPECIFIED
+    assert isinstance(color, variants.Color)
+
+
+@pytest.mark.parametrize('field_name, value', DEFAULT_MEMBERS)
+def test_update_keeps_presence(variants, variants_pb2, field_name, value):
+    pb_message = variants_pb2.Variant(**{field_name: value})
+    result = protobuf_to_dataclass(variants_pb2.Variant(num=5), variants.Variant)
+
+    update_dataclass_from_protobuf(pb_message, result)
+
+    assert result == protobuf_to_dataclass(pb_message, variants.Variant)
+    assert getattr(result, field_name) is not None
+
+
+def test_empty_message_member(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.MarketDataResponse(ping={})
+
+    result = protobuf_to_dataclass(pb_message, marketdata.MarketDataResponse)
+
+    assert result.ping is not None
+    assert result.last_price is None
+    pb_result = dataclass_to_protobuf(result, marketdata_pb2.MarketDataResponse())
+    assert pb_result.WhichOneof('payload') == 'ping'
@@ -0,0 +1,52 @@
+import gc
+import tracemalloc
+
+from iprotopy import PackageGenerator
+from iprotopy.caching_parser import CachingParser
+
+
+def _write_protos(proto_dir, count):
+    package_dir = proto_dir / 'tree'
+    package_dir.mkdir(parents=True)
+    for i in range(count):
+        lines = ['syntax = "proto3";', 'package tree;']
+        if i:
+            lines.append(f'import "tree/file{i - 1}.proto";')
+        for j in range(20):
+            previous = f' Message{i - 1}_{j} previous = 3;' if i else ''
+            lines.append(
+                f'message Message{i}_{j} {{ string name = 1; int64 value = 2;'
+                f'{previous} }}'
+            )
+        (package_dir / f'file{i}.proto').write_text('\n'.join(lines) + '\n')
+
+
+def _get_retained_memory(tmp_path, count, parser=None):
+    # a small tree is generated first, so caches filled by any generation
+    # are not counted
+    _write_protos(tmp_path / 'warmup', 2)
+    _write_protos(tmp_path / 'protos', count)
+    generator = PackageGenerator(parser=parser)
+    generator.generate_sources(tmp_path / 'warmup', tmp_path / 'warmup_out')
+    gc.collect()
+    tracemalloc.start()
+    try:
+        generator.generate_sources(tmp_path / 'protos', tmp_path / 'out')
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_does_not_grow_with_tree_size(tmp_path):
+    small = _get_retained_memory(tmp_path / 'small', 5)
+    large = _get_retained_memory(tmp_path / 'large', 40)
+
+    assert large - small < 200 * 1024
+
+
+def test_caching_parser_keeps_parsed_files(tmp_path):
+    small = _get_retained_memory(tmp_path / 'small', 5, CachingParser())
+    large = _get_retained_memory(tmp_path / 'large', 40, CachingParser())
+
+    assert large - small > 200 * 1024
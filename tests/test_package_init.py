@@ -0,0 +1,80 @@
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+from iprotopy import PackageGenerator
+from iprotopy.package_generator_settings import PackageGeneratorSettings
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+def _load_package_init(out_dir):
+    spec = importlib.util.spec_from_file_location(
+        'generated_package', out_dir / '__init__.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _get_demo_modules():
+    return {name for name in sys.modules if name.split('.')[0] == 'demo'}
+
+
+@pytest.fixture(scope='module')
+def lazy_package_dir(generate_package):
+    return generate_package()
+
+
+def test_import_is_lazy(lazy_package_dir, use_package):
+    with use_package(lazy_package_dir):
+        package = _load_package_init(lazy_package_dir)
+
+        assert _get_demo_modules() == set()
+        assert 'MarketDataService' in package.__all__
+        assert _get_demo_modules() == set()
+
+
+def test_getattr_imports_module(lazy_package_dir, use_package):
+    with use_package(lazy_package_dir):
+        package = _load_package_init(lazy_package_dir)
+
+        last_price = package.LastPrice
+
+        marketdata = importlib.import_module('demo.marketdata')
+        assert last_price is marketdata.LastPrice
+        # the class is kept in the module globals after the first lookup
+        assert vars(package)['LastPrice'] is last_price
+
+
+def test_dir(lazy_package_dir, use_package):
+    with use_package(lazy_package_dir):
+        package = _load_package_init(lazy_package_dir)
+
+        names = dir(package)
+
+        assert {'Candle', 'MoneyValue', 'Variant', '__getattr__'} <= set(names)
+        assert names == sorted(names)
+        assert _get_demo_modules() == set()
+
+
+def test_unknown_name(lazy_package_dir, use_package):
+    with use_package(lazy_package_dir):
+        package = _load_package_init(lazy_package_dir)
+
+        with pytest.raises(AttributeError, match='Unknown'):
+            _ = package.Unknown
+
+
+def test_without_lazy_package_init(tmp_path):
+    PackageGenerator(PackageGeneratorSettings()).generate_sources(PROTO_DIR, tmp_path)
+    assert (tmp_path / '__init__.py').read_text()
+
+    PackageGenerator(
+        PackageGeneratorSettings(lazy_package_init=False)
+    ).generate_sources(PROTO_DIR, tmp_path)
+
+    assert (tmp_path / '__init__.py').read_text() == ''
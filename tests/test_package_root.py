@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import iprotopy
+
+
+def _get_imported_modules(code: str):
+    # other tests have imported everything already, so a fresh process checks
+    result = subprocess.run(
+        [sys.executable, '-c', f'{code}\nimport sys\nprint(*sys.modules)'],
+        env={
+            **os.environ,
+            'PYTHONPATH': os.path.dirname(os.path.dirname(iprotopy.__file__)),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_root_imports_conversion_only():
+    modules = _get_imported_modules('import iprotopy')
+
+    assert 'iprotopy.convertion' in modules
+    assert not modules & {
+        'iprotopy.package_generator',
+        'iprotopy.fanout',
+        'iprotopy.hedging',
+        'iprotopy.multiplexer',
+        'iprotopy.parallel_conversion',
+        'iprotopy.recording',
+        'iprotopy.scheduling',
+        'multiprocessing.shared_memory',
+        'grpc',
+    }
+
+
+def test_helper_is_imported_on_use():
+    modules = _get_imported_modules('from iprotopy import FanOutPublisher')
+
+    assert 'iprotopy.fanout' in modules
+    assert 'iprotopy.hedging' not in modules
+
+
+@pytest.mark.parametrize('name', iprotopy.__all__)
+def test_exported_names_resolve(name):
+    assert getattr(iprotopy, name) is not None
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError, match='no attribute'):
+        iprotopy.__getattr__('Unknown')
@@ -0,0 +1,89 @@
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import grpc
+import pytest
+
+from iprotopy import ParallelConverter, protobuf_to_dataclass
+
+
+@pytest.fixture()
+def pb_response(marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1, 2])
+    for i in range(25):
+        candle = pb_message.candles.add(volume=i)
+        candle.open.units = i
+    return pb_message
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_chunks_keep_order(marketdata, pb_response):
+    with CountingExecutor() as executor:
+        converter = ParallelConverter(threshold=10, chunk_size=10, executor=executor)
+        result = converter.convert(pb_response, marketdata.GetCandlesResponse)
+
+    assert executor.submitted == 3
+    assert result == protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+    assert [candle.volume for candle in result.candles] == list(range(25))
+
+
+def test_below_threshold_is_serial(marketdata, pb_response):
+    with CountingExecutor() as executor:
+        converter = ParallelConverter(threshold=100, executor=executor)
+        result = converter.convert(pb_response, marketdata.GetCandlesResponse)
+
+    assert executor.submitted == 0
+    assert len(result.candles) == 25
+
+
+def test_process_pool(marketdata, pb_response):
+    with ParallelConverter(threshold=10, chunk_size=10, max_workers=2) as converter:
+        result = converter.convert(pb_response, marketdata.GetCandlesResponse)
+
+    assert result == protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+
+
+@pytest.fixture()
+def channel(serve, marketdata_pb2):
+    pb_response = marketdata_pb2.GetCandlesResponse()
+    for i in range(25):
+        pb_response.candles.add(volume=i)
+    return serve(
+        'demo.MarketDataService',
+        {
+            'GetCandles': grpc.unary_unary_rpc_method_handler(
+                lambda request, context: pb_response,
+                request_deserializer=marketdata_pb2.GetCandlesRequest.FromString,
+                response_serializer=(
+                    marketdata_pb2.GetCandlesResponse.SerializeToString
+                ),
+            )
+        },
+    )
+
+
+def test_generated_service(generate_package, use_package, channel):
+    out_dir = generate_package(parallel_conversion=True)
+
+    with use_package(out_dir), CountingExecutor() as executor:
+        marketdata = importlib.import_module('demo.marketdata')
+        converter = ParallelConverter(threshold=10, chunk_size=10, executor=executor)
+        service = marketdata.MarketDataService(channel, (), converter)
+        now = datetime.now(timezone.utc)
+
+        result = service.GetCandles(
+            marketdata.GetCandlesRequest(instrument_id='', from_=now, to=now)
+        )
+
+        assert executor.submitted == 3
+        assert [candle.volume for candle in result.candles] == list(range(25))
@@ -0,0 +1,66 @@
+import pytest
+
+from iprotopy import dataclass_to_protobuf, protobuf_to_dataclass
+from iprotopy.convertion import PLACEHOLDER
+
+
+@pytest.fixture()
+def pb_response(marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1, 2], prices=[0.5])
+    candle = pb_message.candles.add(volume=5)
+    candle.open.units = 3
+    return pb_message
+
+
+def test_nested_projection(marketdata, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response,
+        marketdata.GetCandlesResponse,
+        projection=['candles.volume', 'candles.open.units', 'volumes'],
+    )
+
+    assert result.volumes == [1, 2]
+    assert result.prices is PLACEHOLDER
+    (candle,) = result.candles
+    assert candle.volume == 5
+    assert candle.open.units == 3
+    assert candle.open.currency is PLACEHOLDER
+    assert candle.close is PLACEHOLDER
+
+
+def test_parent_path_selects_whole_field(marketdata, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response,
+        marketdata.GetCandlesResponse,
+        projection=['candles.volume', 'candles'],
+    )
+
+    assert (
+        result.candles
+        == protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse).candles
+    )
+
+
+def test_projected_dataclass_round_trip(marketdata, marketdata_pb2, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response, marketdata.GetCandlesResponse, projection=['volumes']
+    )
+
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+
+    assert pb_message == marketdata_pb2.GetCandlesResponse(volumes=[1, 2])
+
+
+def test_unknown_field(marketdata, pb_response):
+    with pytest.raises(ValueError):
+        protobuf_to_dataclass(
+            pb_response, marketdata.GetCandlesResponse, projection=['candles.nope']
+        )
+
+
+@pytest.mark.parametrize('path', ['volumes.x', 'candles.volume.x'])
+def test_path_through_scalar_field(marketdata, pb_response, path):
+    with pytest.raises(ValueError, match='not messages'):
+        protobuf_to_dataclass(
+            pb_response, marketdata.GetCandlesResponse, projection=[path]
+        )
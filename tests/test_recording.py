@@ -0,0 +1,139 @@
+import importlib
+import io
+
+import grpc
+import pytest
+
+from iprotopy import StreamRecorder, StreamReplayer, protobuf_to_dataclass
+from iprotopy import recording as recording_module
+from iprotopy.recording import INDEX_SUFFIX
+
+
+@pytest.fixture()
+def pb_messages(marketdata_pb2):
+    return [marketdata_pb2.LastPrice(figi=f'figi{i}') for i in range(5)]
+
+
+@pytest.fixture()
+def recording(tmp_path, pb_messages):
+    path = tmp_path / 'stream.bin'
+    with StreamRecorder(path) as recorder:
+        for i, pb_message in enumerate(pb_messages):
+            recorder.record(pb_message.SerializeToString(), timestamp_ns=i * 10)
+    return path
+
+
+@pytest.mark.parametrize('wire_decoding', [False, True])
+def test_replay(recording, pb_messages, marketdata, marketdata_pb2, wire_decoding):
+    expected = [
+        protobuf_to_dataclass(pb_message, marketdata.LastPrice)
+        for pb_message in pb_messages
+    ]
+
+    with StreamReplayer(
+        recording,
+        marketdata_pb2.LastPrice,
+        marketdata.LastPrice,
+        wire_decoding=wire_decoding,
+    ) as replayer:
+        assert len(replayer) == 5
+        assert list(replayer) == expected
+        assert replayer[3] == expected[3]
+        assert list(replayer.replay(start=3)) == expected[3:]
+        assert list(replayer.replay_batches(2, stop=4)) == [
+            expected[:2],
+            expected[2:4],
+        ]
+
+
+def test_seek(recording, marketdata, marketdata_pb2):
+    with StreamReplayer(
+        recording, marketdata_pb2.LastPrice, marketdata.LastPrice
+    ) as replayer:
+        assert replayer.seek(20) == 2
+        assert replayer.seek(21) == 3
+        assert replayer.seek(100) == 5
+        assert replayer.get_timestamp(4) == 40
+
+
+def test_append(recording, marketdata, marketdata_pb2):
+    with StreamRecorder(recording) as recorder:
+        recorder.record(marketdata_pb2.LastPrice(figi='last').SerializeToString())
+
+    with StreamReplayer(
+        recording, marketdata_pb2.LastPrice, marketdata.LastPrice
+    ) as replayer:
+        assert len(replayer) == 6
+        assert replayer[-1].figi == 'last'
+
+
+def test_empty_recording(tmp_path, marketdata, marketdata_pb2):
+    path = tmp_path / 'empty.bin'
+    StreamRecorder(path).close()
+
+    with StreamReplayer(path, marketdata_pb2.LastPrice, marketdata.LastPrice) as r:
+        assert len(r) == 0
+        assert list(r) == []
+
+
+def test_data_file_closed_when_index_fails(tmp_path, monkeypatch):
+    files = []
+
+    def open_file(path, mode):
+        if path.name.endswith(INDEX_SUFFIX):
+            raise PermissionError(path)
+        files.append(io.BytesIO())
+        return files[-1]
+
+    monkeypatch.setattr(recording_module, 'open', open_file, raising=False)
+
+    with pytest.raises(PermissionError):
+        StreamRecorder(tmp_path / 'stream.bin')
+
+    assert len(files) == 1
+    assert files[0].closed
+
+
+class LastPrices:
+    def __init__(self, marketdata_pb2):
+        self._marketdata_pb2 = marketdata_pb2
+
+    def get_last_prices(self, request, context):
+        for instrument_id in request.instrument_id:
+            yield self._marketdata_pb2.LastPrice(figi=instrument_id)
+
+
+@pytest.fixture()
+def channel(serve, marketdata_pb2):
+    return serve(
+        'demo.MarketDataService',
+        {
+            'GetLastPrices': grpc.unary_stream_rpc_method_handler(
+                LastPrices(marketdata_pb2).get_last_prices,
+                request_deserializer=marketdata_pb2.GetLastPricesRequest.FromString,
+                response_serializer=marketdata_pb2.LastPrice.SerializeToString,
+            )
+        },
+    )
+
+
+def test_generated_service_records(generate_package, use_package, channel, tmp_path):
+    out_dir = generate_package(stream_recording=True)
+    path = tmp_path / 'prices.bin'
+
+    with use_package(out_dir):
+        marketdata = importlib.import_module('demo.marketdata')
+        marketdata_pb2 = importlib.import_module('demo.marketdata_pb2')
+        with StreamRecorder(path) as recorder:
+            service = marketdata.MarketDataService(channel, (), recorder)
+            responses = list(
+                service.GetLastPrices(
+                    marketdata.GetLastPricesRequest(instrument_id=['a', 'b', 'c'])
+                )
+            )
+
+        with StreamReplayer(
+            path, marketdata_pb2.LastPrice, marketdata.LastPrice
+        ) as replayer:
+            assert [response.figi for response in responses] == ['a', 'b', 'c']
+            assert list(replayer) == responses
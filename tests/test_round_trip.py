@@ -0,0 +1,88 @@
+import pytest
+
+from iprotopy import dataclass_serializer, dataclass_to_protobuf, protobuf_to_dataclass
+from iprotopy.convertion import get_unmodified_source
+
+
+@pytest.fixture()
+def pb_response(marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1, 2])
+    candle = pb_message.candles.add(volume=5)
+    candle.open.units = 3
+    # nanoseconds are lost by a datetime, so they only survive a reused source
+    candle.time.nanos = 1
+    return pb_message
+
+
+def test_unmodified_reuses_source(marketdata, marketdata_pb2, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response, marketdata.GetCandlesResponse, keep_source=True
+    )
+
+    assert get_unmodified_source(result) == pb_response
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+    assert pb_message == pb_response
+    serialize = dataclass_serializer(marketdata_pb2.GetCandlesResponse)
+    assert serialize(result) == pb_response.SerializeToString()
+
+
+def test_source_mutated_after_conversion(marketdata, marketdata_pb2, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response, marketdata.GetCandlesResponse, keep_source=True
+    )
+    expected = pb_response.SerializeToString()
+
+    pb_response.volumes.append(3)
+    pb_response.candles[0].open.units = 4
+    pb_response.candles.add(volume=6)
+
+    assert get_unmodified_source(result) is not pb_response
+    serialize = dataclass_serializer(marketdata_pb2.GetCandlesResponse)
+    assert serialize(result) == expected
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+    assert pb_message.SerializeToString() == expected
+    pb_candle = dataclass_to_protobuf(result.candles[0], marketdata_pb2.Candle())
+    assert pb_candle.open.units == 3
+
+
+def test_without_keep_source(marketdata, pb_response):
+    result = protobuf_to_dataclass(pb_response, marketdata.GetCandlesResponse)
+
+    assert get_unmodified_source(result) is None
+
+
+def test_assignment_marks_modified(marketdata, marketdata_pb2, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response, marketdata.GetCandlesResponse, keep_source=True
+    )
+    result.candles[0].volume = 7
+
+    assert get_unmodified_source(result) is None
+    assert get_unmodified_source(result.candles[0].open) is not None
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+    assert pb_message.candles[0].volume == 7
+    assert pb_message.candles[0].time.nanos == 0
+    assert pb_message.candles[0].open.units == 3
+
+
+def test_list_mutation_marks_modified(marketdata, marketdata_pb2, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response, marketdata.GetCandlesResponse, keep_source=True
+    )
+    result.candles.append(result.candles[0])
+
+    assert get_unmodified_source(result) is None
+    pb_message = dataclass_to_protobuf(result, marketdata_pb2.GetCandlesResponse())
+    # the candles themselves are unmodified and still copied from the source
+    assert [candle.time.nanos for candle in pb_message.candles] == [1, 1]
+
+
+def test_projection_does_not_keep_source(marketdata, pb_response):
+    result = protobuf_to_dataclass(
+        pb_response,
+        marketdata.GetCandlesResponse,
+        projection=['volumes'],
+        keep_source=True,
+    )
+
+    assert get_unmodified_source(result) is None
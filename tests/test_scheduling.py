@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from iprotopy import CallScheduler, RateLimit
+from iprotopy.scheduling import TokenBucket
+
+
+def test_bucket_allows_burst():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() > 0
+
+
+def test_unlimited_method_is_not_delayed():
+    scheduler = CallScheduler()
+
+    assert scheduler.acquire('GetCandles') == 0.0
+    assert scheduler.get_metrics()['GetCandles'].calls == 1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_calls_are_spaced_by_rate():
+    clock = FakeClock()
+    scheduler = CallScheduler(
+        limits={'GetCandles': RateLimit(1, 0.05)}, clock=clock, sleep=clock.sleep
+    )
+
+    for _ in range(4):
+        scheduler.acquire('GetCandles')
+
+    assert clock.sleeps == pytest.approx([0.05, 0.05, 0.05])
+    metrics = scheduler.get_metrics()['GetCandles']
+    assert metrics.calls == 4
+    assert metrics.delayed_calls == 3
+    assert metrics.queued == 0
+    assert metrics.max_wait == pytest.approx(0.05)
+    assert metrics.total_wait == pytest.approx(0.15)
+
+
+def test_group_shares_bucket():
+    scheduler = CallScheduler(
+        limits={'market': RateLimit(1, 10)},
+        groups={'GetCandles': 'market', 'GetLastPrices': 'market'},
+    )
+
+    scheduler.acquire('GetCandles')
+    waits = []
+    thread = threading.Thread(
+        target=lambda: waits.append(scheduler._get_bucket('market').reserve())
+    )
+    thread.start()
+    thread.join()
+
+    assert waits[0] > 9
+    assert list(scheduler.get_metrics()) == ['market']
+
+
+def test_limit_from_metadata():
+    scheduler = CallScheduler()
+    scheduler.update_from_metadata(
+        'GetCandles',
+        (
+            ('x-ratelimit-limit', '100, 60'),
+            ('x-ratelimit-remaining', '0'),
+            ('x-ratelimit-reset', '30'),
+        ),
+    )
+
+    bucket = scheduler._get_bucket('GetCandles')
+    assert bucket.capacity == 100
+    assert 29 < bucket.reserve() < 31
+    assert bucket.reserve() < 31
+
+
+def test_metadata_without_limit_is_ignored():
+    scheduler = CallScheduler()
+    scheduler.update_from_metadata('GetCandles', (('x-request-id', 'abc'),))
+
+    assert scheduler._get_bucket('GetCandles') is None
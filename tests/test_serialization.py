@@ -0,0 +1,159 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from iprotopy import (
+    dataclass_deserializer,
+    dataclass_serializer,
+    dataclass_to_protobuf,
+    pooled_dataclass_serializer,
+    pooled_protobuf_requests,
+    protobuf_to_dataclass,
+)
+
+
+@pytest.fixture()
+def pb_messages(marketdata_pb2):
+    response = marketdata_pb2.GetCandlesResponse(volumes=[1, 2], prices=[0.5])
+    candle = response.candles.add(volume=5, is_complete=True, status=1)
+    candle.open.units = 3
+    candle.close.nano = 1
+    candle.time.seconds = 100
+    candle.inner.value = 1.5
+    request = marketdata_pb2.GetCandlesRequest(instrument_id='uid', limit=0)
+    getattr(request, 'from').seconds = 100
+    request.to.seconds = 200
+    return [
+        response,
+        request,
+        marketdata_pb2.GetLastPricesRequest(instrument_id=['a', 'b']),
+        marketdata_pb2.GetCandlesResponse(),
+    ]
+
+
+def test_serializer(pb_messages, marketdata):
+    for pb_message in pb_messages:
+        dataclass_type = getattr(marketdata, type(pb_message).__name__)
+        dataclass_obj = protobuf_to_dataclass(pb_message, dataclass_type)
+
+        serialize = dataclass_serializer(type(pb_message))
+
+        expected = dataclass_to_protobuf(dataclass_obj, type(pb_message)())
+        assert serialize(dataclass_obj) == expected.SerializeToString()
+        assert serialize(dataclass_obj) == pb_message.SerializeToString()
+
+
+def test_serializer_of_new_instance(marketdata, marketdata_pb2):
+    request = marketdata.GetCandlesRequest(
+        instrument_id='uid',
+        from_=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        to=datetime(2024, 1, 2, tzinfo=timezone.utc),
+    )
+    expected = dataclass_to_protobuf(request, marketdata_pb2.GetCandlesRequest())
+
+    serialize = dataclass_serializer(marketdata_pb2.GetCandlesRequest)
+
+    assert serialize(request) == expected.SerializeToString()
+
+
+@pytest.mark.parametrize('keep_source', [False, True])
+def test_deserializer(pb_messages, marketdata, keep_source):
+    for pb_message in pb_messages:
+        protobuf_type = type(pb_message)
+        dataclass_type = getattr(marketdata, protobuf_type.__name__)
+
+        deserialize = dataclass_deserializer(protobuf_type, dataclass_type, keep_source)
+
+        result = deserialize(pb_message.SerializeToString())
+        assert result == protobuf_to_dataclass(pb_message, dataclass_type)
+        assert dataclass_serializer(protobuf_type)(result) == (
+            pb_message.SerializeToString()
+        )
+
+
+def _create_request(marketdata, instrument_id, limit=None):
+    return marketdata.GetCandlesRequest(
+        instrument_id=instrument_id,
+        from_=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        to=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        limit=limit,
+    )
+
+
+def _serialize(request, marketdata_pb2):
+    pb_request = dataclass_to_protobuf(request, marketdata_pb2.GetCandlesRequest())
+    return pb_request.SerializeToString()
+
+
+def test_pooled_serializer(pb_messages, marketdata):
+    for pb_message in pb_messages:
+        dataclass_type = getattr(marketdata, type(pb_message).__name__)
+        dataclass_obj = protobuf_to_dataclass(pb_message, dataclass_type)
+
+        serialize = pooled_dataclass_serializer(type(pb_message))
+
+        assert serialize(dataclass_obj) == pb_message.SerializeToString()
+        assert serialize(dataclass_obj) == pb_message.SerializeToString()
+
+
+def test_pooled_serializer_does_not_leak_fields(marketdata, marketdata_pb2):
+    requests = [
+        _create_request(marketdata, 'first', limit=5),
+        _create_request(marketdata, 'second'),
+    ]
+    serialize = pooled_dataclass_serializer(marketdata_pb2.GetCandlesRequest)
+
+    results = [serialize(request) for request in requests]
+
+    assert results == [_serialize(request, marketdata_pb2) for request in requests]
+    assert not marketdata_pb2.GetCandlesRequest.FromString(results[1]).HasField('limit')
+
+
+def test_pooled_serializer_threads(marketdata, marketdata_pb2):
+    serialize = pooled_dataclass_serializer(marketdata_pb2.GetCandlesRequest)
+    thread_count = 4
+    barrier = threading.Barrier(thread_count)
+    mismatches = []
+
+    def serialize_requests(thread_number):
+        requests = [
+            _create_request(
+                marketdata, f'{thread_number}-{i}', limit=i if i % 2 else None
+            )
+            for i in range(200)
+        ]
+        # serialized up front so that the threads only contend on the pool
+        cases = [(request, _serialize(request, marketdata_pb2)) for request in requests]
+        barrier.wait()
+        for request, data in cases:
+            if serialize(request) != data:
+                mismatches.append(request)
+
+    threads = [
+        threading.Thread(target=serialize_requests, args=(i,))
+        for i in range(thread_count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mismatches == []
+
+
+def test_pooled_protobuf_requests(marketdata, marketdata_pb2):
+    requests = [
+        _create_request(marketdata, 'first', limit=5),
+        _create_request(marketdata, 'second'),
+        _create_request(marketdata, 'third', limit=0),
+    ]
+
+    results = [
+        pb_request.SerializeToString()
+        for pb_request in pooled_protobuf_requests(
+            requests, marketdata_pb2.GetCandlesRequest
+        )
+    ]
+
+    assert results == [_serialize(request, marketdata_pb2) for request in requests]
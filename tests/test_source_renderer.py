@@ -0,0 +1,114 @@
+import ast
+import io
+import tokenize
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from iprotopy import PackageGenerator
+from iprotopy.package_generator_settings import (
+    EnumRepresentation,
+    PackageGeneratorSettings,
+    RenderBackend,
+    RepeatedNumericType,
+)
+from iprotopy.source_renderer import AstorSourceRenderer
+from iprotopy.source_writer import SourceWriter
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+OPTIONS = {
+    'default': {},
+    'service_options': {
+        'lazy_grpc_stubs': True,
+        'request_hedging': True,
+        'call_scheduling': True,
+        'parallel_conversion': True,
+        'projection_argument': True,
+        'stream_recording': True,
+        'keep_protobuf_source': True,
+    },
+    'message_options': {
+        'expanded_dataclasses': True,
+        'enum_representation': EnumRepresentation.INT_CONSTANTS,
+        'repeated_numeric_type': RepeatedNumericType.ARRAY,
+    },
+}
+
+# only the layout may differ: astor wraps long lines in parentheses and
+# leaves them out around tuples where ast.unparse keeps them, so those
+# tokens are dropped and the grouping is checked on the AST instead
+_LAYOUT_TOKENS = {
+    tokenize.NL,
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENDMARKER,
+}
+_GROUPING_TOKENS = {'(', ')'}
+
+
+@pytest.fixture(scope='module', params=list(OPTIONS))
+def rendered(request, tmp_path_factory):
+    result = {}
+    for backend in RenderBackend:
+        out_dir = tmp_path_factory.mktemp(backend.value.lower())
+        settings = PackageGeneratorSettings(
+            render_backend=backend, **OPTIONS[request.param]
+        )
+        PackageGenerator(settings).generate_sources(PROTO_DIR, out_dir)
+        result[backend] = out_dir
+    return result
+
+
+def _sources(out_dir: Path):
+    return {
+        path.relative_to(out_dir): path.read_text()
+        for path in out_dir.rglob('*.py')
+        if not path.stem.endswith(('_pb2', '_pb2_grpc'))
+    }
+
+
+def _tokens(source: str) -> List[str]:
+    return [
+        token.string
+        for token in tokenize.generate_tokens(io.StringIO(source).readline)
+        if token.type not in _LAYOUT_TOKENS and token.string not in _GROUPING_TOKENS
+    ]
+
+
+def test_backends_render_same_modules(rendered):
+    astor_sources = _sources(rendered[RenderBackend.ASTOR])
+    unparse_sources = _sources(rendered[RenderBackend.UNPARSE])
+
+    assert astor_sources.keys() == unparse_sources.keys()
+    for pyfile, astor_source in astor_sources.items():
+        unparse_source = unparse_sources[pyfile]
+        assert _tokens(astor_source) == _tokens(unparse_source), pyfile
+        assert ast.dump(ast.parse(astor_source)) == ast.dump(
+            ast.parse(unparse_source)
+        ), pyfile
+
+
+def test_compile_bytecode(tmp_path):
+    settings = PackageGeneratorSettings(
+        render_backend=RenderBackend.UNPARSE,
+        compile_bytecode=True,
+        compile_workers=2,
+    )
+    PackageGenerator(settings).generate_sources(PROTO_DIR, tmp_path)
+
+    pycs = {path.name.split('.')[0] for path in tmp_path.rglob('*.pyc')}
+    assert {'base_service', 'common', 'marketdata'} <= pycs
+
+
+def test_written_files_kept_only_for_compiling(tmp_path):
+    # the watcher keeps its writer for the whole process
+    writer = SourceWriter(AstorSourceRenderer())
+    for i in range(3):
+        writer.write(ast.parse(f'x = {i}'), tmp_path / 'module.py')
+        writer.compile()
+
+    assert writer._written == []
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from iprotopy.descriptor_parser import DescriptorParser
+from iprotopy.importer import Importer
+from iprotopy.protos_generator import ProtosGenerator
+from iprotopy.symbol_scanner import SymbolScanner
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+def test_matches_descriptor_symbols():
+    proto_files = list(PROTO_DIR.rglob('*.proto'))
+    descriptor_set = ProtosGenerator(
+        Importer(), in_process=True
+    ).generate_descriptor_set(PROTO_DIR, proto_files)
+    descriptor_parser = DescriptorParser(descriptor_set)
+
+    for proto_file in proto_files:
+        assert sorted(SymbolScanner().scan(proto_file)) == sorted(
+            descriptor_parser.get_symbols(proto_file.relative_to(PROTO_DIR).as_posix())
+        )
+
+
+def test_ignores_comments_and_strings(tmp_path):
+    proto_file = tmp_path / 'example.proto'
+    proto_file.write_text(
+        'syntax = "proto3";\n'
+        '// message Commented {}\n'
+        '/* enum Blocked {\n} */\n'
+        'message Outer {\n'
+        '  option (note) = "message Quoted {";\n'
+        '  message Nested {}\n'
+        '}\n'
+        'service Api {}\n'
+    )
+
+    assert SymbolScanner().scan(proto_file) == ['Outer', 'Nested', 'Api']
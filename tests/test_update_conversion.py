@@ -0,0 +1,75 @@
+from iprotopy import protobuf_to_dataclass, update_dataclass_from_protobuf
+
+
+def _last_price(marketdata_pb2, figi, units):
+    pb_message = marketdata_pb2.LastPrice(figi=figi)
+    pb_message.price.units = units
+    pb_message.time.seconds = 60
+    return pb_message
+
+
+def test_updates_nested_in_place(marketdata, marketdata_pb2):
+    last_price = protobuf_to_dataclass(
+        _last_price(marketdata_pb2, 'BBG000', 1), marketdata.LastPrice
+    )
+    price = last_price.price
+
+    result = update_dataclass_from_protobuf(
+        _last_price(marketdata_pb2, 'BBG001', 2), last_price
+    )
+
+    assert result is last_price
+    assert last_price.price is price
+    assert price.units == 2
+    assert last_price.figi == 'BBG001'
+    assert last_price == protobuf_to_dataclass(
+        _last_price(marketdata_pb2, 'BBG001', 2), marketdata.LastPrice
+    )
+
+
+def test_only_set_fields(marketdata, marketdata_pb2):
+    last_price = protobuf_to_dataclass(
+        _last_price(marketdata_pb2, 'BBG000', 1), marketdata.LastPrice
+    )
+    update = marketdata_pb2.LastPrice()
+    update.price.units = 5
+
+    update_dataclass_from_protobuf(update, last_price, only_set_fields=True)
+
+    assert last_price.figi == 'BBG000'
+    assert last_price.price.units == 5
+    assert last_price.time.timestamp() == 60
+
+
+def test_repeated_items_are_reused(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[1])
+    pb_message.candles.add(volume=1)
+    response = protobuf_to_dataclass(pb_message, marketdata.GetCandlesResponse)
+    candles = response.candles
+    candle = candles[0]
+
+    pb_message = marketdata_pb2.GetCandlesResponse(volumes=[2, 3])
+    pb_message.candles.add(volume=2)
+    pb_message.candles.add(volume=3)
+    update_dataclass_from_protobuf(pb_message, response)
+
+    assert response.candles is candles
+    assert response.candles[0] is candle
+    assert [item.volume for item in response.candles] == [2, 3]
+    assert list(response.volumes) == [2, 3]
+
+    update_dataclass_from_protobuf(marketdata_pb2.GetCandlesResponse(), response)
+    assert response.candles == []
+
+
+def test_oneof_switch(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.MarketDataResponse()
+    pb_message.last_price.figi = 'BBG000'
+    response = protobuf_to_dataclass(pb_message, marketdata.MarketDataResponse)
+
+    pb_message = marketdata_pb2.MarketDataResponse()
+    pb_message.candle.volume = 4
+    update_dataclass_from_protobuf(pb_message, response, only_set_fields=True)
+
+    assert response.last_price is None
+    assert response.candle.volume == 4
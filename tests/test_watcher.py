@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from iprotopy.package_generator_settings import PackageGeneratorSettings
+from iprotopy.watcher import ProtoWatcher
+
+PROTO_DIR = Path(__file__).resolve().parent / 'protos'
+
+
+@pytest.fixture()
+def proto_dir(tmp_path):
+    proto_dir = tmp_path / 'protos'
+    shutil.copytree(PROTO_DIR, proto_dir)
+    return proto_dir
+
+
+def _get_mtimes(out_dir):
+    return {path: path.stat().st_mtime_ns for path in out_dir.rglob('*.py')}
+
+
+def test_regenerates_changed_files(proto_dir, tmp_path):
+    out_dir = tmp_path / 'out'
+    watcher = ProtoWatcher(
+        proto_dir, out_dir, PackageGeneratorSettings(in_process_protoc=True)
+    )
+
+    assert watcher.poll()
+    assert not watcher.poll()
+
+    mtimes = _get_mtimes(out_dir)
+    common_proto = proto_dir / 'demo' / 'common.proto'
+    common_proto.write_text(
+        common_proto.read_text() + '\nmessage Extra {\n  string value = 1;\n}\n'
+    )
+    assert watcher.poll()
+
+    changed = {
+        path.relative_to(out_dir).as_posix()
+        for path, mtime in _get_mtimes(out_dir).items()
+        if mtimes.get(path) != mtime
+    }
+    assert changed == {
+        '__init__.py',
+        'demo/common.py',
+        'demo/common_pb2.py',
+        'demo/common_pb2_grpc.py',
+    }
+    assert 'class Extra' in (out_dir / 'demo' / 'common.py').read_text()
+
+
+def test_removes_deleted_files(proto_dir, tmp_path):
+    out_dir = tmp_path / 'out'
+    watcher = ProtoWatcher(
+        proto_dir, out_dir, PackageGeneratorSettings(in_process_protoc=True)
+    )
+    watcher.poll()
+
+    (proto_dir / 'demo' / 'marketdata.proto').unlink()
+    assert watcher.poll()
+
+    assert not (out_dir / 'demo' / 'marketdata.py').exists()
+    assert not (out_dir / 'demo' / 'marketdata_pb2.py').exists()
+    assert (out_dir / 'demo' / 'common.py').exists()
@@ -0,0 +1,104 @@
+import pytest
+
+from iprotopy import protobuf_to_dataclass
+from iprotopy.wire_decoding import bytes_to_dataclass
+
+
+def _assert_parity(pb_message, dataclass_type):
+    expected = protobuf_to_dataclass(pb_message, dataclass_type)
+    actual = bytes_to_dataclass(
+        pb_message.SerializeToString(), type(pb_message), dataclass_type
+    )
+    assert actual == expected
+    return actual
+
+
+def test_nested_message(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.LastPrice(figi='BBG000B9XRY4', instrument_uid='uid')
+    pb_message.price.currency = 'usd'
+    pb_message.price.units = -12
+    pb_message.price.nano = -500000000
+    pb_message.time.seconds = 1700000000
+    pb_message.time.nanos = 123456789
+
+    _assert_parity(pb_message, marketdata.LastPrice)
+
+
+def test_empty_message(marketdata, marketdata_pb2):
+    _assert_parity(marketdata_pb2.LastPrice(), marketdata.LastPrice)
+    _assert_parity(marketdata_pb2.Candle(), marketdata.Candle)
+
+
+def test_repeated_fields(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesResponse(
+        volumes=[1, -2, 2**40], prices=[0.5, -1.25, 1e300]
+    )
+    for i in range(3):
+        candle = pb_message.candles.add(volume=i, is_complete=bool(i % 2), status=i % 2)
+        candle.open.units = i
+        candle.inner.value = i / 3
+
+    actual = _assert_parity(pb_message, marketdata.GetCandlesResponse)
+    assert len(actual.candles) == 3
+
+
+def test_optional_fields(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.GetCandlesRequest(instrument_id='')
+    _assert_parity(pb_message, marketdata.GetCandlesRequest)
+
+    pb_message.limit = 0
+    _assert_parity(pb_message, marketdata.GetCandlesRequest)
+
+    pb_message.limit = 100
+    pb_message.instrument_id = 'uid'
+    _assert_parity(pb_message, marketdata.GetCandlesRequest)
+
+
+def test_oneof(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.MarketDataResponse()
+    _assert_parity(pb_message, marketdata.MarketDataResponse)
+
+    pb_message.last_price.figi = 'figi'
+    _assert_parity(pb_message, marketdata.MarketDataResponse)
+
+    pb_message.ping.time.seconds = 1
+    actual = _assert_parity(pb_message, marketdata.MarketDataResponse)
+    assert actual.last_price is None
+
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [
+        {},
+        {'num': 0},
+        {'num': 3},
+        {'text': ''},
+        {'text': 'hi'},
+        {'sub': {}},
+        {'color': 0},
+    ],
+)
+def test_scalar_oneof(variants, variants_pb2, kwargs):
+    actual = _assert_parity(variants_pb2.Variant(**kwargs), variants.Variant)
+
+    assert [
+        member
+        for member in variants.Variant.__oneofs__['kind']
+        if getattr(actual, member) is not None
+    ] == list(kwargs)
+
+
+def test_oneof_enum_type(variants, variants_pb2):
+    actual = _assert_parity(variants_pb2.Variant(color=1), variants.Variant)
+
+    assert type(actual.color) is variants.Color
+
+
+def test_unknown_fields_are_skipped(marketdata, marketdata_pb2):
+    pb_message = marketdata_pb2.LastPrice(figi='figi')
+    # field 15, length delimited, followed by field 16 varint
+    data = pb_message.SerializeToString() + b'\x7a\x03abc\x80\x01\x05'
+
+    actual = bytes_to_dataclass(data, marketdata_pb2.LastPrice, marketdata.LastPrice)
+
+    assert actual == protobuf_to_dataclass(pb_message, marketdata.LastPrice)